@@ -0,0 +1,227 @@
+"""
+Headless batch export of track projects.
+
+Inside Blender, exports the open file: the add-on is enabled, the preflight
+checks run, and every exportable collection is written to KN5 and/or FBX
+along with the track data and layout files. Outside Blender, runs a pool of
+background Blender processes over many .blend files and merges their
+summaries.
+
+Either way the summary (timings, file sizes, warnings and preflight errors)
+is written as JSON, and the exit code is non-zero if any file had blocking
+preflight errors or failed to export. See the README for usage.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ADDON_DIR = Path(__file__).resolve().parent
+ADDON_PACKAGE = ADDON_DIR.name
+
+FORMATS = ("kn5", "fbx")
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="Export Assetto Corsa track projects without the Blender UI.",
+    )
+    parser.add_argument(
+        "blend_files",
+        nargs="*",
+        help="Files to export in background Blender processes (outside Blender only)",
+    )
+    parser.add_argument(
+        "--format",
+        dest="formats",
+        action="append",
+        choices=FORMATS,
+        help="Format to export, repeat for both (default: the format set in each file)",
+    )
+    parser.add_argument("--summary", help="Write the JSON summary to this file instead of stdout")
+    parser.add_argument("--blender", default="blender", help="Blender executable (outside Blender only)")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Blender processes to run at once (outside Blender only)",
+    )
+    return parser.parse_args(argv)
+
+
+def _write_summary(summary: dict, summary_path: str | None) -> None:
+    if summary_path:
+        with open(summary_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+    else:
+        print(json.dumps(summary, indent=2))
+
+
+##
+##  Inside Blender
+##
+
+def _enable_addon():
+    import addon_utils
+
+    if str(ADDON_DIR.parent) not in sys.path:
+        sys.path.insert(0, str(ADDON_DIR.parent))
+    if not addon_utils.check(ADDON_PACKAGE)[1] and addon_utils.enable(ADDON_PACKAGE, default_set=False) is None:
+        raise RuntimeError(f"Cannot enable the add-on {ADDON_PACKAGE}")
+
+
+def export_open_file(formats: list[str] | None = None) -> dict:
+    """Preflight and export the open file in every requested format. Returns its summary."""
+    import bpy
+
+    _enable_addon()
+    export_status = importlib.import_module(ADDON_PACKAGE + ".lib.export_status")
+    files = importlib.import_module(ADDON_PACKAGE + ".utils.files")
+
+    context = bpy.context
+    settings = context.scene.AC_Settings
+    export_settings = settings.export_settings
+    files.set_path_reference(settings.working_dir)
+    original_use_kn5 = export_settings.use_kn5
+    started = time.perf_counter()
+    summary = {
+        "blend_file": bpy.data.filepath,
+        "status": "success",
+        "exports": [],
+    }
+
+    try:
+        for file_format in formats or [("kn5" if original_use_kn5 else "fbx")]:
+            # The KN5 checks only run with KN5 export enabled
+            export_settings.use_kn5 = file_format == "kn5"
+            preflight_started = time.perf_counter()
+            errors = settings.run_preflight(context)
+            export = {
+                "format": file_format,
+                "status": "success",
+                "preflight_seconds": time.perf_counter() - preflight_started,
+                "preflight": [dict(error) for error in errors],
+                "files": [],
+            }
+            summary["exports"].append(export)
+
+            # Same rule as the sidebar: only warnings (severity 0) allow exporting
+            if any(error["severity"] >= 1 for error in errors):
+                export["status"] = "blocked"
+                continue
+
+            export_started = time.perf_counter()
+            result = bpy.ops.ac.export_track()
+            export["seconds"] = time.perf_counter() - export_started
+            export["files"] = export_status.get_exported_files()
+            if 'FINISHED' not in result or any(file["status"] != "success" for file in export["files"]):
+                export["status"] = "error"
+    finally:
+        export_settings.use_kn5 = original_use_kn5
+
+    if any(export["status"] != "success" for export in summary["exports"]):
+        summary["status"] = "error"
+    summary["seconds"] = time.perf_counter() - started
+    return summary
+
+
+def _run_in_blender(args: argparse.Namespace) -> int:
+    try:
+        summary = export_open_file(args.formats)
+    except Exception as e:  # noqa: BLE001
+        # Whatever fails in the add-on must still end up in the summary and exit code
+        import bpy
+        summary = {"blend_file": bpy.data.filepath, "status": "error", "error": str(e), "exports": []}
+    _write_summary(summary, args.summary)
+    return EXIT_OK if summary["status"] == "success" else EXIT_FAILED
+
+
+##
+##  Outside Blender
+##
+
+def _export_in_blender(blend_file: str, args: argparse.Namespace, temp_dir: str, index: int) -> dict:
+    """Export one file in a background Blender process and return its summary."""
+    summary_path = os.path.join(temp_dir, f"summary_{index}.json")
+    command = [args.blender, "--background", "--factory-startup", blend_file, "--python", str(Path(__file__).resolve())]
+    command += ["--", "--summary", summary_path]
+    for file_format in args.formats or ():
+        command += ["--format", file_format]
+
+    started = time.perf_counter()
+    process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, errors="replace", check=False)
+    try:
+        with open(summary_path, 'r') as f:
+            summary = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        # Blender crashed or the add-on failed before writing the summary
+        summary = {
+            "blend_file": blend_file,
+            "status": "error",
+            "error": f"Blender exited with code {process.returncode}",
+            "log": process.stdout.splitlines()[-20:],
+            "exports": [],
+        }
+    summary["process_seconds"] = time.perf_counter() - started
+    return summary
+
+
+def _run_pool(args: argparse.Namespace) -> int:
+    started = time.perf_counter()
+    # Threads only wait on the Blender processes, which do the work
+    with tempfile.TemporaryDirectory(prefix="ac_cli_") as temp_dir, ThreadPoolExecutor(max(1, args.jobs)) as pool:
+        summaries = list(pool.map(
+            lambda item: _export_in_blender(item[1], args, temp_dir, item[0]),
+            enumerate(args.blend_files),
+        ))
+
+    failed = [summary["blend_file"] for summary in summaries if summary["status"] != "success"]
+    _write_summary({
+        "status": "error" if failed else "success",
+        "seconds": time.perf_counter() - started,
+        "failed": failed,
+        "files": summaries,
+    }, args.summary)
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Run the batch export and return the exit code.
+
+    Inside Blender, the arguments after '--' are used and the open file is
+    exported; outside Blender, the listed .blend files are.
+    """
+    try:
+        import bpy
+    except ImportError:
+        bpy = None
+
+    if bpy is not None:
+        if argv is None:
+            argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+        return _run_in_blender(_parse_args(argv))
+
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    if not args.blend_files:
+        print("No .blend files given", file=sys.stderr)
+        return EXIT_FAILED
+    return _run_pool(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 import bpy
 
+from . import handlers
 from .configs.audio_source import AC_AudioSource
 from .configs.kn5 import (AC_MaterialSettings, AC_ShaderProperty,
                           AC_TextureSettings)
@@ -10,6 +11,8 @@ from .configs.lighting import (AC_DirectionList, AC_GlobalLighting, AC_Light,
                                AC_PositionList, AC_SunSettings)
 from .configs.surface import AC_Surface
 from .configs.track import AC_Track
+from .gizmos import overlay
+from .gizmos.overlay import AC_PickOverlayMarker
 from .gizmos.pitbox import (AC_GizmoGate, AC_GizmoGroup,
                             AC_GizmoPitbox, AC_GizmoStartPos, AC_SelectGizmoObject)
 from .menus.context import (WM_MT_AssignSurface, WM_MT_ObjectSetup, pit_menu,
@@ -31,7 +34,8 @@ from .menus.ops.project import (AC_AddABFinishGate, AC_AddABStartGate,
                                 AC_AddAudioEmitter, AC_AddHotlapStart,
                                 AC_AddPitbox, AC_AddStart, AC_AddTimeGate,
                                 AC_AutofixPreflight, AC_ExportTrack,
-                                AC_LoadSettings, AC_SaveSettings)
+                                AC_LoadSettings, AC_PlaceLogicGrid,
+                                AC_SaveSettings, AC_SnapToSurface)
 from .menus.ops.surface import (AC_AddSurface, AC_AddSurfaceExt,
                                 AC_AssignPhysProp, AC_AssignSurface,
                                 AC_AssignWall, AC_DeleteSurfaceExt,
@@ -61,10 +65,10 @@ __classes__ = (
     AC_AutofixPreflight, AC_ExportTrack,
     AC_SaveSettings, AC_LoadSettings,
     AC_SelectByName,
-    AC_SelectGizmoObject, AC_GizmoPitbox, AC_GizmoStartPos, AC_GizmoGate, AC_GizmoGroup,
+    AC_SelectGizmoObject, AC_GizmoPitbox, AC_GizmoStartPos, AC_GizmoGate, AC_GizmoGroup, AC_PickOverlayMarker,
     AC_AddAudioSource, AC_ToggleAudio,
     AC_AddGlobalExtension, AC_RemoveGlobalExtension, AC_ToggleGlobalExtension, AC_AddGlobalExtensionItem, AC_RemoveGlobalExtensionItem,
-    AC_AddStart, AC_AddHotlapStart, AC_AddPitbox, AC_AddTimeGate, AC_AddABStartGate, AC_AddABFinishGate, AC_AddAudioEmitter,
+    AC_AddStart, AC_AddHotlapStart, AC_AddPitbox, AC_AddTimeGate, AC_AddABStartGate, AC_AddABFinishGate, AC_AddAudioEmitter, AC_PlaceLogicGrid, AC_SnapToSurface,
     AC_SetupAsTree, AC_SetupAsGrass, AC_SetupAsStandard, AC_AutoSetupObjects,
     AC_AddShaderProperty, AC_RemoveShaderProperty,
     AC_GenerateMap, AC_GeneratePreview, AC_CreatePreviewCamera,
@@ -93,9 +97,13 @@ def register():
     bpy.types.VIEW3D_MT_object_context_menu.append(pit_menu)
     bpy.types.VIEW3D_MT_object_context_menu.append(surface_menu)
     bpy.types.VIEW3D_MT_object_context_menu.append(utility_menu)
+    handlers.register()
+    overlay.register()
 
 def unregister():
     from bpy.utils import unregister_class
+    overlay.unregister()
+    handlers.unregister()
     del bpy.types.ShaderNodeTexImage.AC_Texture
     del bpy.types.Material.AC_Material
     del bpy.types.Object.AC_KN5
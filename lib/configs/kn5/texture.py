@@ -4,6 +4,12 @@ from bpy.props import StringProperty
 from bpy.types import PropertyGroup
 
 
+def _update_shader_input(self, context):
+    # Slot changes are not reported through the depsgraph
+    from ...kn5.material_analysis import clear_material_analysis_cache
+    clear_material_analysis_cache()
+
+
 class AC_TextureSettings(PropertyGroup):
     """Assetto Corsa texture node settings for KN5 export."""
 
@@ -11,4 +17,5 @@ class AC_TextureSettings(PropertyGroup):
         name="Shader Input",
         description="AC shader texture slot (txDiffuse, txNormal, txDetail, etc.)",
         default="txDiffuse",
+        update=_update_shader_input,
     )
@@ -0,0 +1,97 @@
+"""
+Progress of the running modal track export, and the files it wrote.
+
+The export operator updates the status between units of work; the sidebar
+and the status bar read it to show which file and stage are being written.
+Every written file is recorded with its outcome, so scripted exports (see
+cli.py) can report timings, sizes and warnings.
+"""
+
+from __future__ import annotations
+
+import os
+
+
+class ExportStatus:
+    """File and stage the running export is at."""
+
+    def __init__(self):
+        self.filename = ""
+        self.file_index = 0
+        self.file_count = 0
+        self.stage = "Starting"
+        self.done = 0
+        self.total = 0
+
+    def start_file(self, filename: str, file_index: int, file_count: int) -> None:
+        self.filename = filename
+        self.file_index = file_index
+        self.file_count = file_count
+        self.stage = "Starting"
+        self.done = 0
+        self.total = 0
+
+    def update(self, stage: str, done: int, total: int) -> None:
+        self.stage = stage
+        self.done = done
+        self.total = total
+
+    def get_fraction(self) -> float:
+        """Overall progress from 0 to 1, counting each file as an equal share."""
+        if not self.file_count:
+            return 0.0
+        stage_fraction = self.done / self.total if self.total else 0.0
+        return (self.file_index + stage_fraction) / self.file_count
+
+    def get_text(self) -> str:
+        text = f"Exporting {self.filename} ({self.file_index + 1}/{self.file_count}): {self.stage}"
+        if self.total > 1:
+            text += f" {self.done}/{self.total}"
+        return text
+
+
+_status: ExportStatus | None = None
+
+
+def get_export_status() -> ExportStatus | None:
+    """Status of the running modal export, or None if no export is running."""
+    return _status
+
+
+def begin_export_status() -> ExportStatus:
+    global _status
+    _status = ExportStatus()
+    return _status
+
+
+def end_export_status() -> None:
+    global _status
+    _status = None
+
+
+# Files of the last track export, in export order
+_exported_files: list[dict] = []
+
+
+def get_exported_files() -> list[dict]:
+    """Files of the last track export, each with filepath, format, status, seconds, size and warnings."""
+    return list(_exported_files)
+
+
+def clear_exported_files() -> None:
+    _exported_files.clear()
+
+
+def record_exported_file(filepath: str, file_format: str, status: str, seconds: float | None, warnings: list[str]) -> None:
+    try:
+        size = os.path.getsize(filepath) if status == "success" else None
+    except OSError:
+        size = None
+    _exported_files.append({
+        "filepath": filepath,
+        "format": file_format,
+        "status": status,
+        "seconds": seconds,
+        "size": size,
+        "warnings": list(warnings),
+    })
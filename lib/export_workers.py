@@ -0,0 +1,243 @@
+"""
+KN5 export of several collections in background Blender processes.
+
+The open file is saved as a temporary copy, and each worker opens that copy
+with `blender -b`, enables the add-on and exports its share of the
+collections with export_kn5. Workers report results and warnings through a
+JSON status file, rewritten after every collection so the session can show
+progress. Textures are synced by the workers but the orphan cleanup is left
+to the session, which is the only one that knows every wanted texture.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import bpy
+
+from ..utils.files import set_path_reference
+from .kn5 import ExportProgress, ExportSession, export_kn5
+from .kn5.texture_sync import TextureSync
+from .scene_index import ExportScope, get_scene_index
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+# Seconds between checks of the worker status files, the export yields in between
+WORKER_POLL_SECONDS = 0.1
+
+# Log lines of a failed worker included in its error
+WORKER_LOG_LINES = 5
+
+ADDON_PACKAGE = __package__.split('.')[0]
+ADDON_PARENT_DIR = str(Path(__file__).resolve().parents[2])
+
+
+class ExportJob:
+    """One collection exported to one KN5 file."""
+
+    def __init__(self, collection_name: str, filepath: str, weight: int, is_main: bool = False):
+        self.collection_name = collection_name
+        self.filepath = filepath
+        # rough cost of the export, to balance the workers
+        self.weight = weight
+        # the main KN5 also gets the objects outside every collection
+        self.is_main = is_main
+
+    def to_dict(self) -> dict:
+        return {"collection": self.collection_name, "filepath": self.filepath, "is_main": self.is_main}
+
+
+def split_jobs(jobs: list[ExportJob], worker_count: int) -> list[list[ExportJob]]:
+    """Spread the jobs over at most worker_count workers, heaviest first onto the least loaded."""
+    shares: list[list[ExportJob]] = [[] for _ in range(min(worker_count, len(jobs)))]
+    loads = [0] * len(shares)
+    for job in sorted(jobs, key=lambda job: job.weight, reverse=True):
+        index = loads.index(min(loads))
+        shares[index].append(job)
+        loads[index] += job.weight
+    return shares
+
+
+def _get_worker_command(blend_path: str, job_path: str) -> list[str]:
+    expr = (
+        "import sys, importlib, addon_utils; "
+        f"sys.path.insert(0, {ADDON_PARENT_DIR!r}); "
+        f"addon_utils.check({ADDON_PACKAGE!r})[1] or addon_utils.enable({ADDON_PACKAGE!r}, default_set=False); "
+        f"importlib.import_module({ADDON_PACKAGE!r} + '.lib.export_workers').run_worker({job_path!r})"
+    )
+    return [
+        bpy.app.binary_path,
+        "--background",
+        "--factory-startup",
+        blend_path,
+        "--python-exit-code", "1",
+        "--python-expr", expr,
+    ]
+
+
+def _read_json(filepath: str) -> dict | None:
+    try:
+        with open(filepath, 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _write_json(filepath: str, data: dict) -> None:
+    # Replace in one step, the session may read the file at any time
+    temp_path = filepath + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(temp_path, filepath)
+
+
+class ExportWorker:
+    """A background Blender process exporting a share of the collections."""
+
+    def __init__(self, blend_path: str, temp_dir: str, index: int, jobs: list[ExportJob], working_dir: str):
+        self.jobs = jobs
+        self.status_path = os.path.join(temp_dir, f"worker_{index}_status.json")
+        self.log_path = os.path.join(temp_dir, f"worker_{index}.log")
+        job_path = os.path.join(temp_dir, f"worker_{index}_job.json")
+        _write_json(job_path, {
+            "jobs": [job.to_dict() for job in jobs],
+            "working_dir": working_dir,
+            "status_path": self.status_path,
+        })
+        # The worker keeps its own handle of the log
+        with open(self.log_path, 'w') as log:
+            self.process = subprocess.Popen(
+                _get_worker_command(blend_path, job_path),
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+
+    def is_running(self) -> bool:
+        return self.process.poll() is None
+
+    def get_done_count(self) -> int:
+        status = _read_json(self.status_path)
+        return len(status["results"]) if status else 0
+
+    def collect(self, texture_sync: TextureSync) -> list[dict]:
+        """Results of every job; jobs the worker never finished are reported as errors."""
+        status = _read_json(self.status_path) or {"results": [], "textures": None}
+        results = status["results"]
+        finished = {result["filepath"] for result in results}
+        for job in self.jobs:
+            if job.filepath not in finished:
+                results.append({
+                    "collection": job.collection_name,
+                    "filepath": job.filepath,
+                    "status": "error",
+                    "seconds": None,
+                    "warnings": [f"Export worker exited with code {self.process.returncode}", *self._get_log_tail()],
+                })
+        if status["textures"]:
+            texture_sync.merge_report(status["textures"])
+        return results
+
+    def stop(self) -> None:
+        """Stop the worker if it still runs, and remove the file it was writing, if any."""
+        if self.is_running():
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        status = _read_json(self.status_path)
+        if status and status["current"]:
+            # Remove broken or cancelled file to prevent loading errors in AC
+            try:
+                Path(status["current"]).unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    def _get_log_tail(self) -> list[str]:
+        try:
+            with open(self.log_path, 'r', errors='replace') as f:
+                lines = [line.rstrip() for line in f if line.strip()]
+        except OSError:
+            return []
+        return lines[-WORKER_LOG_LINES:]
+
+
+def iter_parallel_export(
+    jobs: list[ExportJob], worker_count: int, working_dir: str, texture_sync: TextureSync
+) -> Generator[ExportProgress | None, None, list[dict]]:
+    """
+    Export the jobs in background workers, yielding progress while they run.
+
+    Never blocks: between checks of the worker status it yields None, so the
+    caller can hand the UI a turn or wait as it sees fit.
+
+    Returns one result per job with 'collection', 'filepath', 'status',
+    'seconds' and 'warnings'. Closing the generator stops the workers.
+    """
+    temp_dir = tempfile.mkdtemp(prefix="ac_export_")
+    workers: list[ExportWorker] = []
+    try:
+        blend_path = os.path.join(temp_dir, "export.blend")
+        bpy.ops.wm.save_as_mainfile(filepath=blend_path, copy=True)
+        for index, share in enumerate(split_jobs(jobs, worker_count)):
+            workers.append(ExportWorker(blend_path, temp_dir, index, share, working_dir))
+
+        stage = f"Exporting in {len(workers)} background workers"
+        next_poll = 0.0
+        while True:
+            if time.perf_counter() < next_poll:
+                yield None
+                continue
+            next_poll = time.perf_counter() + WORKER_POLL_SECONDS
+            running = any(worker.is_running() for worker in workers)
+            yield ExportProgress(stage, sum(worker.get_done_count() for worker in workers), len(jobs))
+            if not running:
+                break
+
+        results = []
+        for worker in workers:
+            results.extend(worker.collect(texture_sync))
+        return results
+
+    finally:
+        for worker in workers:
+            worker.stop()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def run_worker(job_path: str) -> None:
+    """Entry point of a background worker: export the collections listed in the job file."""
+    job = _read_json(job_path)
+    if job is None:
+        raise RuntimeError(f"Cannot read export job {job_path}")
+    set_path_reference(job["working_dir"])
+    texture_sync = TextureSync()
+    session = ExportSession(bpy.context)
+    status = {"current": None, "results": [], "textures": None}
+
+    for entry in job["jobs"]:
+        status["current"] = entry["filepath"]
+        _write_json(job["status_path"], status)
+        extra_objects = get_scene_index(bpy.context).unassigned_roots if entry["is_main"] else ()
+        scope = ExportScope(bpy.data.collections[entry["collection"]], extra_objects)
+        started = time.perf_counter()
+        result = export_kn5(entry["filepath"], bpy.context, texture_sync, scope, session)
+        status["results"].append({
+            **entry,
+            "status": result["status"],
+            "seconds": time.perf_counter() - started,
+            "warnings": result["warnings"],
+        })
+        status["current"] = None
+
+    status["textures"] = texture_sync.get_report()
+    _write_json(job["status_path"], status)
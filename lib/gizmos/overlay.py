@@ -0,0 +1,321 @@
+"""
+Batched GPU overlay for pitboxes, start positions and gates.
+
+An alternative to the gizmos: every category is drawn with one batch. The
+transformed marker vertices are cached per object, and only the rows of
+objects reported as moved are recomputed; the batch itself is rebuilt from
+the cached arrays. Click selection projects the cached marker positions to
+the screen once per view change and picks the nearest one.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import bpy
+import gpu
+import numpy as np
+from bpy.props import IntProperty
+from bpy.types import Operator
+from gpu_extras.batch import batch_for_shader
+from mathutils import Matrix
+
+from ..logic_index import get_logic_index, get_moved_objects
+from .pitbox import AB_GATE_CATEGORIES, MARKER_CATEGORIES
+from .shapes import GATE_LINE_HEIGHTS, PITBOX_SHAPE, START_SHAPE
+
+if TYPE_CHECKING:
+    from bpy.types import Context, Object
+
+# gizmo type -> marker shape, so both renderers draw the same thing
+MARKER_SHAPES = {
+    "AC_GizmoPitbox": PITBOX_SHAPE,
+    "AC_GizmoStartPos": START_SHAPE,
+}
+
+# Pick radius around the marker origin, in pixels
+PICK_RADIUS = 30
+
+
+def get_preferences(context: Context):
+    return context.preferences.addons[__package__.split('.')[0]].preferences
+
+
+def _get_shader():
+    try:
+        return gpu.shader.from_builtin('FLAT_COLOR')
+    except (ValueError, TypeError):
+        # Blender < 3.4 only has the 3D_ prefixed names
+        return gpu.shader.from_builtin('3D_FLAT_COLOR')
+
+
+def _marker_vertices(shape: np.ndarray, ob: Object) -> np.ndarray:
+    # Same transform as AC_GizmoPitbox.update
+    matrix = Matrix.Translation(ob.location) @ ob.rotation_euler.to_matrix().to_4x4()
+    return (shape @ np.array(matrix, dtype=np.float32).T)[:, :3]
+
+
+def _gate_vertices(left: Object, right: Object) -> np.ndarray:
+    start = np.array(left.location, dtype=np.float32)
+    end = np.array(right.location, dtype=np.float32)
+    vertices = []
+    for height in GATE_LINE_HEIGHTS:
+        offset = np.array((0, 0, height), dtype=np.float32)
+        vertices.extend((start + offset, end + offset))
+    return np.array(vertices, dtype=np.float32)
+
+
+class OverlayLayer:
+    """Vertices of every item of one category, drawn with a single batch."""
+
+    def __init__(self, primitive: str):
+        self.primitive = primitive
+        # item key (object name, or gate pair) -> row in the arrays below
+        self.rows: dict = {}
+        self.vertices = np.empty((0, 0, 3), dtype=np.float32)
+        # marker origins, for picking
+        self.origins = np.empty((0, 3), dtype=np.float32)
+        self.colors = np.empty((0, 4), dtype=np.float32)
+        self.batch = None
+        self.version = 0
+
+    def update(self, items: dict, moved: set[str] | None, colors: list[tuple]) -> None:
+        """
+        Sync the layer with the items to draw.
+
+        items maps each key to the objects it is drawn from, in draw order.
+        Vertices are recomputed for new items and items with a moved object.
+        """
+        changed = False
+        keys = list(items)
+        if keys != list(self.rows):
+            if keys:
+                vertices = [self._get_vertices(key, items[key], moved) for key in keys]
+                self.vertices = np.array(vertices, dtype=np.float32).reshape(len(keys), -1, 3)
+            else:
+                self.vertices = np.empty((0, 0, 3), dtype=np.float32)
+            self.origins = np.array([items[key][0].location for key in keys], dtype=np.float32).reshape(-1, 3)
+            self.rows = {key: row for row, key in enumerate(keys)}
+            changed = True
+        else:
+            for key, row in self.rows.items():
+                objects = items[key]
+                if moved is None or any(ob.name in moved for ob in objects):
+                    self.vertices[row] = self.compute_vertices(*objects)
+                    self.origins[row] = objects[0].location
+                    changed = True
+
+        colors = np.array(colors, dtype=np.float32).reshape(-1, 4)
+        if not np.array_equal(colors, self.colors):
+            self.colors = colors
+            changed = True
+        if changed:
+            self.batch = None
+            self.version += 1
+
+    def _get_vertices(self, key, objects: tuple, moved: set[str] | None) -> np.ndarray:
+        row = self.rows.get(key)
+        if row is not None and moved is not None and not any(ob.name in moved for ob in objects):
+            return self.vertices[row]
+        return self.compute_vertices(*objects)
+
+    def compute_vertices(self, *objects: Object) -> np.ndarray:
+        raise NotImplementedError
+
+    def draw(self, shader) -> None:
+        if not self.rows:
+            return
+        if self.batch is None:
+            vertex_count = self.vertices.shape[1]
+            self.batch = batch_for_shader(shader, self.primitive, {
+                "pos": self.vertices.reshape(-1, 3),
+                "color": np.repeat(self.colors, vertex_count, axis=0),
+            })
+        self.batch.draw(shader)
+
+
+class MarkerLayer(OverlayLayer):
+    def __init__(self, shape: tuple):
+        super().__init__('TRIS')
+        # homogeneous coordinates, transformed by every marker matrix
+        self.shape = np.hstack((np.array(shape, dtype=np.float32), np.ones((len(shape), 1), dtype=np.float32)))
+
+    def compute_vertices(self, *objects: Object) -> np.ndarray:
+        return _marker_vertices(self.shape, objects[0])
+
+
+class GateLayer(OverlayLayer):
+    def __init__(self):
+        super().__init__('LINES')
+
+    def compute_vertices(self, *objects: Object) -> np.ndarray:
+        return _gate_vertices(objects[0], objects[1])
+
+
+class OverlayRenderer:
+    """Layers of every marker category, kept in sync with the logic index."""
+
+    def __init__(self):
+        self.layers: dict[str, OverlayLayer] = {}
+        for category, _prefix, gizmo_type, _show, _color in MARKER_CATEGORIES:
+            self.layers[category] = MarkerLayer(MARKER_SHAPES[gizmo_type])
+        self.layers["gates"] = GateLayer()
+        # Serial of the last transform update applied (see logic_index.get_moved_objects)
+        self.moved_serial = -1
+        # (view signature, layer versions) -> (screen positions, object names)
+        self.projection: tuple | None = None
+
+    def sync(self, context: Context) -> None:
+        prefs = get_preferences(context)
+        logic_index = get_logic_index(context)
+        self.moved_serial, moved = get_moved_objects(self.moved_serial)
+
+        for category, prefix, _gizmo_type, show_pref, color_pref in MARKER_CATEGORIES:
+            items = {}
+            colors = []
+            if getattr(prefs, show_pref):
+                color = tuple(getattr(prefs, color_pref))
+                for ob in logic_index.objects[category]:
+                    if ob.type == 'EMPTY' and ob.name.startswith(prefix) and ob.visible_get():
+                        items[ob.name] = (ob,)
+                        colors.append(_get_color(color, ob.select_get()))
+            self.layers[category].update(items, moved, colors)
+
+        items = {}
+        colors = []
+        if prefs.show_time_gates:
+            color = tuple(prefs.time_gate_color)
+            for left, right in logic_index.get_gate_pairs("time_gates"):
+                if left.visible_get() and right.visible_get():
+                    items[("time_gates", left.name, right.name)] = (left, right)
+                    colors.append(_get_color(color, left.select_get() or right.select_get()))
+        for category, show_pref, color_pref in AB_GATE_CATEGORIES:
+            ab_gates = logic_index.objects[category]
+            if not getattr(prefs, show_pref) or len(ab_gates) % 2 != 0 or len(ab_gates) == 0:
+                continue
+            left, right = ab_gates[0], ab_gates[1]
+            if left.visible_get() and right.visible_get():
+                items[(category, left.name, right.name)] = (left, right)
+                colors.append(_get_color(tuple(getattr(prefs, color_pref)), left.select_get() or right.select_get()))
+        self.layers["gates"].update(items, moved, colors)
+
+    def draw(self) -> None:
+        shader = _get_shader()
+        gpu.state.blend_set('ALPHA')
+        gpu.state.depth_test_set('LESS_EQUAL')
+        for layer in self.layers.values():
+            layer.draw(shader)
+        gpu.state.depth_test_set('NONE')
+        gpu.state.blend_set('NONE')
+
+    def pick(self, region, region_3d, x: int, y: int) -> str | None:
+        """Name of the pitbox or start marker closest to the pixel, within PICK_RADIUS."""
+        marker_layers = [self.layers[category] for category, *_ in MARKER_CATEGORIES]
+        perspective = np.array(region_3d.perspective_matrix, dtype=np.float32)
+        key = (perspective.tobytes(), region.width, region.height, tuple(layer.version for layer in marker_layers))
+        if self.projection is None or self.projection[0] != key:
+            origins = np.vstack([layer.origins for layer in marker_layers])
+            names = [name for layer in marker_layers for name in layer.rows]
+            clip = np.hstack((origins, np.ones((len(origins), 1), dtype=np.float32))) @ perspective.T
+            # Points behind the view never get picked
+            in_front = clip[:, 3] > 1e-5
+            w = np.where(in_front, clip[:, 3], 1.0)
+            screen = (clip[:, :2] / w[:, None] + 1.0) * 0.5 * np.array((region.width, region.height), dtype=np.float32)
+            screen[~in_front] = np.inf
+            self.projection = (key, screen, names)
+
+        _key, screen, names = self.projection
+        if not names:
+            return None
+        distances = np.hypot(screen[:, 0] - x, screen[:, 1] - y)
+        nearest = int(np.argmin(distances))
+        if distances[nearest] > PICK_RADIUS:
+            return None
+        return names[nearest]
+
+
+def _get_color(color: tuple, selected: bool) -> tuple:
+    # Selected markers are drawn like hovered gizmos
+    if selected:
+        return (*(min(c * 1.3, 1.0) for c in color[:3]), color[3])
+    return (*color[:3], color[3] * 0.3)
+
+
+_renderer: OverlayRenderer | None = None
+_draw_handler = None
+_keymaps: list = []
+
+
+def get_overlay() -> OverlayRenderer:
+    global _renderer
+    if _renderer is None:
+        _renderer = OverlayRenderer()
+    return _renderer
+
+
+def clear_overlay() -> None:
+    """Drop the cached batches (file load and undo replace every object)."""
+    global _renderer
+    _renderer = None
+
+
+def _draw_overlay():
+    context = bpy.context
+    if getattr(context, "scene", None) is None or get_preferences(context).marker_renderer != 'OVERLAY':
+        return
+    renderer = get_overlay()
+    renderer.sync(context)
+    renderer.draw()
+
+
+class AC_PickOverlayMarker(Operator):
+    """Select the pitbox or start position under the mouse"""
+    bl_idname = "ac.pick_overlay_marker"
+    bl_label = "Pick Overlay Marker"
+    bl_options = {'INTERNAL', 'UNDO'}
+
+    mouse_x: IntProperty() # type: ignore
+    mouse_y: IntProperty() # type: ignore
+
+    @classmethod
+    def poll(cls, context):
+        return context.area is not None and context.area.type == 'VIEW_3D'
+
+    def invoke(self, context, event):
+        if get_preferences(context).marker_renderer != 'OVERLAY' or _renderer is None:
+            return {'PASS_THROUGH'}
+        self.mouse_x = event.mouse_region_x
+        self.mouse_y = event.mouse_region_y
+        return self.execute(context)
+
+    def execute(self, context):
+        name = _renderer.pick(context.region, context.region_data, self.mouse_x, self.mouse_y) if _renderer else None
+        ob = context.scene.objects.get(name) if name else None
+        if not ob:
+            # Let the regular selection handle the click
+            return {'PASS_THROUGH'}
+        for obj in context.selected_objects:
+            obj.select_set(False)
+        ob.select_set(True)
+        context.view_layer.objects.active = ob
+        return {'FINISHED'}
+
+
+def register():
+    global _draw_handler
+    _draw_handler = bpy.types.SpaceView3D.draw_handler_add(_draw_overlay, (), 'WINDOW', 'POST_VIEW')
+    keyconfig = bpy.context.window_manager.keyconfigs.addon
+    if keyconfig:
+        keymap = keyconfig.keymaps.new(name="3D View", space_type='VIEW_3D')
+        _keymaps.append((keymap, keymap.keymap_items.new(AC_PickOverlayMarker.bl_idname, 'LEFTMOUSE', 'CLICK')))
+
+
+def unregister():
+    global _draw_handler
+    if _draw_handler is not None:
+        bpy.types.SpaceView3D.draw_handler_remove(_draw_handler, 'WINDOW')
+        _draw_handler = None
+    for keymap, keymap_item in _keymaps:
+        keymap.keymap_items.remove(keymap_item)
+    _keymaps.clear()
+    clear_overlay()
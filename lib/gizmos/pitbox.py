@@ -2,7 +2,8 @@ import bpy
 from bpy.types import Gizmo, GizmoGroup, Object, Operator
 from mathutils import Matrix, Vector
 
-from ...lib.settings import AC_Settings
+from ..logic_index import get_logic_index, get_moved_objects
+from .shapes import GATE_LINE_HEIGHTS, PITBOX_SHAPE, START_SHAPE
 
 
 class AC_SelectGizmoObject(Operator):
@@ -37,64 +38,7 @@ class AC_GizmoPitbox(Gizmo):
         if not hasattr(self, "shape"):
             # Pitbox: box with X on ground + "PIT" text on front vertical wall
             # Floor is at Y=-1, box is square from X=-1 to X=1, Z=-1 to Z=1
-            self.shape = self.new_custom_shape('TRIS',
-            [
-                # Box outline on ground (Y=-1 plane)
-                # Front edge (Z=1)
-                (-1, -1, 1), (1, -1, 1), (1, -1, 1.05),
-                (-1, -1, 1), (1, -1, 1.05), (-1, -1, 1.05),
-                # Back edge (Z=-1)
-                (-1, -1, -1), (1, -1, -1), (1, -1, -0.95),
-                (-1, -1, -1), (1, -1, -0.95), (-1, -1, -0.95),
-                # Left edge (X=-1)
-                (-1, -1, -1), (-1, -1, 1), (-1, -1, 1.05),
-                (-1, -1, -1), (-1, -1, 1.05), (-1, -1, -0.95),
-                # Right edge (X=1)
-                (1, -1, -1), (1, -1, 1), (1, -1, 1.05),
-                (1, -1, -1), (1, -1, 1.05), (1, -1, -0.95),
-
-                # X inside box on ground (Y=-1 plane)
-                # Diagonal 1: top-left to bottom-right (this one was working)
-                (-0.85, -1, 0.85), (-0.75, -1, 0.85), (0.85, -1, -0.85),
-                (-0.75, -1, 0.85), (0.85, -1, -0.75), (0.85, -1, -0.85),
-
-                # Diagonal 2: top-right to bottom-left (mirror the pattern)
-                (0.85, -1, 0.85), (0.75, -1, 0.85), (-0.85, -1, -0.85),
-                (0.75, -1, 0.85), (-0.85, -1, -0.75), (-0.85, -1, -0.85),
-
-                # Short vertical walls on left and right sides (Y=-1 to Y=-0.7, extending front to back)
-                # Left wall (X=-1, Z=-1 to Z=1, short height Y=-1 to Y=-0.9)
-                (-1, -1, -1), (-1, -0.9, -1), (-1, -0.9, 1),
-                (-1, -1, -1), (-1, -0.9, 1), (-1, -1, 1),
-                # Right wall (X=1, Z=-1 to Z=1, short height Y=-1 to Y=-0.9)
-                (1, -1, -1), (1, -0.9, -1), (1, -0.9, 1),
-                (1, -1, -1), (1, -0.9, 1), (1, -1, 1),
-
-                # "PIT" text on front vertical wall (Z=1, Y=-1 to Y=-0.7, using X and Y)
-                # P - vertical bar (left side, full height)
-                (-0.7, -1, 1), (-0.6, -1, 1), (-0.6, -0.7, 1),
-                (-0.7, -1, 1), (-0.6, -0.7, 1), (-0.7, -0.7, 1),
-                # P - top horizontal (connecting to top of vertical bar)
-                (-0.6, -0.75, 1), (-0.3, -0.75, 1), (-0.3, -0.7, 1),
-                (-0.6, -0.75, 1), (-0.3, -0.7, 1), (-0.6, -0.7, 1),
-                # P - middle horizontal (closing the loop)
-                (-0.6, -0.85, 1), (-0.3, -0.85, 1), (-0.3, -0.8, 1),
-                (-0.6, -0.85, 1), (-0.3, -0.8, 1), (-0.6, -0.8, 1),
-                # P - right vertical segment (only from middle to top, forming the loop)
-                (-0.3, -0.85, 1), (-0.2, -0.85, 1), (-0.2, -0.7, 1),
-                (-0.3, -0.85, 1), (-0.2, -0.7, 1), (-0.3, -0.7, 1),
-
-                # I - vertical bar
-                (-0.05, -1, 1), (0.05, -1, 1), (0.05, -0.7, 1),
-                (-0.05, -1, 1), (0.05, -0.7, 1), (-0.05, -0.7, 1),
-
-                # T - top horizontal
-                (0.2, -0.75, 1), (0.7, -0.75, 1), (0.7, -0.7, 1),
-                (0.2, -0.75, 1), (0.7, -0.7, 1), (0.2, -0.7, 1),
-                # T - vertical bar
-                (0.4, -1, 1), (0.5, -1, 1), (0.5, -0.7, 1),
-                (0.4, -1, 1), (0.5, -0.7, 1), (0.4, -0.7, 1),
-            ])
+            self.shape = self.new_custom_shape('TRIS', PITBOX_SHAPE)
             self.scale = 4.3, 1.4, 2.3
             self.use_draw_scale = False
             self.use_draw_modal = True
@@ -128,36 +72,7 @@ class AC_GizmoStartPos(Gizmo):
             # Wide, short U-shape with floor marking and vertical walls
             # Floor is at Y=-1, vertical walls from Y=-0.7 to Y=-0.5
             # U-shape extends in Z direction, front at Z=1
-            self.shape = self.new_custom_shape('TRIS',
-            [
-                # Floor markings on Y=-1 plane
-
-                # Left floor bar (X=-1 side, Z=0.7 to Z=1)
-                (-1, -1, 0.7), (-0.85, -1, 0.7), (-0.85, -1, 1),
-                (-1, -1, 0.7), (-0.85, -1, 1), (-1, -1, 1),
-
-                # Right floor bar (X=1 side, Z=0.7 to Z=1)
-                (0.85, -1, 0.7), (1, -1, 0.7), (1, -1, 1),
-                (0.85, -1, 0.7), (1, -1, 1), (0.85, -1, 1),
-
-                # Front floor bar (connecting left and right at Z=1)
-                (-0.85, -1, 1), (0.85, -1, 1), (0.85, -1, 0.85),
-                (-0.85, -1, 1), (0.85, -1, 0.85), (-0.85, -1, 0.85),
-
-                # Short vertical walls (Y=-1 to Y=-0.9, same height as pitbox)
-
-                # Left vertical wall (X=-1, Z=0.7 to Z=1)
-                (-1, -1, 0.7), (-1, -0.9, 0.7), (-1, -0.9, 1),
-                (-1, -1, 0.7), (-1, -0.9, 1), (-1, -1, 1),
-
-                # Right vertical wall (X=1, Z=0.7 to Z=1)
-                (1, -1, 0.7), (1, -0.9, 0.7), (1, -0.9, 1),
-                (1, -1, 0.7), (1, -0.9, 1), (1, -1, 1),
-
-                # Front vertical wall (Z=1, X=-1 to X=1, Y=-1 to Y=-0.9)
-                (-1, -1, 1), (1, -1, 1), (1, -0.9, 1),
-                (-1, -1, 1), (1, -0.9, 1), (-1, -0.9, 1),
-            ])
+            self.shape = self.new_custom_shape('TRIS', START_SHAPE)
             self.scale = 4.3, 1.4, 2.3
             self.use_draw_scale = False
             self.use_draw_modal = True
@@ -191,15 +106,11 @@ class AC_GizmoGate(Gizmo):
             self.use_draw_modal = True
 
     def update_shape(self):
-        up_vector = Vector((0, 0, 0.5))
-        down_vector = Vector((0, 0, -0.5))
-
-        self.shape = self.new_custom_shape('LINES',
-            [
-                self.pos_start, self.pos_end,
-                self.pos_start + down_vector, self.pos_end + down_vector,
-                self.pos_start + up_vector, self.pos_end + up_vector,
-            ])
+        lines = []
+        for height in GATE_LINE_HEIGHTS:
+            offset = Vector((0, 0, height))
+            lines.extend((self.pos_start + offset, self.pos_end + offset))
+        self.shape = self.new_custom_shape('LINES', lines)
 
     def draw(self, context):
         self.draw_custom_shape(self.shape)
@@ -213,6 +124,31 @@ class AC_GizmoGate(Gizmo):
         self.update_shape()
 
 
+# category, name prefix, gizmo type, visibility preference, color preference
+MARKER_CATEGORIES = (
+    ("pitboxes", "AC_PIT_", "AC_GizmoPitbox", "show_pitboxes", "pitbox_color"),
+    ("starts", "AC_START_", "AC_GizmoStartPos", "show_start", "start_color"),
+    ("hotlap_starts", "AC_HOTLAP_START_", "AC_GizmoStartPos", "show_hotlap_start", "hotlap_start_color"),
+)
+
+# A/B gates are drawn between the first two gates of the category
+AB_GATE_CATEGORIES = (
+    ("ab_start_gates", "show_ab_start", "ab_start_color"),
+    ("ab_finish_gates", "show_ab_finish", "ab_finish_color"),
+)
+
+
+def _set_gizmo_style(gizmo: Gizmo, color, hide: bool, brighten_highlight: bool = True):
+    gizmo.hide = hide
+    gizmo.color = color[:3]
+    gizmo.alpha = color[3] * 0.3  # Low opacity by default
+    if brighten_highlight:
+        gizmo.color_highlight = tuple(min(c * 1.3, 1.0) for c in color[:3])
+    else:
+        gizmo.color_highlight = color[:3]
+    gizmo.alpha_highlight = color[3]  # Full opacity on hover
+
+
 class AC_GizmoGroup(GizmoGroup):
     bl_idname = "AC_GizmoGroup"
     bl_label = "AC Track Gizmo Group"
@@ -222,119 +158,66 @@ class AC_GizmoGroup(GizmoGroup):
 
     @classmethod
     def poll(cls, context): # type: ignore
-        return (context.scene.objects)
+        prefs = context.preferences.addons[__package__.split('.')[0]].preferences # type: ignore
+        return context.scene.objects and prefs.marker_renderer == 'GIZMO'
 
 
     def setup(self, context):
-        prefs = context.preferences.addons[__package__.split('.')[0]].preferences # type: ignore
         self.gizmos.clear()
-        obs = context.scene.objects
-
-        for ob in obs:
-            if ob.type == 'EMPTY':
-                if ob.name.startswith('AC_PIT_'):
-                    gb = self.gizmos.new("AC_GizmoPitbox")
-                    gb.matrix_basis = ob.matrix_basis.normalized()
-                    gb.ob_name = ob.name
-                    # Set target operator for click selection
-                    op = gb.target_set_operator("ac.select_gizmo_object")
-                    op.object_name = ob.name
-                    gb.hide = not ob.visible_get() or not prefs.show_pitboxes
-                    gb.color = prefs.pitbox_color[:3]
-                    gb.alpha = prefs.pitbox_color[3] * 0.3  # Low opacity by default
-                    gb.color_highlight = tuple(min(c * 1.3, 1.0) for c in prefs.pitbox_color[:3])
-                    gb.alpha_highlight = prefs.pitbox_color[3]  # Full opacity on hover
-
-                if ob.name.startswith('AC_START_'):
-                    gb = self.gizmos.new("AC_GizmoStartPos")
-                    gb.matrix_basis = ob.matrix_basis.normalized()
-                    gb.ob_name = ob.name
-                    # Set target operator for click selection
-                    op = gb.target_set_operator("ac.select_gizmo_object")
-                    op.object_name = ob.name
-                    gb.hide = not ob.visible_get() or not prefs.show_start
-                    gb.color = prefs.start_color[:3]
-                    gb.alpha = prefs.start_color[3] * 0.3  # Low opacity by default
-                    gb.color_highlight = tuple(min(c * 1.3, 1.0) for c in prefs.start_color[:3])
-                    gb.alpha_highlight = prefs.start_color[3]  # Full opacity on hover
-
-                if ob.name.startswith('AC_HOTLAP_START_'):
-                    gb = self.gizmos.new("AC_GizmoStartPos")
-                    gb.matrix_basis = ob.matrix_basis.normalized()
-                    gb.ob_name = ob.name
-                    # Set target operator for click selection
-                    op = gb.target_set_operator("ac.select_gizmo_object")
-                    op.object_name = ob.name
-                    gb.hide = not ob.visible_get() or not prefs.show_hotlap_start
-                    gb.color = prefs.hotlap_start_color[:3]
-                    gb.alpha = prefs.hotlap_start_color[3] * 0.3  # Low opacity by default
-                    gb.color_highlight = tuple(min(c * 1.3, 1.0) for c in prefs.hotlap_start_color[:3])
-                    gb.alpha_highlight = prefs.hotlap_start_color[3]  # Full opacity on hover
+        # object name -> pitbox/start gizmo
+        self.marker_gizmos: dict[str, Gizmo] = {}
+        # (category, left gate name, right gate name) -> gate gizmo
+        self.gate_gizmos: dict[tuple[str, str, str], Gizmo] = {}
+        # Serial of the last transform update applied (see logic_index.get_moved_objects)
+        self.moved_serial = -1
 
     def refresh(self, context):
+        """Add and remove only the gizmos whose objects changed, and move only moved ones."""
         prefs = context.preferences.addons[__package__.split('.')[0]].preferences # type: ignore
-        obs = [ ob for ob in context.scene.objects if ob.type == 'EMPTY' and (ob.name.startswith('AC_PIT_') or ob.name.startswith('AC_START_') or ob.name.startswith('AC_HOTLAP_START_')) ]
-
-        # Rebuild if object count changed
-        main_gizmos = [g for g in self.gizmos if g.bl_idname in ['AC_GizmoPitbox', 'AC_GizmoStartPos']]
-        if len(obs) != len(main_gizmos):
-            self.setup(context)
-            return
-
-        # Remove all gate gizmos before creating new ones
-        gate_gizmos = [g for g in self.gizmos if g.bl_idname == 'AC_GizmoGate']
-        for gate_gizmo in gate_gizmos:
-            self.gizmos.remove(gate_gizmo)
-
-        for g in self.gizmos:
-            if not hasattr(g, 'ob_name'):
-                continue
-
-            ob = context.scene.objects.get(g.ob_name)
-            if not ob:
-                g.hide = True
-                continue
-
-            # Update visibility based on object type
-            if ob.name.startswith('AC_PIT_'):
-                g.hide = not ob.visible_get() or not prefs.show_pitboxes
-            elif ob.name.startswith('AC_START_'):
-                g.hide = not ob.visible_get() or not prefs.show_start
-            elif ob.name.startswith('AC_HOTLAP_START_'):
-                g.hide = not ob.visible_get() or not prefs.show_hotlap_start
-
-            # Update gizmo position
-            g.update(ob.location, ob.rotation_euler)
-
-        settings: AC_Settings = context.scene.AC_Settings # type: ignore
-        time_gates: list[list[Object]] = settings.get_time_gates(context, True) # type: ignore
-        for gate in time_gates:
-            if len(gate) != 2:
-                continue
-            g = self.gizmos.new("AC_GizmoGate")
-            g.hide = not gate[0].visible_get() or not gate[1].visible_get() or not prefs.show_time_gates
-            g.color = prefs.time_gate_color[:3]
-            g.alpha = prefs.time_gate_color[3] * 0.3  # Low opacity by default
-            g.color_highlight = prefs.time_gate_color[:3]
-            g.alpha_highlight = prefs.time_gate_color[3]  # Full opacity on hover
-            g.update(gate[0].location, gate[1].location)
-
-        ab_start_gates = settings.get_ab_start_gates(context)
-        if len(ab_start_gates) % 2 == 0 and len(ab_start_gates) > 0:
-            g = self.gizmos.new("AC_GizmoGate")
-            g.hide = not ab_start_gates[0].visible_get() or not ab_start_gates[1].visible_get() or not prefs.show_ab_start
-            g.color = prefs.ab_start_color[:3]
-            g.alpha = prefs.ab_start_color[3] * 0.3  # Low opacity by default
-            g.color_highlight = prefs.ab_start_color[:3]
-            g.alpha_highlight = prefs.ab_start_color[3]  # Full opacity on hover
-            g.update(ab_start_gates[0].location, ab_start_gates[1].location)
-
-        ab_finish_gates = settings.get_ab_finish_gates(context)
-        if len(ab_finish_gates) % 2 == 0 and len(ab_finish_gates) > 0:
-            g = self.gizmos.new("AC_GizmoGate")
-            g.hide = not ab_finish_gates[0].visible_get() or not ab_finish_gates[1].visible_get() or not prefs.show_ab_finish
-            g.color = prefs.ab_finish_color[:3]
-            g.alpha = prefs.ab_finish_color[3] * 0.3  # Low opacity by default
-            g.color_highlight = prefs.ab_finish_color[:3]
-            g.alpha_highlight = prefs.ab_finish_color[3]  # Full opacity on hover
-            g.update(ab_finish_gates[0].location, ab_finish_gates[1].location)
+        logic_index = get_logic_index(context)
+        self.moved_serial, moved = get_moved_objects(self.moved_serial)
+
+        markers: dict[str, tuple[Object, str, bool, tuple]] = {}
+        for category, prefix, gizmo_type, show_pref, color_pref in MARKER_CATEGORIES:
+            for ob in logic_index.objects[category]:
+                if ob.type == 'EMPTY' and ob.name.startswith(prefix):
+                    markers[ob.name] = (ob, gizmo_type, getattr(prefs, show_pref), getattr(prefs, color_pref))
+
+        for name in self.marker_gizmos.keys() - markers.keys():
+            self.gizmos.remove(self.marker_gizmos.pop(name))
+
+        for name, (ob, gizmo_type, show, color) in markers.items():
+            gb = self.marker_gizmos.get(name)
+            if gb is None:
+                gb = self.gizmos.new(gizmo_type)
+                gb.ob_name = name
+                # Set target operator for click selection
+                op = gb.target_set_operator("ac.select_gizmo_object")
+                op.object_name = name
+                self.marker_gizmos[name] = gb
+                gb.update(ob.location, ob.rotation_euler)
+            elif moved is None or name in moved:
+                gb.update(ob.location, ob.rotation_euler)
+            _set_gizmo_style(gb, color, not ob.visible_get() or not show)
+
+        gates: dict[tuple[str, str, str], tuple[Object, Object, bool, tuple]] = {}
+        for left, right in logic_index.get_gate_pairs("time_gates"):
+            gates[("time_gates", left.name, right.name)] = (left, right, prefs.show_time_gates, prefs.time_gate_color)
+        for category, show_pref, color_pref in AB_GATE_CATEGORIES:
+            ab_gates = logic_index.objects[category]
+            if len(ab_gates) % 2 == 0 and len(ab_gates) > 0:
+                left, right = ab_gates[0], ab_gates[1]
+                gates[(category, left.name, right.name)] = (left, right, getattr(prefs, show_pref), getattr(prefs, color_pref))
+
+        for key in self.gate_gizmos.keys() - gates.keys():
+            self.gizmos.remove(self.gate_gizmos.pop(key))
+
+        for key, (left, right, show, color) in gates.items():
+            g = self.gate_gizmos.get(key)
+            if g is None:
+                g = self.gizmos.new("AC_GizmoGate")
+                self.gate_gizmos[key] = g
+                g.update(left.location, right.location)
+            elif moved is None or key[1] in moved or key[2] in moved:
+                g.update(left.location, right.location)
+            _set_gizmo_style(g, color, not left.visible_get() or not right.visible_get() or not show, brighten_highlight=False)
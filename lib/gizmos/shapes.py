@@ -0,0 +1,97 @@
+"""
+Vertices of the pitbox and start position markers.
+
+Shared by the gizmos and the batched overlay renderer. Triangles in marker
+space: the floor is the Y=-1 plane and the marker faces +Z.
+"""
+
+PITBOX_SHAPE = (
+    # Box outline on ground (Y=-1 plane)
+    # Front edge (Z=1)
+    (-1, -1, 1), (1, -1, 1), (1, -1, 1.05),
+    (-1, -1, 1), (1, -1, 1.05), (-1, -1, 1.05),
+    # Back edge (Z=-1)
+    (-1, -1, -1), (1, -1, -1), (1, -1, -0.95),
+    (-1, -1, -1), (1, -1, -0.95), (-1, -1, -0.95),
+    # Left edge (X=-1)
+    (-1, -1, -1), (-1, -1, 1), (-1, -1, 1.05),
+    (-1, -1, -1), (-1, -1, 1.05), (-1, -1, -0.95),
+    # Right edge (X=1)
+    (1, -1, -1), (1, -1, 1), (1, -1, 1.05),
+    (1, -1, -1), (1, -1, 1.05), (1, -1, -0.95),
+
+    # X inside box on ground (Y=-1 plane)
+    # Diagonal 1: top-left to bottom-right (this one was working)
+    (-0.85, -1, 0.85), (-0.75, -1, 0.85), (0.85, -1, -0.85),
+    (-0.75, -1, 0.85), (0.85, -1, -0.75), (0.85, -1, -0.85),
+
+    # Diagonal 2: top-right to bottom-left (mirror the pattern)
+    (0.85, -1, 0.85), (0.75, -1, 0.85), (-0.85, -1, -0.85),
+    (0.75, -1, 0.85), (-0.85, -1, -0.75), (-0.85, -1, -0.85),
+
+    # Short vertical walls on left and right sides (Y=-1 to Y=-0.7, extending front to back)
+    # Left wall (X=-1, Z=-1 to Z=1, short height Y=-1 to Y=-0.9)
+    (-1, -1, -1), (-1, -0.9, -1), (-1, -0.9, 1),
+    (-1, -1, -1), (-1, -0.9, 1), (-1, -1, 1),
+    # Right wall (X=1, Z=-1 to Z=1, short height Y=-1 to Y=-0.9)
+    (1, -1, -1), (1, -0.9, -1), (1, -0.9, 1),
+    (1, -1, -1), (1, -0.9, 1), (1, -1, 1),
+
+    # "PIT" text on front vertical wall (Z=1, Y=-1 to Y=-0.7, using X and Y)
+    # P - vertical bar (left side, full height)
+    (-0.7, -1, 1), (-0.6, -1, 1), (-0.6, -0.7, 1),
+    (-0.7, -1, 1), (-0.6, -0.7, 1), (-0.7, -0.7, 1),
+    # P - top horizontal (connecting to top of vertical bar)
+    (-0.6, -0.75, 1), (-0.3, -0.75, 1), (-0.3, -0.7, 1),
+    (-0.6, -0.75, 1), (-0.3, -0.7, 1), (-0.6, -0.7, 1),
+    # P - middle horizontal (closing the loop)
+    (-0.6, -0.85, 1), (-0.3, -0.85, 1), (-0.3, -0.8, 1),
+    (-0.6, -0.85, 1), (-0.3, -0.8, 1), (-0.6, -0.8, 1),
+    # P - right vertical segment (only from middle to top, forming the loop)
+    (-0.3, -0.85, 1), (-0.2, -0.85, 1), (-0.2, -0.7, 1),
+    (-0.3, -0.85, 1), (-0.2, -0.7, 1), (-0.3, -0.7, 1),
+
+    # I - vertical bar
+    (-0.05, -1, 1), (0.05, -1, 1), (0.05, -0.7, 1),
+    (-0.05, -1, 1), (0.05, -0.7, 1), (-0.05, -0.7, 1),
+
+    # T - top horizontal
+    (0.2, -0.75, 1), (0.7, -0.75, 1), (0.7, -0.7, 1),
+    (0.2, -0.75, 1), (0.7, -0.7, 1), (0.2, -0.7, 1),
+    # T - vertical bar
+    (0.4, -1, 1), (0.5, -1, 1), (0.5, -0.7, 1),
+    (0.4, -1, 1), (0.5, -0.7, 1), (0.4, -0.7, 1),
+)
+
+START_SHAPE = (
+    # Floor markings on Y=-1 plane
+
+    # Left floor bar (X=-1 side, Z=0.7 to Z=1)
+    (-1, -1, 0.7), (-0.85, -1, 0.7), (-0.85, -1, 1),
+    (-1, -1, 0.7), (-0.85, -1, 1), (-1, -1, 1),
+
+    # Right floor bar (X=1 side, Z=0.7 to Z=1)
+    (0.85, -1, 0.7), (1, -1, 0.7), (1, -1, 1),
+    (0.85, -1, 0.7), (1, -1, 1), (0.85, -1, 1),
+
+    # Front floor bar (connecting left and right at Z=1)
+    (-0.85, -1, 1), (0.85, -1, 1), (0.85, -1, 0.85),
+    (-0.85, -1, 1), (0.85, -1, 0.85), (-0.85, -1, 0.85),
+
+    # Short vertical walls (Y=-1 to Y=-0.9, same height as pitbox)
+
+    # Left vertical wall (X=-1, Z=0.7 to Z=1)
+    (-1, -1, 0.7), (-1, -0.9, 0.7), (-1, -0.9, 1),
+    (-1, -1, 0.7), (-1, -0.9, 1), (-1, -1, 1),
+
+    # Right vertical wall (X=1, Z=0.7 to Z=1)
+    (1, -1, 0.7), (1, -0.9, 0.7), (1, -0.9, 1),
+    (1, -1, 0.7), (1, -0.9, 1), (1, -1, 1),
+
+    # Front vertical wall (Z=1, X=-1 to X=1, Y=-1 to Y=-0.9)
+    (-1, -1, 1), (1, -1, 1), (1, -0.9, 1),
+    (-1, -1, 1), (1, -0.9, 1), (-1, -0.9, 1),
+)
+
+# Heights of the three lines drawn between a left and right gate
+GATE_LINE_HEIGHTS = (0.0, -0.5, 0.5)
@@ -0,0 +1,111 @@
+"""
+Application handlers that keep the add-on's caches in sync with the scene.
+"""
+
+import bpy
+from bpy.app.handlers import persistent
+
+from . import preflight
+from .gizmos.overlay import clear_overlay
+from .kn5.material_analysis import clear_material_analysis_cache, invalidate_material
+from .kn5.vertex_budget import clear_vertex_budget_cache, invalidate_vertex_budget
+from .logic_index import (
+    invalidate_logic_index,
+    notify_object_updated,
+    reset_moved_objects,
+)
+from .scene_index import invalidate_scene_index
+from .surface_groups import invalidate_surface_groups
+from .surface_query import clear_surface_trees, invalidate_surface_object
+
+# Datablock types whose changes can affect the scene index
+SCENE_INDEX_TYPES = (bpy.types.Object, bpy.types.Collection, bpy.types.Scene, bpy.types.Material)
+
+# Owner of the msgbus rename subscription
+_msgbus_owner = object()
+
+
+@persistent
+def on_depsgraph_update(scene, depsgraph):
+    preflight.get_preflight().on_depsgraph_update(depsgraph)
+    for update in depsgraph.updates:
+        updated_id = update.id
+        if isinstance(updated_id, SCENE_INDEX_TYPES):
+            invalidate_scene_index()
+        if isinstance(updated_id, bpy.types.Object):
+            notify_object_updated(updated_id, moved=update.is_updated_transform)
+            if update.is_updated_geometry:
+                invalidate_vertex_budget(updated_id.name)
+            if update.is_updated_geometry or update.is_updated_transform:
+                invalidate_surface_object(updated_id.name)
+        if isinstance(updated_id, bpy.types.Material):
+            invalidate_material(updated_id.original)
+        elif isinstance(updated_id, bpy.types.NodeTree):
+            # Embedded material trees do not point back to their material
+            clear_material_analysis_cache()
+
+
+@persistent
+def on_file_changed(*_args):
+    """Undo and file loads replace every datablock, so nothing cached is valid."""
+    clear_material_analysis_cache()
+    clear_vertex_budget_cache()
+    clear_surface_trees()
+    invalidate_scene_index()
+    invalidate_logic_index()
+    reset_moved_objects()
+    invalidate_surface_groups()
+    clear_overlay()
+    preflight.get_preflight().mark_dirty()
+
+
+def on_object_renamed(*_args):
+    """Renames are not reported by the depsgraph; both name-based indices go stale."""
+    invalidate_logic_index()
+    invalidate_surface_groups()
+
+
+def subscribe_renames():
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    bpy.msgbus.subscribe_rna(
+        key=(bpy.types.Object, "name"),
+        owner=_msgbus_owner,
+        args=(),
+        notify=on_object_renamed,
+    )
+
+
+def unsubscribe_renames():
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+
+
+@persistent
+def on_load(*_args):
+    on_file_changed()
+    # Message bus subscriptions do not survive loading a file
+    subscribe_renames()
+
+
+__handlers__ = (
+    (bpy.app.handlers.depsgraph_update_post, on_depsgraph_update),
+    (bpy.app.handlers.load_post, on_load),
+    (bpy.app.handlers.undo_post, on_file_changed),
+    (bpy.app.handlers.redo_post, on_file_changed),
+)
+
+
+def register():
+    for handler_list, handler in __handlers__:
+        if handler not in handler_list:
+            handler_list.append(handler)
+    subscribe_renames()
+    preflight.register()
+
+
+def unregister():
+    for handler_list, handler in __handlers__:
+        if handler in handler_list:
+            handler_list.remove(handler)
+    on_file_changed()
+    unsubscribe_renames()
+    preflight.unregister()
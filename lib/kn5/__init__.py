@@ -1,4 +1,13 @@
-from .exporter import export_kn5
+from .export_session import ExportSession
+from .exporter import ExportProgress, export_kn5, iter_export_kn5
 from .utils import convert_matrix, convert_quaternion, convert_vector3
 
-__all__ = ['export_kn5', 'convert_matrix', 'convert_quaternion', 'convert_vector3']
+__all__ = [
+    'ExportProgress',
+    'ExportSession',
+    'convert_matrix',
+    'convert_quaternion',
+    'convert_vector3',
+    'export_kn5',
+    'iter_export_kn5',
+]
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, NamedTuple
+
+from ..scene_index import invalidate_scene_index
+
+if TYPE_CHECKING:
+    from bpy.types import Context, Depsgraph, Material
+
+    from .node_writer import MeshData
+
+
+class EncodedTexture(NamedTuple):
+    """Texture data as embedded in the KN5, and its size before optimization."""
+
+    data: bytes
+    original_size: int
+
+
+class ExportSession:
+    """
+    State shared by every KN5 written in one track export.
+
+    The scene is evaluated once, and geometry extracted and textures encoded
+    for one collection are reused by the others, so each KN5 only assembles
+    its own subset. Material analysis is cached for the whole process (see
+    material_analysis) and needs no session state. The session assumes the
+    scene does not change while it is in use.
+    """
+
+    def __init__(self, context: Context):
+        # Collection visibility or membership may have changed without a depsgraph update
+        invalidate_scene_index()
+        self.depsgraph: Depsgraph = context.evaluated_depsgraph_get()
+        # object name -> mesh parts extracted from it, and the materials they use
+        self.mesh_parts: dict[str, tuple[list[MeshData], list[Material]]] = {}
+        # image name -> encoded texture
+        self.textures: dict[str, EncodedTexture] = {}
@@ -2,17 +2,33 @@ from __future__ import annotations
 
 import traceback
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, NamedTuple
 
+from ..scene_index import invalidate_scene_index
 from .constants import KN5_HEADER, KN5_VERSION
 from .kn5_writer import KN5Writer
 from .material_writer import MaterialWriter
 from .node_writer import NodeWriter
+from .texture_atlas import TextureAtlasBuilder
+from .texture_sync import TextureSync
 from .texture_writer import TextureWriter
 
 if TYPE_CHECKING:
+    from collections.abc import Generator, Iterator
+
     from bpy.types import Context
 
+    from ..scene_index import ExportScope
+    from .export_session import ExportSession
+
+
+class ExportProgress(NamedTuple):
+    """One finished unit of KN5 export work."""
+
+    stage: str
+    done: int
+    total: int
+
 
 class KN5Exporter(KN5Writer):
     """
@@ -21,67 +37,162 @@ class KN5Exporter(KN5Writer):
     Orchestrates writing of header, textures, materials, and scene hierarchy.
     """
 
-    def __init__(self, file, context: Context, warnings: list[str]):
+    def __init__(
+        self,
+        file,
+        context: Context,
+        warnings: list[str],
+        texture_sync: TextureSync,
+        scope: ExportScope | None = None,
+        session: ExportSession | None = None,
+    ):
         super().__init__(file)
         self.context = context
         self.warnings = warnings
+        self.texture_sync = texture_sync
+        # Objects to export (the whole scene if None); textures follow the scope's materials
+        self.scope = scope
+        self.session = session
 
     def write(self) -> None:
         """Write complete KN5 file: header + textures + materials + nodes."""
+        for _ in self.iter_write():
+            pass
+
+    def iter_write(self) -> Iterator[ExportProgress]:
+        """Like write(), yielding progress after each mesh, texture and root node."""
         self._write_header()
-        self._write_content()
+        yield from self._write_content()
 
     def _write_header(self) -> None:
         """Write KN5 file signature and version."""
         self.file.write(KN5_HEADER)
         self.write_uint(KN5_VERSION)
 
-    def _write_content(self) -> None:
-        """Write textures, materials, and scene hierarchy."""
-        texture_writer = TextureWriter(self.file, self.context, self.warnings)
-        texture_writer.write()
-
-        material_writer = MaterialWriter(self.file, self.context, self.warnings)
+    def _write_content(self) -> Iterator[ExportProgress]:
+        """
+        Write textures, materials, and scene hierarchy.
+
+        The node and material plan is built first so only textures used by
+        the exported nodes are embedded, and small textures can be atlased
+        before anything is written.
+        """
+        material_writer = MaterialWriter(self.file, self.context, self.warnings, self.scope)
+        node_writer = NodeWriter(self.file, self.context, material_writer, self.warnings, self.scope, self.session)
+        mesh_count = node_writer.get_mesh_count()
+        for done, _name in enumerate(node_writer.iter_prepare(), 1):
+            yield ExportProgress("Extracting meshes", done, mesh_count)
+
+        atlas_textures: dict[str, bytes] = {}
+        export_settings = self.context.scene.AC_Settings.export_settings
+        if export_settings.use_texture_atlas:
+            atlas_builder = TextureAtlasBuilder(self.context, self.warnings, int(export_settings.atlas_max_tile_size))
+            atlas_textures = atlas_builder.build(material_writer, node_writer.mesh_parts)
+            yield ExportProgress("Building texture atlas", 1, 1)
+
+        texture_writer = TextureWriter(
+            self.file,
+            self.context,
+            self.warnings,
+            material_writer.get_materials(),
+            self.texture_sync,
+            atlas_textures,
+            self.session,
+        )
+        texture_count = texture_writer.get_texture_count()
+        for done, _name in enumerate(texture_writer.iter_write(), 1):
+            yield ExportProgress("Writing textures", done, texture_count)
+
+        material_writer.apply_texture_names(texture_writer.texture_names)
+        if export_settings.merge_duplicate_materials:
+            material_writer.deduplicate_materials()
         material_writer.write()
+        yield ExportProgress("Writing materials", 1, 1)
 
-        node_writer = NodeWriter(self.file, self.context, material_writer, self.warnings)
-        node_writer.write()
+        root_count = len(node_writer.root_objects)
+        for done, _name in enumerate(node_writer.iter_write(), 1):
+            yield ExportProgress("Writing nodes", done, root_count)
 
 
-def export_kn5(filepath: str, context: Context) -> dict[str, str | list[str]]:
+def export_kn5(
+    filepath: str,
+    context: Context,
+    texture_sync: TextureSync | None = None,
+    scope: ExportScope | None = None,
+    session: ExportSession | None = None,
+) -> dict[str, str | list[str]]:
     """
     Export scene to KN5 file.
 
     Args:
         filepath: Output KN5 file path
         context: Blender context
+        texture_sync: Shared content/texture sync when exporting several KN5
+            files in one run. The caller finalizes it once all exports
+            succeeded. If omitted, orphaned textures are removed after this
+            export succeeds.
+        scope: Objects to export, e.g. one collection's. The whole scene
+            if omitted.
+        session: Evaluation, geometry and textures shared by the KN5 files
+            of one run. The scene must not change while it is in use.
 
     Returns:
         Dictionary with 'status' ('success' or 'error') and 'warnings' list
     """
+    steps = iter_export_kn5(filepath, context, texture_sync, scope, session)
+    while True:
+        try:
+            next(steps)
+        except StopIteration as finished:
+            return finished.value
+
+
+def iter_export_kn5(
+    filepath: str,
+    context: Context,
+    texture_sync: TextureSync | None = None,
+    scope: ExportScope | None = None,
+    session: ExportSession | None = None,
+) -> Generator[ExportProgress, None, dict[str, str | list[str]]]:
+    """
+    Export scene to KN5 file one unit of work at a time.
+
+    Yields ExportProgress after each unit and returns the export_kn5 result.
+    Closing the generator cancels the export and removes the partial file.
+    """
     warnings: list[str] = []
     output_file = None
+    owns_texture_sync = texture_sync is None
+    completed = False
 
     try:
+        if texture_sync is None:
+            texture_sync = TextureSync()
+        if session is None:
+            # Collection visibility or membership may have changed without a depsgraph update
+            invalidate_scene_index()
         output_file = open(filepath, "wb")
-        exporter = KN5Exporter(output_file, context, warnings)
-        exporter.write()
+        exporter = KN5Exporter(output_file, context, warnings, texture_sync, scope, session)
+        yield from exporter.iter_write()
+
+        if owns_texture_sync:
+            texture_sync.finalize(warnings)
 
+        completed = True
         return {"status": "success", "warnings": warnings}
 
     except Exception as e:
         error_trace = traceback.format_exc()
         warnings.append(f"Export failed: {e}")
         warnings.append(error_trace)
-
-        # Remove broken file to prevent loading errors in AC
-        try:
-            Path(filepath).unlink(missing_ok=True)
-        except OSError:
-            pass
-
         return {"status": "error", "warnings": warnings}
 
     finally:
         if output_file:
             output_file.close()
+        if not completed:
+            # Remove broken or cancelled file to prevent loading errors in AC
+            try:
+                Path(filepath).unlink(missing_ok=True)
+            except OSError:
+                pass
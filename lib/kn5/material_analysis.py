@@ -0,0 +1,135 @@
+"""
+Cached analysis of material node trees.
+
+The exporter, texture baking and preflight checks all need the same facts
+about a material's node tree: which image nodes it has, which AC texture
+slot each image feeds and whether it uses procedural textures. The tree is
+walked once, with links indexed by source node, and the result is reused
+until the material changes.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import bpy
+
+if TYPE_CHECKING:
+    from bpy.types import Image, Material, Node, ShaderNodeTexImage
+
+
+PROCEDURAL_NODE_TYPES = {
+    'TEX_NOISE', 'TEX_GRADIENT', 'TEX_VORONOI', 'TEX_MAGIC',
+    'TEX_WAVE', 'TEX_MUSGRAVE', 'TEX_CHECKER', 'TEX_BRICK'
+}
+
+# material pointer -> (tree fingerprint, analysis)
+_analysis_cache: dict[int, tuple[tuple, MaterialAnalysis]] = {}
+
+
+class MaterialAnalysis:
+    """Facts about a single material's node tree."""
+
+    def __init__(self, material: Material):
+        self.material_name = material.name
+        self.has_node_tree = material.node_tree is not None
+        self.output_node: Node | None = None
+        self.image_nodes: list[ShaderNodeTexImage] = []
+        self.procedural_nodes: list[Node] = []
+        # slot name -> image name, as written to the KN5 material
+        self.texture_mapping: dict[str, str] = {}
+        # images that fell back to txDiffuse because their slot was unclear
+        self.auto_assigned: list[str] = []
+
+        if self.has_node_tree:
+            self._analyze(material)
+
+    @property
+    def images(self) -> dict[str, Image]:
+        """Images referenced by image nodes, by name."""
+        return {node.image.name: node.image for node in self.image_nodes if node.image}
+
+    def _analyze(self, material: Material) -> None:
+        node_tree = material.node_tree
+
+        # Index links by source node once instead of scanning every link per node
+        linked_sockets: dict[str, list[str]] = {}
+        for link in node_tree.links:
+            linked_sockets.setdefault(link.from_node.name, []).append(link.to_socket.name.lower())
+
+        for node in node_tree.nodes:
+            if node.type == 'OUTPUT_MATERIAL' and self.output_node is None:
+                self.output_node = node
+            elif node.type in PROCEDURAL_NODE_TYPES:
+                self.procedural_nodes.append(node)
+            elif isinstance(node, bpy.types.ShaderNodeTexImage):
+                self.image_nodes.append(node)
+                self._map_texture(node, linked_sockets.get(node.name, []))
+
+    def _map_texture(self, node: ShaderNodeTexImage, to_sockets: list[str]) -> None:
+        """
+        Assign the node's image to an AC texture slot.
+
+        Priority:
+        1. Use AC_Texture.shader_input_name if set
+        2. Auto-detect from node connections
+        3. Default to txDiffuse
+        """
+        if not node.image or node.image.name.startswith("__"):
+            return
+
+        image_name = node.image.name
+        if hasattr(node, 'AC_Texture') and node.AC_Texture.shader_input_name:
+            self.texture_mapping[node.AC_Texture.shader_input_name] = image_name
+            return
+
+        slot_name = _detect_texture_slot(to_sockets)
+        if slot_name:
+            self.texture_mapping[slot_name] = image_name
+        else:
+            self.texture_mapping["txDiffuse"] = image_name
+            self.auto_assigned.append(image_name)
+
+
+def _detect_texture_slot(to_sockets: list[str]) -> str | None:
+    """Detect AC texture slot based on the sockets a texture node feeds."""
+    for to_socket_name in to_sockets:
+        if "base color" in to_socket_name or "diffuse" in to_socket_name:
+            return "txDiffuse"
+        elif "normal" in to_socket_name:
+            return "txNormal"
+        elif "roughness" in to_socket_name or "specular" in to_socket_name:
+            return "txDetail"
+    return None
+
+
+def _get_fingerprint(material: Material) -> tuple:
+    """
+    Cheap check that catches edits made while no depsgraph update is sent
+    (e.g. inside a running operator).
+    """
+    node_tree = material.node_tree
+    if node_tree is None:
+        return (None,)
+    return (node_tree.as_pointer(), len(node_tree.nodes), len(node_tree.links))
+
+
+def analyze_material(material: Material) -> MaterialAnalysis:
+    """Get the analysis of a material, rebuilding it only when the material changed."""
+    key = material.as_pointer()
+    fingerprint = _get_fingerprint(material)
+    cached = _analysis_cache.get(key)
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+
+    analysis = MaterialAnalysis(material)
+    _analysis_cache[key] = (fingerprint, analysis)
+    return analysis
+
+
+def invalidate_material(material: Material) -> None:
+    _analysis_cache.pop(material.as_pointer(), None)
+
+
+def clear_material_analysis_cache() -> None:
+    _analysis_cache.clear()
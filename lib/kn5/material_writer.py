@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import hashlib
+import json
 from typing import TYPE_CHECKING
 
 import bpy
 
+from ..scene_index import get_scene_index
 from .kn5_writer import KN5Writer
+from .material_analysis import analyze_material
 
 if TYPE_CHECKING:
-    from bpy.types import Context, Material, ShaderNodeTexImage
+    from bpy.types import Context, Material
+
+    from ..scene_index import ExportScope
 
 
 class ShaderProperty:
@@ -61,88 +67,81 @@ class MaterialProperties:
 
         return properties
 
-    def _generate_texture_mapping(self, material: Material, warnings: list[str]) -> dict[str, str]:
+    def get_signature(self) -> str:
         """
-        Generate texture mapping from node tree.
+        Hash of everything written to the KN5 except the name.
 
-        Priority:
-        1. Use AC_Texture.shader_input_name if set
-        2. Auto-detect from node connections
-        3. Default to txDiffuse
+        Materials with the same signature render identically and can share
+        one KN5 material.
         """
-        mapping = {}
-
-        if not material.node_tree:
-            return mapping
-
-        for node in material.node_tree.nodes:
-            if not isinstance(node, bpy.types.ShaderNodeTexImage):
-                continue
-
-            if not node.image or node.image.name.startswith("__"):
-                continue
-
-            # Check if user manually set texture slot via PropertyGroup
-            if hasattr(node, 'AC_Texture') and node.AC_Texture.shader_input_name:
-                slot_name = node.AC_Texture.shader_input_name
-                mapping[slot_name] = node.image.name
-            else:
-                # Auto-detect texture slot based on connected socket
-                slot_name = self._detect_texture_slot(node, material)
-                if slot_name:
-                    mapping[slot_name] = node.image.name
-                else:
-                    # Default to diffuse if connection unclear
-                    mapping["txDiffuse"] = node.image.name
-                    warnings.append(
-                        f"Material '{material.name}': Auto-assigned texture '{node.image.name}' to txDiffuse slot"
-                    )
-
-        return mapping
-
-    def _detect_texture_slot(self, texture_node: ShaderNodeTexImage, material: Material) -> str | None:
-        """Detect AC texture slot based on node connections."""
-        if not material.node_tree:
-            return None
-
-        for link in material.node_tree.links:
-            if link.from_node != texture_node:
-                continue
-
-            # Check what the texture is connected to
-            to_socket_name = link.to_socket.name.lower()
-
-            if "base color" in to_socket_name or "diffuse" in to_socket_name:
-                return "txDiffuse"
-            elif "normal" in to_socket_name:
-                return "txNormal"
-            elif "roughness" in to_socket_name or "specular" in to_socket_name:
-                return "txDetail"
+        shader_properties = sorted(
+            (prop.name, prop.value_a, list(prop.value_b), list(prop.value_c), list(prop.value_d))
+            for prop in self.shader_properties.values()
+        )
+        signature_source = json.dumps([
+            self.shader_name,
+            self.alpha_blend_mode,
+            self.alpha_tested,
+            self.depth_mode,
+            shader_properties,
+            sorted(self.texture_mapping.items()),
+        ])
+        return hashlib.md5(signature_source.encode("utf-8")).hexdigest()
+
+    def rename_textures(self, texture_names: dict[str, str]) -> None:
+        """
+        Rewrite image names in the texture mapping to the canonical texture
+        names written by TextureWriter, so duplicate images share one texture.
+        """
+        for slot_name, image_name in self.texture_mapping.items():
+            self.texture_mapping[slot_name] = texture_names.get(image_name, image_name)
 
-        return None
+    def _generate_texture_mapping(self, material: Material, warnings: list[str]) -> dict[str, str]:
+        """Generate texture mapping from the material's cached node tree analysis."""
+        analysis = analyze_material(material)
+        for image_name in analysis.auto_assigned:
+            warnings.append(f"Material '{material.name}': Auto-assigned texture '{image_name}' to txDiffuse slot")
+        return dict(analysis.texture_mapping)
 
 
 class MaterialWriter(KN5Writer):
     """Writes material definitions to KN5 file."""
 
-    def __init__(self, file, context: Context, warnings: list[str]):
+    def __init__(self, file, context: Context, warnings: list[str], scope: ExportScope | None = None):
         super().__init__(file)
         self.context = context
         self.warnings = warnings
+        # Objects whose materials are written (the whole scene if None)
+        self.scope = scope
         self.available_materials: dict[str, MaterialProperties] = {}
+        self.blender_materials: dict[str, Material] = {}
         self.material_positions: dict[str, int] = {}
+        # merged material name -> name of the material that replaced it
+        self.material_aliases: dict[str, str] = {}
         self._collect_materials()
 
-    def get_material_id(self, material) -> int:
-        """Get material ID, adding it if not already collected (for evaluated meshes)."""
+    def get_material_id(self, material_name: str) -> int:
+        """Get material ID of a registered material, following merges to the canonical material."""
+        while material_name in self.material_aliases:
+            material_name = self.material_aliases[material_name]
+        return self.material_positions[material_name]
+
+    def register_material(self, material: Material) -> str:
+        """
+        Register material used by a mesh part, adding it if not already
+        collected (for evaluated meshes).
+
+        Returns: Name used to look up the material ID once all materials are known.
+        """
         if material.name in self.material_positions:
-            return self.material_positions[material.name]
+            return material.name
 
         # Material not found - this can happen with evaluated meshes from modifiers
         # Add it now with validation
         position = len(self.material_positions)
         mat_props = MaterialProperties(material, self.warnings)
         self.available_materials[material.name] = mat_props
+        self.blender_materials[material.name] = material
         self.material_positions[material.name] = position
 
         # Validate texture paths for dynamically added materials
@@ -150,26 +149,82 @@ class MaterialWriter(KN5Writer):
         texture_dir = get_texture_directory()
 
         texture_issues = []
-        if material.node_tree:
-            import bpy
-            for node in material.node_tree.nodes:
-                if isinstance(node, bpy.types.ShaderNodeTexImage) and node.image:
-                    if not node.image.filepath:
-                        texture_issues.append(f"texture '{node.image.name}' has no filepath")
-                    elif not node.image.filepath.startswith("//"):
-                        texture_issues.append(f"texture '{node.image.name}' uses absolute path (should be relative)")
-                    else:
-                        # Check if texture is in content/texture directory
-                        abs_path = bpy.path.abspath(node.image.filepath)
-                        if texture_dir not in abs_path:
-                            texture_issues.append(f"texture '{node.image.name}' not in content/texture directory")
+        for node in analyze_material(material).image_nodes:
+            if node.image:
+                if not node.image.filepath:
+                    texture_issues.append(f"texture '{node.image.name}' has no filepath")
+                elif not node.image.filepath.startswith("//"):
+                    texture_issues.append(f"texture '{node.image.name}' uses absolute path (should be relative)")
+                else:
+                    # Check if texture is in content/texture directory
+                    abs_path = bpy.path.abspath(node.image.filepath)
+                    if texture_dir not in abs_path:
+                        texture_issues.append(f"texture '{node.image.name}' not in content/texture directory")
 
         warning_msg = f"Material '{material.name}' added from evaluated mesh (Geometry Nodes/modifiers)"
         if texture_issues:
             warning_msg += f" - Issues: {'; '.join(texture_issues)}"
         self.warnings.append(warning_msg)
 
-        return position
+        return material.name
+
+    def get_materials(self) -> list[Material]:
+        """Get all Blender materials that will be written, in write order."""
+        return [
+            self.blender_materials[material_name]
+            for material_name, _position in sorted(self.material_positions.items(), key=lambda k: k[1])
+            if material_name in self.blender_materials
+        ]
+
+    def merge_materials(self, material_names: list[str], merged: MaterialProperties) -> None:
+        """Replace several materials with a single generated material (e.g. a texture atlas)."""
+        for material_name in material_names:
+            self._remove_material(material_name, merged.name)
+
+        self.available_materials[merged.name] = merged
+        self.material_positions[merged.name] = len(self.material_positions)
+        self._renumber_materials()
+
+    def deduplicate_materials(self) -> None:
+        """
+        Merge materials with identical KN5 properties (e.g. 'Concrete' and
+        'Concrete.001') into the first of them, so AC can batch their meshes.
+
+        Must run after apply_texture_names, so materials using duplicate
+        images compare equal.
+        """
+        canonical_names: dict[str, str] = {}
+        merged: list[str] = []
+        for material_name, _position in sorted(self.material_positions.items(), key=lambda k: k[1]):
+            signature = self.available_materials[material_name].get_signature()
+            canonical_name = canonical_names.setdefault(signature, material_name)
+            if canonical_name != material_name:
+                self._remove_material(material_name, canonical_name)
+                merged.append(f"'{material_name}' -> '{canonical_name}'")
+
+        if merged:
+            self._renumber_materials()
+            # Config sections targeting the merged names no longer match
+            self.warnings.append(
+                f"Merged {len(merged)} duplicate material(s) with identical KN5 properties: {', '.join(merged)}"
+            )
+
+    def apply_texture_names(self, texture_names: dict[str, str]) -> None:
+        """Point every material's texture mapping at the written KN5 texture names."""
+        for material in self.available_materials.values():
+            material.rename_textures(texture_names)
+
+    def _remove_material(self, material_name: str, replacement_name: str) -> None:
+        """Drop a material and redirect its mesh parts to the replacement."""
+        self.available_materials.pop(material_name, None)
+        self.blender_materials.pop(material_name, None)
+        self.material_positions.pop(material_name, None)
+        self.material_aliases[material_name] = replacement_name
+
+    def _renumber_materials(self) -> None:
+        """Keep material IDs contiguous after materials were removed."""
+        ordered_names = sorted(self.material_positions.items(), key=lambda k: k[1])
+        self.material_positions = {name: position for position, (name, _) in enumerate(ordered_names)}
 
     def write(self) -> None:
         """Write material count and all material definitions."""
@@ -178,61 +233,14 @@ class MaterialWriter(KN5Writer):
             material = self.available_materials[material_name]
             self._write_material(material)
 
-    def _is_object_hidden(self, obj) -> bool:
-        """Check if object is in any hidden collection."""
-        for collection in obj.users_collection:
-            if collection.hide_viewport:
-                return True
-        return False
-
-    def _collect_object_materials(self, obj, materials: set) -> None:
-        """Recursively collect materials from object and its children."""
-        if obj.name.startswith("__"):
-            return
-        if self._is_object_hidden(obj):
-            return
-
-        # Collect materials from this object
-        if hasattr(obj, 'material_slots'):
-            for slot in obj.material_slots:
-                if slot.material and not slot.material.name.startswith("__"):
-                    materials.add(slot.material)
-
-        # Recursively collect from children
-        for child in obj.children:
-            self._collect_object_materials(child, materials)
-
     def _collect_materials(self) -> None:
-        """Collect all materials used by mesh objects in scene."""
-        position = 0
-        scene_materials = set()
-
-        # Collect materials from all visible root objects and their children
-        for obj in self.context.scene.objects:
-            # Only process root objects (children will be handled recursively)
-            if obj.parent:
-                continue
-            # Skip if object name starts with __
-            if obj.name.startswith("__"):
-                continue
-            # Skip instancer objects (tree/grass scatter systems)
-            if obj.name.startswith("KSTREE_GROUP_") or obj.name.startswith("GRASS_"):
-                continue
-            # Skip template/example objects
-            name_lower = obj.name.lower()
-            if "_profile" in name_lower or "_example" in name_lower or "collider" in name_lower:
-                continue
-            # Skip if object is in a hidden collection
-            if self._is_object_hidden(obj):
-                continue
-
-            self._collect_object_materials(obj, scene_materials)
-
-        for material in scene_materials:
+        """Collect all materials used by the exported objects."""
+        # Sorted by name so IDs are stable and 'Concrete' is kept over 'Concrete.001' when deduplicating
+        for position, material in enumerate(get_scene_index(self.context, self.scope).materials):
             mat_props = MaterialProperties(material, self.warnings)
             self.available_materials[material.name] = mat_props
+            self.blender_materials[material.name] = material
             self.material_positions[material.name] = position
-            position += 1
 
     def _write_material(self, material: MaterialProperties) -> None:
         """Write single material definition."""
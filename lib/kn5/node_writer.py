@@ -5,13 +5,19 @@ from typing import TYPE_CHECKING
 import bmesh
 from mathutils import Matrix
 
+from ..scene_index import get_scene_index
 from .constants import MAX_VERTICES_PER_MESH, NODE_TYPES
 from .kn5_writer import KN5Writer
 from .utils import convert_matrix, convert_vector3
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
+
     from bpy.types import Context, Object
 
+    from ..scene_index import ExportScope
+    from .export_session import ExportSession
+
 
 class Vertex:
     """Represents a vertex with position, normal, UV, and tangent data."""
@@ -60,10 +66,15 @@ class Vertex:
 
 
 class MeshData:
-    """Represents geometry data for a single mesh: material, vertices, indices."""
+    """
+    Represents geometry data for a single mesh: material, vertices, indices.
+
+    The material is referenced by name and resolved to its KN5 ID when
+    written, since materials can still be merged after extraction.
+    """
 
-    def __init__(self, material_id: int, vertices: list[Vertex], indices: list[int]):
-        self.material_id = material_id
+    def __init__(self, material_name: str, vertices: list[Vertex], indices: list[int]):
+        self.material_name = material_name
         self.vertices = vertices
         self.indices = indices
 
@@ -86,55 +97,92 @@ class NodeProperties:
 class NodeWriter(KN5Writer):
     """Writes scene hierarchy and mesh data to KN5 file."""
 
-    def __init__(self, file, context: Context, material_writer, warnings: list[str]):
+    def __init__(
+        self,
+        file,
+        context: Context,
+        material_writer,
+        warnings: list[str],
+        scope: ExportScope | None = None,
+        session: ExportSession | None = None,
+    ):
         super().__init__(file)
         self.context = context
         self.material_writer = material_writer
         self.warnings = warnings
+        # Objects to write (the whole scene if None)
+        self.scope = scope
+        # Extracted geometry shared with the other KN5 files of the export
+        self.session = session
+        self.depsgraph = None
+        self.root_objects: list[Object] = []
+        self.mesh_parts: dict[str, list[MeshData]] = {}
+
+    def prepare(self) -> None:
+        """
+        Build the node plan: extract geometry for every mesh that will be written.
+
+        Must run before textures and materials are written, since evaluated
+        meshes (Geometry Nodes/modifiers) can register additional materials.
+        """
+        for _ in self.iter_prepare():
+            pass
+
+    def iter_prepare(self) -> Iterator[str]:
+        """Like prepare(), yielding the name of each mesh object once it is extracted."""
+        self.root_objects = get_scene_index(self.context, self.scope).roots
+        self.depsgraph = self.session.depsgraph if self.session else self.context.evaluated_depsgraph_get()
+        for obj in self.root_objects:
+            yield from self._prepare_object(obj)
+
+    def get_mesh_count(self) -> int:
+        """Number of mesh objects prepare() extracts."""
+        return len(get_scene_index(self.context, self.scope).meshes)
 
     def write(self) -> None:
         """Write scene hierarchy starting from root node."""
+        for _ in self.iter_write():
+            pass
+
+    def iter_write(self) -> Iterator[str]:
+        """Like write(), yielding the name of each root object once its hierarchy is written."""
         self._write_root_node()
-        root_objects = self._get_visible_root_objects()
-        for obj in sorted(root_objects, key=lambda k: len(k.children)):
+        for obj in sorted(self.root_objects, key=lambda k: len(k.children)):
             self._write_object(obj)
+            yield obj.name
 
-    def _get_visible_root_objects(self) -> list:
-        """Get root objects that are visible (not in hidden collections)."""
-        visible_objects = []
-        for obj in self.context.scene.objects:
-            # Skip if object has parent
-            if obj.parent:
-                continue
-            # Skip if object name starts with __
-            if obj.name.startswith("__"):
-                continue
-            # Skip instancer objects (tree/grass scatter systems)
-            if obj.name.startswith("KSTREE_GROUP_") or obj.name.startswith("GRASS_"):
-                continue
-            # Skip template/example objects (profiles, colliders, etc.)
-            name_lower = obj.name.lower()
-            if "_profile" in name_lower or "_example" in name_lower or "collider" in name_lower:
-                continue
-            # Skip if object is in a hidden collection
-            if self._is_object_hidden(obj):
-                continue
-            visible_objects.append(obj)
-        return visible_objects
+    def _prepare_object(self, obj: Object) -> Iterator[str]:
+        """Recursively extract mesh parts for object hierarchy."""
+        if obj.type in ("MESH", "CURVE", "SURFACE"):
+            self.mesh_parts[obj.name] = self._get_mesh_parts(obj)
+            yield obj.name
+
+        for child in obj.children:
+            if not child.name.startswith("__"):
+                yield from self._prepare_object(child)
+
+    def _get_mesh_parts(self, obj: Object) -> list[MeshData]:
+        """Extract the mesh parts of an object, or reuse those extracted for another KN5 of the session."""
+        extracted = self.session.mesh_parts.get(obj.name) if self.session else None
+        if extracted is None:
+            mesh_parts = self._split_by_vertex_limit(self._split_mesh_by_materials(obj))
+            materials = self.material_writer.blender_materials
+            used_materials = [materials[name] for name in dict.fromkeys(part.material_name for part in mesh_parts)]
+            extracted = (mesh_parts, used_materials)
+            if self.session:
+                self.session.mesh_parts[obj.name] = extracted
+        else:
+            for material in extracted[1]:
+                self.material_writer.register_material(material)
 
-    def _is_object_hidden(self, obj: Object) -> bool:
-        """Check if object is in any hidden collection."""
-        for collection in obj.users_collection:
-            if collection.hide_viewport:
-                return True
-        return False
+        # Fresh part objects, the atlas builder replaces the vertices of the parts it remaps
+        return [MeshData(part.material_name, part.vertices, part.indices) for part in extracted[0]]
 
     def _write_root_node(self) -> None:
         """Write root 'BlenderFile' node containing all top-level objects."""
-        root_children = self._get_visible_root_objects()
         self._write_node_type("Node")
         self.write_string("BlenderFile")
-        self.write_uint(len(root_children))
+        self.write_uint(len(self.root_objects))
         self.write_bool(True)  # active
         self.write_matrix(Matrix())
 
@@ -167,8 +215,7 @@ class NodeWriter(KN5Writer):
 
         Splits mesh by material and vertex count limits.
         """
-        mesh_parts = self._split_mesh_by_materials(obj)
-        mesh_parts = self._split_by_vertex_limit(mesh_parts)
+        mesh_parts = self.mesh_parts[obj.name]
 
         if obj.parent or len(mesh_parts) > 1:
             transform = Matrix()
@@ -214,11 +261,11 @@ class NodeWriter(KN5Writer):
         for index in mesh_data.indices:
             self.write_ushort(index)
 
-        if mesh_data.material_id is None:
+        if mesh_data.material_name is None:
             self.warnings.append(f"No material assigned to mesh '{obj.name}'")
             self.write_uint(0)
         else:
-            self.write_uint(mesh_data.material_id)
+            self.write_uint(self.material_writer.get_material_id(mesh_data.material_name))
 
         self.write_uint(props.layer)
         self.write_float(props.lod_in)
@@ -265,8 +312,7 @@ class NodeWriter(KN5Writer):
         mesh_parts = []
 
         # Use depsgraph to get evaluated mesh with modifiers applied and materials preserved
-        depsgraph = self.context.evaluated_depsgraph_get()
-        object_eval = obj.evaluated_get(depsgraph)
+        object_eval = obj.evaluated_get(self.depsgraph)
         mesh_copy = self.context.blend_data.meshes.new_from_object(object_eval)
 
         bm = bmesh.new()
@@ -338,8 +384,8 @@ class NodeWriter(KN5Writer):
                     indices.extend([face_indices[1], face_indices[2], face_indices[0]])
 
                 sorted_vertices = [v for v, _ in sorted(vertices.items(), key=lambda k: k[1])]
-                material_id = self.material_writer.get_material_id(material)
-                mesh_parts.append(MeshData(material_id, sorted_vertices, indices))
+                material_name = self.material_writer.register_material(material)
+                mesh_parts.append(MeshData(material_name, sorted_vertices, indices))
 
         finally:
             # Clean up temporary mesh data
@@ -393,6 +439,6 @@ class NodeWriter(KN5Writer):
                         break
 
                 new_vertices = [mesh_data.vertices[old_idx] for old_idx, _ in sorted(vertex_mapping.items(), key=lambda k: k[1])]
-                result.append(MeshData(mesh_data.material_id, new_vertices, new_indices))
+                result.append(MeshData(mesh_data.material_name, new_vertices, new_indices))
 
         return result
@@ -0,0 +1,145 @@
+"""
+Texture content analysis for KN5 export.
+
+Detects textures that are a single solid colour, grayscale stored as RGB(A),
+or RGBA with a fully opaque alpha channel, so they can be collapsed to tiny
+images or re-encoded without the unused channels.
+"""
+
+from __future__ import annotations
+
+import struct
+import zlib
+
+import numpy as np
+
+# Largest per-channel difference still treated as equal (one 8-bit step)
+CHANNEL_TOLERANCE = 1.0 / 255.0
+
+SOLID_TEXTURE_SIZE = 4
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_COLOR_TYPES = {
+    1: 0,  # grayscale
+    2: 4,  # grayscale + alpha
+    3: 2,  # RGB
+    4: 6,  # RGBA
+}
+
+# source hash -> analysis, shared by every export in the process
+_analysis_cache: dict[str, TextureAnalysis] = {}
+
+
+class TextureAnalysis:
+    """Result of analysing the pixels of a single image."""
+
+    def __init__(self, width: int, height: int, is_solid: bool, is_grayscale: bool, is_opaque: bool,
+                 solid_color: tuple[float, float, float, float]):
+        self.width = width
+        self.height = height
+        self.is_solid = is_solid
+        self.is_grayscale = is_grayscale
+        self.is_opaque = is_opaque
+        self.solid_color = solid_color
+
+    @property
+    def channels(self) -> int:
+        """Number of channels actually needed to represent the image."""
+        color_channels = 1 if self.is_grayscale else 3
+        return color_channels if self.is_opaque else color_channels + 1
+
+
+def analyze_image(image, source_hash: str | None = None) -> TextureAnalysis | None:
+    """
+    Analyse image pixels in one vectorized pass.
+
+    Results are cached per source hash. Returns None for images without
+    pixel data.
+    """
+    if source_hash and source_hash in _analysis_cache:
+        return _analysis_cache[source_hash]
+
+    width, height = image.size
+    if width == 0 or height == 0:
+        return None
+
+    pixels = read_pixels(image)
+    color = pixels[:, :3]
+    alpha = pixels[:, 3]
+
+    value_range = pixels.max(axis=0) - pixels.min(axis=0)
+    is_solid = bool(value_range.max() <= CHANNEL_TOLERANCE)
+    is_grayscale = bool(
+        np.abs(color[:, 0] - color[:, 1]).max() <= CHANNEL_TOLERANCE
+        and np.abs(color[:, 1] - color[:, 2]).max() <= CHANNEL_TOLERANCE
+    )
+    is_opaque = bool(alpha.min() >= 1.0 - CHANNEL_TOLERANCE)
+    solid_color = tuple(float(v) for v in pixels.mean(axis=0))
+
+    analysis = TextureAnalysis(width, height, is_solid, is_grayscale, is_opaque, solid_color)  # type: ignore
+    if source_hash:
+        _analysis_cache[source_hash] = analysis
+    return analysis
+
+
+def encode_solid_png(analysis: TextureAnalysis) -> bytes:
+    """Encode the solid colour of an analysed image as a tiny PNG."""
+    channels = analysis.channels
+    color = np.array(analysis.solid_color, dtype=np.float32)
+    pixels = np.tile(color, (SOLID_TEXTURE_SIZE * SOLID_TEXTURE_SIZE, 1))
+    return encode_png(select_channels(pixels, channels), SOLID_TEXTURE_SIZE, SOLID_TEXTURE_SIZE, channels)
+
+
+def encode_stripped_png(image, analysis: TextureAnalysis) -> bytes:
+    """Re-encode image pixels as PNG using only the channels it needs."""
+    channels = analysis.channels
+    pixels = read_pixels(image)
+    return encode_png(select_channels(pixels, channels), analysis.width, analysis.height, channels)
+
+
+def clear_analysis_cache() -> None:
+    _analysis_cache.clear()
+
+
+def read_pixels(image) -> np.ndarray:
+    """Read image pixels into an (N, 4) float array without per-pixel Python access."""
+    width, height = image.size
+    pixels = np.empty(width * height * 4, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    return pixels.reshape(-1, 4)
+
+
+def select_channels(pixels: np.ndarray, channels: int) -> np.ndarray:
+    """Reduce (N, 4) RGBA pixels to the given channel layout."""
+    if channels == 1:
+        return pixels[:, :1]
+    if channels == 2:
+        return pixels[:, [0, 3]]
+    if channels == 3:
+        return pixels[:, :3]
+    return pixels
+
+
+def encode_png(pixels: np.ndarray, width: int, height: int, channels: int) -> bytes:
+    """
+    Encode 8-bit pixels as PNG.
+
+    Blender stores rows bottom to top, PNG expects them top to bottom.
+    """
+    data = np.clip(np.rint(pixels * 255.0), 0, 255).astype(np.uint8)
+    rows = data.reshape(height, width * channels)[::-1]
+    # Prefix every row with filter type 0 (None)
+    raw = np.hstack((np.zeros((height, 1), dtype=np.uint8), rows)).tobytes()
+
+    header = struct.pack(">IIBBBBB", width, height, 8, PNG_COLOR_TYPES[channels], 0, 0, 0)
+    return (
+        PNG_SIGNATURE
+        + _png_chunk(b"IHDR", header)
+        + _png_chunk(b"IDAT", zlib.compress(raw, 6))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
+def _png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    crc = zlib.crc32(chunk_type + data) & 0xFFFFFFFF
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", crc)
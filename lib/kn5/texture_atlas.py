@@ -0,0 +1,263 @@
+"""
+Texture atlas stage for KN5 export.
+
+Packs small diffuse textures of materials that share a shader setup into
+shared atlases, remaps the UVs of the extracted mesh parts, and replaces
+the original materials with one merged material per atlas.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .material_analysis import analyze_material
+from .node_writer import Vertex
+from .texture_analysis import encode_png, read_pixels, select_channels
+from .texture_cache import get_texture_cache
+
+if TYPE_CHECKING:
+    from bpy.types import Context, Image
+
+    from .material_writer import MaterialProperties, MaterialWriter
+    from .node_writer import MeshData
+
+ATLAS_SIZE = 2048
+ATLAS_PADDING = 4
+UV_EPSILON = 1e-4
+
+
+class AtlasTile:
+    """Placement of one material's texture inside an atlas page (pixels, top-left origin)."""
+
+    def __init__(self, material_name: str, image: Image, source_hash: str):
+        self.material_name = material_name
+        self.image = image
+        self.source_hash = source_hash
+        self.width, self.height = image.size
+        self.x = 0
+        self.y = 0
+
+
+class TextureAtlasBuilder:
+    """Builds texture atlases for eligible materials and rewrites affected mesh parts."""
+
+    def __init__(self, context: Context, warnings: list[str], max_tile_size: int):
+        self.context = context
+        self.warnings = warnings
+        self.max_tile_size = max_tile_size
+        self.texture_cache = get_texture_cache()
+
+    def build(self, material_writer: MaterialWriter, mesh_parts: dict[str, list[MeshData]]) -> dict[str, bytes]:
+        """
+        Atlas eligible materials.
+
+        Returns: Generated atlas textures (texture name -> PNG data) to embed.
+        """
+        parts_by_material: dict[str, list[MeshData]] = {}
+        for parts in mesh_parts.values():
+            for mesh_data in parts:
+                parts_by_material.setdefault(mesh_data.material_name, []).append(mesh_data)
+
+        groups: dict[tuple, list[AtlasTile]] = {}
+        for material_name, material in material_writer.available_materials.items():
+            tile = self._get_candidate(material_writer, material, parts_by_material.get(material_name, []))
+            if tile:
+                groups.setdefault(self._get_signature(material), []).append(tile)
+
+        atlas_textures: dict[str, bytes] = {}
+        atlased_images: set[str] = set()
+        merged_count = 0
+        for tiles in groups.values():
+            if len(tiles) < 2:
+                continue
+            for page in self._pack(tiles):
+                if len(page) < 2:
+                    continue
+                atlas_name = f"atlas_{material_writer.available_materials[page[0].material_name].shader_name}"
+                atlas_name = f"{atlas_name}_{len(atlas_textures)}"
+                width, height = self._get_page_size(page)
+                atlas_textures[atlas_name] = self._compose(page, width, height)
+
+                merged = copy.copy(material_writer.available_materials[page[0].material_name])
+                merged.name = atlas_name
+                merged.texture_mapping = {"txDiffuse": atlas_name}
+                for tile in page:
+                    atlased_images.add(tile.image.name)
+                    self._remap_uvs(parts_by_material[tile.material_name], tile, width, height)
+                material_writer.merge_materials([tile.material_name for tile in page], merged)
+                merged_count += len(page)
+
+        if atlas_textures:
+            # Images still referenced by materials outside an atlas are still embedded
+            for material in material_writer.available_materials.values():
+                atlased_images.difference_update(material.texture_mapping.values())
+            self.warnings.append(
+                f"Texture atlas: merged {merged_count} material(s) into {len(atlas_textures)} atlas material(s), "
+                f"replacing {len(atlased_images)} texture(s) with {len(atlas_textures)} atlas texture(s)"
+            )
+
+        self.texture_cache.flush()
+        return atlas_textures
+
+    def _get_candidate(
+        self, material_writer: MaterialWriter, material: MaterialProperties, parts: list[MeshData]
+    ) -> AtlasTile | None:
+        """Return an atlas tile if the material can be atlased, otherwise None."""
+        if not parts or list(material.texture_mapping) != ["txDiffuse"]:
+            return None
+
+        blender_material = material_writer.blender_materials.get(material.name)
+        if not blender_material:
+            return None
+
+        image = analyze_material(blender_material).images.get(material.texture_mapping["txDiffuse"])
+        if not image or image.is_float:
+            return None
+
+        width, height = image.size
+        if width == 0 or height == 0 or max(width, height) > self.max_tile_size:
+            return None
+
+        # Atlased textures cannot repeat, so every UV must stay inside the tile
+        for mesh_data in parts:
+            for vertex in mesh_data.vertices:
+                u, v = vertex.uv
+                if u < -UV_EPSILON or u > 1 + UV_EPSILON or v > UV_EPSILON or v < -1 - UV_EPSILON:
+                    return None
+
+        source_hash = self.texture_cache.get_source_hash(image)
+        if source_hash is None:
+            return None
+        return AtlasTile(material.name, image, source_hash)
+
+    def _get_signature(self, material: MaterialProperties) -> tuple:
+        """Materials can only share an atlas if everything but their texture matches."""
+        shader_properties = tuple(
+            (prop.name, prop.value_a, prop.value_b, prop.value_c, prop.value_d)
+            for prop in material.shader_properties.values()
+        )
+        return (
+            material.shader_name,
+            material.alpha_blend_mode,
+            material.alpha_tested,
+            material.depth_mode,
+            shader_properties,
+        )
+
+    def _pack(self, tiles: list[AtlasTile]) -> list[list[AtlasTile]]:
+        """
+        Shelf-pack tiles into atlas pages, reusing a cached layout when the
+        same textures were packed before.
+        """
+        layout_key = self._get_layout_key(tiles)
+        cached_layout = self.texture_cache.get(layout_key)
+        if cached_layout is not None:
+            placements = json.loads(cached_layout)
+            tiles_by_name = {tile.material_name: tile for tile in tiles}
+            pages = []
+            for page_placements in placements:
+                page = []
+                for material_name, x, y in page_placements:
+                    tile = tiles_by_name[material_name]
+                    tile.x, tile.y = x, y
+                    page.append(tile)
+                pages.append(page)
+            return pages
+
+        pages: list[list[AtlasTile]] = [[]]
+        shelf_x = shelf_y = shelf_height = 0
+        for tile in sorted(tiles, key=lambda t: (t.height, t.width, t.material_name), reverse=True):
+            padded_width = tile.width + ATLAS_PADDING * 2
+            padded_height = tile.height + ATLAS_PADDING * 2
+
+            if shelf_x + padded_width > ATLAS_SIZE:
+                shelf_x = 0
+                shelf_y += shelf_height
+                shelf_height = 0
+            if shelf_y + padded_height > ATLAS_SIZE:
+                pages.append([])
+                shelf_x = shelf_y = shelf_height = 0
+
+            tile.x = shelf_x + ATLAS_PADDING
+            tile.y = shelf_y + ATLAS_PADDING
+            pages[-1].append(tile)
+            shelf_x += padded_width
+            shelf_height = max(shelf_height, padded_height)
+
+        placements = [[(tile.material_name, tile.x, tile.y) for tile in page] for page in pages]
+        self.texture_cache.put(layout_key, json.dumps(placements).encode("utf-8"))
+        return pages
+
+    def _get_layout_key(self, tiles: list[AtlasTile]) -> str:
+        layout_source = json.dumps(
+            [ATLAS_SIZE, ATLAS_PADDING]
+            + sorted([tile.material_name, tile.source_hash, tile.width, tile.height] for tile in tiles)
+        )
+        return "atlas_layout_" + hashlib.md5(layout_source.encode("utf-8")).hexdigest()
+
+    def _get_page_size(self, page: list[AtlasTile]) -> tuple[int, int]:
+        """Smallest power-of-two size holding every tile of the page."""
+        used_width = max(tile.x + tile.width + ATLAS_PADDING for tile in page)
+        used_height = max(tile.y + tile.height + ATLAS_PADDING for tile in page)
+        return _next_power_of_two(used_width), _next_power_of_two(used_height)
+
+    def _compose(self, page: list[AtlasTile], width: int, height: int) -> bytes:
+        """Compose the atlas page image and encode it as PNG (cached)."""
+        page_source = json.dumps(
+            [width, height, ATLAS_PADDING]
+            + sorted([tile.source_hash, tile.x, tile.y, tile.width, tile.height] for tile in page)
+        )
+        page_key = "atlas_page_" + hashlib.md5(page_source.encode("utf-8")).hexdigest()
+        cached_page = self.texture_cache.get(page_key)
+        if cached_page is not None:
+            return cached_page
+
+        # Compose top to bottom, with edge pixels repeated into the padding
+        # so filtering does not bleed neighbouring tiles into each other
+        atlas = np.zeros((height, width, 4), dtype=np.float32)
+        for tile in page:
+            pixels = read_pixels(tile.image).reshape(tile.height, tile.width, 4)[::-1]
+            padded = np.pad(pixels, ((ATLAS_PADDING, ATLAS_PADDING), (ATLAS_PADDING, ATLAS_PADDING), (0, 0)), mode="edge")
+            atlas[
+                tile.y - ATLAS_PADDING : tile.y + tile.height + ATLAS_PADDING,
+                tile.x - ATLAS_PADDING : tile.x + tile.width + ATLAS_PADDING,
+            ] = padded
+
+        pixels = atlas[::-1].reshape(-1, 4)
+        channels = 3 if pixels[:, 3].min() >= 1.0 else 4
+        page_data = encode_png(select_channels(pixels, channels), width, height, channels)
+        self.texture_cache.put(page_key, page_data)
+        return page_data
+
+    def _remap_uvs(self, parts: list[MeshData], tile: AtlasTile, width: int, height: int) -> None:
+        """
+        Move UVs of the tile's mesh parts into the tile's rectangle.
+
+        KN5 UVs are stored as (u, -v); 1 + (-v) is the distance from the top
+        of the texture, which is how tiles are placed in the atlas.
+        """
+        offset_u = tile.x / width
+        offset_t = tile.y / height
+        scale_u = tile.width / width
+        scale_t = tile.height / height
+
+        for mesh_data in parts:
+            remapped = []
+            for vertex in mesh_data.vertices:
+                u, v = vertex.uv
+                new_u = offset_u + u * scale_u
+                new_v = offset_t + (1.0 + v) * scale_t - 1.0
+                remapped.append(Vertex(vertex.position, vertex.normal, (new_u, new_v), vertex.tangent))
+            mesh_data.vertices = remapped
+
+
+def _next_power_of_two(value: int) -> int:
+    power = 1
+    while power < value:
+        power *= 2
+    return power
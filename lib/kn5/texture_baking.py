@@ -1,36 +1,181 @@
 from __future__ import annotations
 
+import hashlib
+import os
 from typing import TYPE_CHECKING
 
 import bpy
 
+from ..scene_index import get_scene_index
+from .material_analysis import analyze_material, invalidate_material
+
 if TYPE_CHECKING:
     from bpy.types import Context, Material
 
 
-PROCEDURAL_NODE_TYPES = {
-    'TEX_NOISE', 'TEX_GRADIENT', 'TEX_VORONOI', 'TEX_MAGIC',
-    'TEX_WAVE', 'TEX_MUSGRAVE', 'TEX_CHECKER', 'TEX_BRICK'
+BAKE_SAMPLES = 32  # Lower samples for faster baking
+
+# Material custom properties recording the last bake
+BAKE_HASH_PROPERTY = "ac_bake_hash"
+BAKE_SOURCE_PROPERTY = "ac_bake_source"
+
+# Node properties that do not change what a node outputs
+IGNORED_NODE_PROPERTIES = {
+    'rna_type', 'name', 'label', 'location', 'width', 'width_hidden', 'height',
+    'dimensions', 'select', 'show_options', 'show_preview', 'show_texture', 'hide',
+    'use_custom_color', 'color', 'bl_idname', 'bl_label', 'bl_description', 'bl_icon',
+    'bl_static_type', 'bl_width_default', 'bl_width_min', 'bl_width_max',
+    'bl_height_default', 'bl_height_min', 'bl_height_max',
 }
 
 
 def has_procedural_textures(material: Material) -> bool:
     """Check if material uses procedural texture nodes."""
-    if not material.node_tree:
+    return bool(analyze_material(material).procedural_nodes)
+
+
+def get_bake_hash(material: Material, resolution: int) -> str:
+    """
+    Structural hash of the material's node tree (node types, values, links)
+    plus the bake resolution.
+
+    The baked image node and the links into the shader's Base Color are left
+    out, so the hash is the same before and after the bake is wired in.
+    """
+    hasher = hashlib.md5(f"resolution:{int(resolution)}".encode())
+    _hash_node_tree(material.node_tree, hasher, _get_baked_image_prefix(material), _get_base_color_input(material))
+    return hasher.hexdigest()
+
+
+def is_bake_current(material: Material, resolution: int) -> bool:
+    """Check whether the material's last bake still matches its node tree."""
+    if not material.node_tree or BAKE_HASH_PROPERTY not in material:
+        return False
+    if material[BAKE_HASH_PROPERTY] != get_bake_hash(material, resolution):
         return False
+    return _has_baked_image(material)
 
-    for node in material.node_tree.nodes:
-        if node.type in PROCEDURAL_NODE_TYPES:
-            return True
-    return False
 
+class BakeSession:
+    """
+    Shared bake setup for baking several materials in a row.
 
-def bake_material_textures(context: Context, material: Material, resolution: int = 1024) -> list[str]:
+    The render engine and samples are configured once, a single bake plane
+    is created through bpy.data and reused for every material, and the scene
+    state (engine, samples, selection) is restored once when the session ends.
     """
-    Bake procedural textures in material to image textures.
 
-    Creates temporary objects, bakes textures, and replaces procedural nodes
-    with Image Texture nodes pointing to baked images.
+    def __init__(self, context: Context, resolution: int = 1024):
+        self.context = context
+        self.resolution = int(resolution)
+        self.bake_obj = None
+        self._original_engine = None
+        self._original_samples = None
+        self._original_selection = []
+        self._original_active = None
+
+    def __enter__(self):
+        scene = self.context.scene
+        view_layer = self.context.view_layer
+        self._original_selection = list(self.context.selected_objects)
+        self._original_active = view_layer.objects.active
+
+        # Nothing was changed yet if creating the plane fails
+        self.bake_obj = _create_bake_plane(scene)
+        try:
+            # Set render engine to Cycles for baking
+            self._original_engine = scene.render.engine
+            scene.render.engine = 'CYCLES'
+            self._original_samples = scene.cycles.samples
+            scene.cycles.samples = BAKE_SAMPLES
+
+            # Bake only the bake plane: it must be the sole selected, active object
+            for obj in self._original_selection:
+                obj.select_set(False)
+            self.bake_obj.select_set(True)
+            view_layer.objects.active = self.bake_obj
+        except Exception:
+            # __exit__ does not run when __enter__ raises
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        scene = self.context.scene
+
+        # Clean up temporary object
+        if self.bake_obj:
+            mesh = self.bake_obj.data
+            bpy.data.objects.remove(self.bake_obj, do_unlink=True)
+            bpy.data.meshes.remove(mesh)
+            self.bake_obj = None
+
+        # Restore settings
+        if self._original_samples is not None:
+            scene.cycles.samples = self._original_samples
+        if self._original_engine is not None:
+            scene.render.engine = self._original_engine
+        for obj in self._original_selection:
+            obj.select_set(True)
+        self.context.view_layer.objects.active = self._original_active
+
+    def bake(self, material: Material) -> list[str]:
+        """
+        Bake procedural textures in material to image textures.
+
+        Replaces procedural nodes with Image Texture nodes pointing to baked images.
+
+        Returns:
+            List of warning messages
+        """
+        warnings = []
+
+        if not material.node_tree:
+            warnings.append(f"Material '{material.name}' has no node tree")
+            return warnings
+
+        # Find material output node
+        analysis = analyze_material(material)
+        output_node = analysis.output_node
+
+        if not output_node:
+            warnings.append(f"Material '{material.name}' has no output node - skipping bake")
+            return warnings
+
+        # Check if material has surface input connected
+        if not output_node.inputs['Surface'].is_linked:
+            warnings.append(f"Material '{material.name}' has no surface shader connected - skipping bake")
+            return warnings
+
+        if not analysis.procedural_nodes:
+            return warnings
+
+        if reuse_cached_bake(material, self.resolution):
+            warnings.append(f"Procedural textures of material '{material.name}' unchanged - reused previous bake")
+            return warnings
+
+        # Bake the procedural setup, not the result of a previous bake
+        _restore_bake_source(material)
+
+        self.bake_obj.data.materials[0] = material
+        try:
+            # Bake diffuse color
+            baked_image = _bake_texture_channel(material, "DIFFUSE", self.resolution, warnings)
+
+            if baked_image:
+                # Replace procedural nodes with baked image texture
+                _replace_procedural_with_baked(material, baked_image, output_node)
+                material[BAKE_HASH_PROPERTY] = get_bake_hash(material, self.resolution)
+                warnings.append(f"Baked procedural textures for material '{material.name}' → '{baked_image.name}'")
+        finally:
+            invalidate_material(material)
+
+        return warnings
+
+
+def bake_material_textures(context: Context, material: Material, resolution: int = 1024) -> list[str]:
+    """
+    Bake procedural textures in a single material to image textures.
 
     Args:
         context: Blender context
@@ -40,80 +185,203 @@ def bake_material_textures(context: Context, material: Material, resolution: int
     Returns:
         List of warning messages
     """
-    warnings = []
+    with BakeSession(context, resolution) as session:
+        return session.bake(material)
 
-    if not material.node_tree:
-        warnings.append(f"Material '{material.name}' has no node tree")
-        return warnings
 
-    # Find material output node
-    output_node = None
-    for node in material.node_tree.nodes:
-        if node.type == 'OUTPUT_MATERIAL':
-            output_node = node
-            break
+def reuse_cached_bake(material: Material, resolution: int) -> bool:
+    """
+    Wire in the previous bake of the material if its node tree is unchanged.
 
-    if not output_node:
-        warnings.append(f"Material '{material.name}' has no output node - skipping bake")
-        return warnings
+    The baked image is taken from the blend file, or loaded from
+    content/texture if it is no longer there.
 
-    # Check if material has surface input connected
-    if not output_node.inputs['Surface'].is_linked:
-        warnings.append(f"Material '{material.name}' has no surface shader connected - skipping bake")
-        return warnings
+    Returns: True if the material does not need to be baked again.
+    """
+    if not is_bake_current(material, resolution):
+        return False
+
+    baked_image = _load_baked_image(material)
+    if baked_image is None:
+        return False
+    base_color_input = _get_base_color_input(material)
+    if base_color_input is not None and not _is_baked_image_link(material, base_color_input):
+        _replace_procedural_with_baked(material, baked_image, analyze_material(material).output_node)
+        invalidate_material(material)
+    elif base_color_input is not None and base_color_input.links[0].from_node.image != baked_image:
+        base_color_input.links[0].from_node.image = baked_image
+    return True
+
+
+def _get_baked_image_prefix(material: Material) -> str:
+    return f"{material.name}_baked_"
+
+
+def _get_baked_image_name(material: Material) -> str:
+    return f"{_get_baked_image_prefix(material)}diffuse"
+
+
+def _get_baked_image_path(image_name: str) -> str | None:
+    from ...utils.files import get_texture_directory
+    # Material names may hold characters that are not valid in file names
+    file_name = "".join(c if c.isalnum() or c in ('-', '_') else '_' for c in image_name)
+    try:
+        return os.path.join(get_texture_directory(), f"{file_name}.png")
+    except OSError:
+        return None
 
-    # Find procedural nodes
-    procedural_nodes = [node for node in material.node_tree.nodes if node.type in PROCEDURAL_NODE_TYPES]
-    if not procedural_nodes:
-        return warnings
 
-    # Create temporary baking object
-    bpy.ops.mesh.primitive_plane_add(size=2, location=(0, 0, 0))
-    bake_obj = context.active_object
-    bake_obj.name = f"__BAKE_TEMP_{material.name}"
+def _has_baked_image(material: Material) -> bool:
+    """
+    Check that the baked diffuse image is in the blend file or on disk.
 
-    # Assign material to bake object
-    if not bake_obj.data.materials:
-        bake_obj.data.materials.append(material)
-    else:
-        bake_obj.data.materials[0] = material
+    Read-only, so it is safe to call from preflight and UI drawing: packed
+    images count even before their pixels are loaded.
+    """
+    image_name = _get_baked_image_name(material)
+    image = bpy.data.images.get(image_name)
+    if image and (image.has_data or image.packed_file):
+        return True
+    image_path = _get_baked_image_path(image_name)
+    return bool(image_path) and os.path.exists(image_path)
+
+
+def _load_baked_image(material: Material):
+    """Get the baked diffuse image from the blend file, loading it from disk if needed."""
+    image_name = _get_baked_image_name(material)
+    image = bpy.data.images.get(image_name)
+    if image and (image.has_data or image.packed_file):
+        return image
+
+    image_path = _get_baked_image_path(image_name)
+    if not image_path or not os.path.exists(image_path):
+        return None
+    try:
+        image = bpy.data.images.load(image_path, check_existing=True)
+    except RuntimeError:
+        return None
+    image.name = image_name
+    image.filepath_raw = _get_relative_path(image_path)
+    return image
 
-    # Create UV map if needed
-    if not bake_obj.data.uv_layers:
-        bake_obj.data.uv_layers.new(name="UVMap")
 
+def _get_relative_path(filepath: str) -> str:
+    """Path relative to the blend file, as the KN5 texture checks expect, when it can be."""
+    if not bpy.data.filepath:
+        return filepath
     try:
-        # Bake diffuse color
-        baked_image = _bake_texture_channel(
-            context, bake_obj, material, "DIFFUSE", resolution, warnings
+        return bpy.path.relpath(filepath)
+    except ValueError:
+        # On another drive than the blend file
+        return filepath
+
+
+def _get_base_color_input(material: Material):
+    """Base Color input of the shader connected to the material output, if any."""
+    output_node = analyze_material(material).output_node
+    if not output_node or not output_node.inputs['Surface'].is_linked:
+        return None
+    shader_node = output_node.inputs['Surface'].links[0].from_node
+    return shader_node.inputs.get('Base Color')
+
+
+def _is_baked_image_link(material: Material, base_color_input) -> bool:
+    if not base_color_input.is_linked:
+        return False
+    from_node = base_color_input.links[0].from_node
+    return (
+        isinstance(from_node, bpy.types.ShaderNodeTexImage)
+        and from_node.image is not None
+        and from_node.image.name.startswith(_get_baked_image_prefix(material))
+    )
+
+
+def _restore_bake_source(material: Material) -> None:
+    """Reconnect the socket that fed Base Color before the last bake replaced it."""
+    base_color_input = _get_base_color_input(material)
+    source = material.get(BAKE_SOURCE_PROPERTY)
+    if base_color_input is None or not source or not _is_baked_image_link(material, base_color_input):
+        return
+
+    node_name, socket_identifier = source
+    source_node = material.node_tree.nodes.get(node_name)
+    if source_node is None:
+        return
+    for output in source_node.outputs:
+        if output.identifier == socket_identifier:
+            material.node_tree.links.new(output, base_color_input)
+            return
+
+
+def _hash_node_tree(node_tree, hasher, skip_image_prefix: str = "", skip_input=None) -> None:
+    """Feed node types, values and links of a node tree (and its groups) into hasher."""
+    skipped_nodes = set()
+    for node in sorted(node_tree.nodes, key=lambda n: n.name):
+        image = getattr(node, 'image', None)
+        if node.name == "__BAKE_TARGET" or (
+            skip_image_prefix and image is not None and image.name.startswith(skip_image_prefix)
+        ):
+            skipped_nodes.add(node.name)
+            continue
+
+        hasher.update(f"node:{node.name}:{node.bl_idname}".encode())
+        for prop in node.bl_rna.properties:
+            if prop.identifier in IGNORED_NODE_PROPERTIES or prop.type == 'COLLECTION':
+                continue
+            value = getattr(node, prop.identifier, None)
+            if prop.type == 'POINTER':
+                value = getattr(value, 'name', None)
+            elif getattr(prop, 'is_array', False):
+                value = tuple(value)
+            elif isinstance(value, set):
+                value = sorted(value)
+            hasher.update(f"{prop.identifier}={value!r}".encode())
+
+        for socket in node.inputs:
+            if not socket.is_linked and hasattr(socket, 'default_value'):
+                value = socket.default_value
+                value = tuple(value) if hasattr(value, '__len__') else value
+                hasher.update(f"in:{socket.identifier}={value!r}".encode())
+
+        group_tree = getattr(node, 'node_tree', None)
+        if group_tree is not None:
+            _hash_node_tree(group_tree, hasher)
+
+    for link in node_tree.links:
+        if link.from_node.name in skipped_nodes or link.to_node.name in skipped_nodes:
+            continue
+        if skip_input is not None and link.to_socket == skip_input:
+            continue
+        hasher.update(
+            f"link:{link.from_node.name}:{link.from_socket.identifier}"
+            f"->{link.to_node.name}:{link.to_socket.identifier}".encode()
         )
 
-        if baked_image:
-            # Replace procedural nodes with baked image texture
-            _replace_procedural_with_baked(material, baked_image, output_node)
-            warnings.append(f"Baked procedural textures for material '{material.name}' → '{baked_image.name}'")
 
-    finally:
-        # Clean up temporary object
-        bpy.data.objects.remove(bake_obj, do_unlink=True)
+def _create_bake_plane(scene):
+    """Create a 2x2 plane with a full 0-1 UV map, without going through operators."""
+    mesh = bpy.data.meshes.new("__BAKE_TEMP")
+    mesh.from_pydata([(-1, -1, 0), (1, -1, 0), (1, 1, 0), (-1, 1, 0)], [], [(0, 1, 2, 3)])
+    uv_layer = mesh.uv_layers.new(name="UVMap")
+    for loop_index, uv in enumerate(((0, 0), (1, 0), (1, 1), (0, 1))):
+        uv_layer.data[loop_index].uv = uv
+    mesh.materials.append(None)
 
-    return warnings
+    bake_obj = bpy.data.objects.new("__BAKE_TEMP", mesh)
+    scene.collection.objects.link(bake_obj)
+    return bake_obj
 
 
 def _bake_texture_channel(
-    context: Context,
-    bake_obj,
     material: Material,
     bake_type: str,
     resolution: int,
     warnings: list[str],
 ) -> bpy.types.Image | None:
     """
-    Bake a specific texture channel.
+    Bake a specific texture channel onto the active bake object.
 
     Args:
-        context: Blender context
-        bake_obj: Temporary object to bake onto
         material: Material being baked
         bake_type: Bake type ('DIFFUSE', 'NORMAL', etc.)
         resolution: Texture resolution
@@ -122,8 +390,15 @@ def _bake_texture_channel(
     Returns:
         Baked image or None if baking failed
     """
-    # Create image for baking
+    # Create image for baking, replacing the previous bake so the name stays stable
     image_name = f"{material.name}_baked_{bake_type.lower()}"
+    nodes = material.node_tree.nodes
+    previous_image = bpy.data.images.get(image_name)
+    previous_nodes = []
+    if previous_image:
+        # Keep the image nodes of the previous bake, they are pointed at the new one
+        previous_nodes = [node for node in nodes if getattr(node, 'image', None) == previous_image]
+        bpy.data.images.remove(previous_image)
     baked_image = bpy.data.images.new(
         name=image_name,
         width=resolution,
@@ -131,24 +406,16 @@ def _bake_texture_channel(
         alpha=True,
         float_buffer=False,
     )
+    for node in previous_nodes:
+        node.image = baked_image
 
     # Create temporary image texture node for baking target
-    nodes = material.node_tree.nodes
     temp_image_node = nodes.new('ShaderNodeTexImage')
     temp_image_node.name = "__BAKE_TARGET"
     temp_image_node.image = baked_image
     temp_image_node.select = True
     nodes.active = temp_image_node
 
-    # Set render engine to Cycles for baking
-    original_engine = context.scene.render.engine
-    context.scene.render.engine = 'CYCLES'
-
-    # Configure bake settings
-    bake_settings = context.scene.cycles
-    original_samples = bake_settings.samples
-    bake_settings.samples = 32  # Lower samples for faster baking
-
     try:
         # Perform bake
         bpy.ops.object.bake(
@@ -162,6 +429,17 @@ def _bake_texture_channel(
             use_clear=True,
         )
 
+        # Keep a copy in content/texture so the bake survives losing the image
+        image_path = _get_baked_image_path(image_name)
+        if image_path:
+            try:
+                baked_image.filepath_raw = image_path
+                baked_image.file_format = 'PNG'
+                baked_image.save()
+                baked_image.filepath_raw = _get_relative_path(image_path)
+            except RuntimeError as e:
+                warnings.append(f"Failed to save baked texture '{image_name}' to content/texture: {e}")
+
         # Pack the image to store in .blend file
         baked_image.pack()
 
@@ -170,13 +448,13 @@ def _bake_texture_channel(
     except RuntimeError as e:
         warnings.append(f"Failed to bake material '{material.name}': {e}")
         bpy.data.images.remove(baked_image)
+        # Image nodes of the previous bake are left without an image
+        for node in previous_nodes:
+            if not any(output.is_linked for output in node.outputs):
+                nodes.remove(node)
         return None
 
     finally:
-        # Restore settings
-        context.scene.render.engine = original_engine
-        bake_settings.samples = original_samples
-
         # Remove temporary bake target node
         if temp_image_node:
             nodes.remove(temp_image_node)
@@ -205,29 +483,48 @@ def _replace_procedural_with_baked(material: Material, baked_image, output_node)
     shader_link = surface_input.links[0]
     shader_node = shader_link.from_node
 
-    # Create new image texture node with baked image
-    image_node = nodes.new('ShaderNodeTexImage')
-    image_node.image = baked_image
-    image_node.location = (shader_node.location.x - 300, shader_node.location.y)
+    # Reuse the image node of a previous bake
+    base_color_input = shader_node.inputs.get('Base Color')
+    if base_color_input is not None and _is_baked_image_link(material, base_color_input):
+        base_color_input.links[0].from_node.image = baked_image
+        return
+
+    # Reuse the image node of a previous bake that was unlinked to bake its source again
+    image_node = next(
+        (
+            node for node in nodes
+            if isinstance(node, bpy.types.ShaderNodeTexImage)
+            and node.image == baked_image
+            and node.name != "__BAKE_TARGET"
+        ),
+        None,
+    )
+    if image_node is None:
+        # Create new image texture node with baked image
+        image_node = nodes.new('ShaderNodeTexImage')
+        image_node.image = baked_image
+        image_node.location = (shader_node.location.x - 300, shader_node.location.y)
 
     # Connect to shader's Base Color input (if it exists)
-    if 'Base Color' in shader_node.inputs:
-        # Disconnect existing Base Color connections
-        base_color_input = shader_node.inputs['Base Color']
+    if base_color_input is not None:
+        # Disconnect existing Base Color connections, remembering the source for re-bakes
         for link in base_color_input.links:
+            material[BAKE_SOURCE_PROPERTY] = [link.from_node.name, link.from_socket.identifier]
             links.remove(link)
 
         # Connect baked image to Base Color
         links.new(image_node.outputs['Color'], base_color_input)
 
 
-def bake_all_procedural_materials(context: Context, resolution: int = 1024) -> list[str]:
+def bake_all_procedural_materials(context: Context, resolution: int = 1024, batched: bool = True) -> list[str]:
     """
     Bake all materials with procedural textures in the scene.
 
     Args:
         context: Blender context
         resolution: Bake resolution
+        batched: Share one bake session (engine setup and bake plane) across
+            all materials instead of setting up and restoring per material
 
     Returns:
         List of warnings/status messages
@@ -235,29 +532,42 @@ def bake_all_procedural_materials(context: Context, resolution: int = 1024) -> l
     warnings = []
     materials_to_bake = []
 
-    # Collect materials from scene objects only
-    scene_materials = set()
-    for obj in context.scene.objects:
-        if obj.name.startswith("__"):
+    # Find materials with procedural textures, reusing bakes of unchanged ones
+    reused_count = 0
+    procedural_found = False
+    for material in get_scene_index(context).materials:
+        if not has_procedural_textures(material):
             continue
-        if hasattr(obj, 'material_slots'):
-            for slot in obj.material_slots:
-                if slot.material and not slot.material.name.startswith("__"):
-                    scene_materials.add(slot.material)
-
-    # Find materials with procedural textures
-    for material in scene_materials:
-        if has_procedural_textures(material):
+        procedural_found = True
+        if reuse_cached_bake(material, resolution):
+            reused_count += 1
+        else:
             materials_to_bake.append(material)
 
-    if not materials_to_bake:
+    if not procedural_found:
         warnings.append("No materials with procedural textures found")
         return warnings
 
+    if reused_count:
+        warnings.append(f"Reused up-to-date bakes for {reused_count} material(s)")
+    if not materials_to_bake:
+        return warnings
+
     warnings.append(f"Baking {len(materials_to_bake)} material(s) at {resolution}x{resolution}...")
 
-    for material in materials_to_bake:
-        material_warnings = bake_material_textures(context, material, resolution)
-        warnings.extend(material_warnings)
+    window_manager = context.window_manager
+    window_manager.progress_begin(0, len(materials_to_bake))
+    try:
+        if batched:
+            with BakeSession(context, resolution) as session:
+                for i, material in enumerate(materials_to_bake):
+                    warnings.extend(session.bake(material))
+                    window_manager.progress_update(i + 1)
+        else:
+            for i, material in enumerate(materials_to_bake):
+                warnings.extend(bake_material_textures(context, material, resolution))
+                window_manager.progress_update(i + 1)
+    finally:
+        window_manager.progress_end()
 
     return warnings
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import bpy
+
+# Bump when the way textures are encoded changes, so stale blobs are not reused
+ENCODER_VERSION = 1
+
+DEFAULT_CACHE_SIZE_MB = 1024
+INDEX_FILENAME = "index.json"
+
+# Blobs no index references are removed once this old; younger ones may
+# belong to another process that has not flushed its index yet
+ORPHAN_BLOB_SECONDS = 3600
+
+
+class TextureCache:
+    """
+    Disk-backed cache of encoded texture blobs, shared by every export in the process.
+
+    Blobs are keyed by the image's source identity (file path, mtime and size,
+    or the hash of its packed data) plus the encode settings. The cache is
+    bounded by size and evicts least recently used blobs first.
+
+    Several processes (background export workers, the batch exporter) may
+    share the directory: temporary files are per process, and the index is
+    merged with the one on disk when flushed.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.blob_directory = os.path.join(directory, "blobs")
+        self.index_path = os.path.join(directory, INDEX_FILENAME)
+        self.max_bytes = max_bytes
+        self.index = self._load_index()
+        # Blobs dropped since the last flush, so merging does not bring them back
+        self._removed: set[str] = set()
+        self._dirty = False
+
+    def get_source_identity(self, image) -> str | None:
+        """
+        Get a cheap identity for the image's source bytes.
+
+        Returns None for generated or modified images, whose pixels are not
+        represented by any source bytes.
+        """
+        if image.packed_file:
+            return "packed:" + hashlib.md5(image.packed_file.data).hexdigest()
+
+        if image.source != "FILE" or image.is_dirty:
+            return None
+
+        filepath = bpy.path.abspath(image.filepath_raw, library=image.library)
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+        return f"file:{os.path.normpath(filepath)}:{stat.st_mtime_ns}:{stat.st_size}"
+
+    def get_source_hash(self, image) -> str | None:
+        """Get the content hash of the image's source bytes, reusing known hashes."""
+        identity = self.get_source_identity(image)
+        if identity is None:
+            return None
+        if identity.startswith("packed:"):
+            return identity[len("packed:"):]
+
+        sources = self.index["sources"]
+        if identity not in sources:
+            filepath = bpy.path.abspath(image.filepath_raw, library=image.library)
+            try:
+                with open(filepath, "rb") as f:
+                    sources[identity] = hashlib.md5(f.read()).hexdigest()
+            except OSError:
+                return None
+            self._dirty = True
+        return sources[identity]
+
+    def get_key(self, image, settings: str = "") -> str | None:
+        """Build the blob key for an image and encode settings, if cacheable."""
+        identity = self.get_source_identity(image)
+        if identity is None:
+            return None
+        key_source = f"{identity}|{image.file_format}|{settings}|v{ENCODER_VERSION}"
+        return hashlib.md5(key_source.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> bytes | None:
+        """Return the cached blob for key, or None on a miss."""
+        entry = self.index["blobs"].get(key)
+        if entry is None or self.max_bytes == 0:
+            return None
+        try:
+            with open(self._blob_path(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            self._remove_entry(key)
+            return None
+        entry["last_used"] = time.time()
+        self._dirty = True
+        return data
+
+    def get_original_size(self, key: str) -> int | None:
+        """Size of the blob before content optimization, if it was recorded."""
+        entry = self.index["blobs"].get(key)
+        return entry.get("original_size") if entry else None
+
+    def put(self, key: str, data: bytes, original_size: int | None = None) -> None:
+        """Store a blob and evict least recently used blobs over the size limit."""
+        if len(data) > self.max_bytes:
+            return
+        try:
+            os.makedirs(self.blob_directory, exist_ok=True)
+            temp_path = f"{self._blob_path(key)}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, self._blob_path(key))
+        except OSError:
+            return
+        self.index["blobs"][key] = {
+            "size": len(data),
+            "original_size": original_size if original_size is not None else len(data),
+            "last_used": time.time(),
+        }
+        self._removed.discard(key)
+        self._dirty = True
+        self._evict()
+
+    def flush(self) -> None:
+        """Merge the index with the one on disk and persist it, if it changed."""
+        if not self._dirty:
+            return
+        self._merge_index(self._load_index())
+        self._evict()
+        # Once per flush: listing the blob directory on every put would scan it once per texture
+        self._remove_orphan_blobs()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Replace in one step, other processes may read the index at any time
+            temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(self.index, f)
+            os.replace(temp_path, self.index_path)
+            self._removed.clear()
+            self._dirty = False
+        except OSError:
+            pass
+
+    def _merge_index(self, disk_index: dict) -> None:
+        """Add the entries other processes wrote, keeping the latest use of each blob."""
+        blobs = self.index["blobs"]
+        for key, entry in disk_index["blobs"].items():
+            if key in self._removed:
+                continue
+            if key not in blobs or entry.get("last_used", 0) > blobs[key]["last_used"]:
+                blobs[key] = entry
+        for identity, source_hash in disk_index["sources"].items():
+            self.index["sources"].setdefault(identity, source_hash)
+
+    def _evict(self) -> None:
+        blobs = self.index["blobs"]
+        total = sum(entry["size"] for entry in blobs.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(blobs.items(), key=lambda k: k[1]["last_used"]):
+            try:
+                os.remove(self._blob_path(key))
+            except OSError:
+                pass
+            self._remove_entry(key)
+            total -= entry["size"]
+            if total <= self.max_bytes:
+                break
+
+    def _remove_orphan_blobs(self) -> None:
+        """Delete old blobs and temporary files no index entry references."""
+        try:
+            names = os.listdir(self.blob_directory)
+        except OSError:
+            return
+        expired = time.time() - ORPHAN_BLOB_SECONDS
+        blobs = self.index["blobs"]
+        for name in names:
+            if name.endswith(".bin") and name[:-len(".bin")] in blobs:
+                continue
+            path = os.path.join(self.blob_directory, name)
+            try:
+                if os.path.getmtime(path) < expired:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def _remove_entry(self, key: str) -> None:
+        self.index["blobs"].pop(key, None)
+        self._removed.add(key)
+        self._dirty = True
+
+    def _blob_path(self, key: str) -> str:
+        return os.path.join(self.blob_directory, key + ".bin")
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            index = {}
+        if not isinstance(index, dict):
+            index = {}
+        index.setdefault("blobs", {})
+        index.setdefault("sources", {})
+        return index
+
+
+_texture_cache: TextureCache | None = None
+
+
+def get_cache_directory() -> str:
+    return os.path.join(tempfile.gettempdir(), "ac_track_tools", "texture_cache")
+
+
+def get_texture_cache() -> TextureCache:
+    """Get the process-wide texture cache, sized from the add-on preferences."""
+    global _texture_cache
+    max_bytes = DEFAULT_CACHE_SIZE_MB * 1024 * 1024
+    addon = bpy.context.preferences.addons.get(__package__.split('.')[0])
+    if addon:
+        max_bytes = addon.preferences.texture_cache_size * 1024 * 1024
+
+    if _texture_cache is None:
+        _texture_cache = TextureCache(get_cache_directory(), max_bytes)
+    _texture_cache.max_bytes = max_bytes
+    return _texture_cache
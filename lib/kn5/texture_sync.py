@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+
+from ...utils.files import get_texture_directory
+
+MANIFEST_FILENAME = ".kn5_textures.json"
+
+# Auto-exported textures are named: anything_{8 hex chars}.ext
+AUTO_EXPORT_PATTERN = re.compile(r'^.+_[0-9a-f]{8}\.(png|dds)$', re.IGNORECASE)
+
+
+class TextureSync:
+    """
+    Manifest-based sync of auto-exported textures in content/texture.
+
+    Only textures that are new or changed are written. Files that are no
+    longer wanted are removed by finalize(), which must only be called once
+    every export sharing this sync has succeeded.
+    """
+
+    def __init__(self):
+        self.texture_dir = get_texture_directory()
+        self.manifest_path = os.path.join(self.texture_dir, MANIFEST_FILENAME)
+        self.manifest: dict[str, dict] = self._load_manifest()
+        self.wanted: set[str] = set()
+        self.written_count = 0
+        self.unchanged_count = 0
+
+    def sync_texture(self, texture_filename: str, image_data: bytes, warnings: list[str]) -> None:
+        """Make sure content/texture holds texture_filename with image_data."""
+        self.wanted.add(texture_filename)
+        texture_path = os.path.join(self.texture_dir, texture_filename)
+        data_hash = hashlib.md5(image_data).hexdigest()
+
+        if self._is_current(texture_filename, texture_path, len(image_data), data_hash):
+            self.unchanged_count += 1
+            return
+
+        # Write through a temp file so an interrupted export never leaves a
+        # truncated texture that matches by name (per process, as parallel
+        # export workers may write the same texture at once)
+        temp_path = f"{texture_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(image_data)
+            os.replace(temp_path, texture_path)
+        except OSError as e:
+            warnings.append(f"Failed to export texture '{texture_filename}' to content/texture: {e}")
+            return
+
+        self._record(texture_filename, texture_path, data_hash)
+        self.written_count += 1
+        size_kb = len(image_data) / 1024
+        warnings.append(f"Exported texture to content/texture: '{texture_filename}' ({size_kb:.1f} KB)")
+
+    def finalize(self, warnings: list[str]) -> None:
+        """Remove orphaned auto-exported textures and save the manifest."""
+        removed_count = 0
+        try:
+            filenames = os.listdir(self.texture_dir)
+        except OSError as e:
+            warnings.append(f"Failed to read content/texture directory: {e}")
+            filenames = []
+
+        for filename in filenames:
+            if filename in self.wanted or not AUTO_EXPORT_PATTERN.match(filename):
+                continue
+            try:
+                os.remove(os.path.join(self.texture_dir, filename))
+                self.manifest.pop(filename, None)
+                removed_count += 1
+            except OSError as e:
+                warnings.append(f"Failed to remove old texture '{filename}': {e}")
+
+        # Drop entries for files removed outside the add-on
+        for filename in list(self.manifest):
+            if filename not in self.wanted and filename not in filenames:
+                self.manifest.pop(filename)
+
+        self._save_manifest(warnings)
+        warnings.append(
+            f"Texture sync: {self.written_count} written, {self.unchanged_count} unchanged, {removed_count} removed"
+        )
+
+    def get_report(self) -> dict:
+        """Wanted textures and their manifest entries, for merging into the sync of another process."""
+        return {
+            "wanted": sorted(self.wanted),
+            "manifest": {name: self.manifest[name] for name in self.wanted if name in self.manifest},
+            "written": self.written_count,
+            "unchanged": self.unchanged_count,
+        }
+
+    def merge_report(self, report: dict) -> None:
+        """Take over the textures synced by an export worker, so finalize() keeps them."""
+        self.wanted.update(report["wanted"])
+        self.manifest.update(report["manifest"])
+        self.written_count += report["written"]
+        self.unchanged_count += report["unchanged"]
+
+    def _is_current(self, texture_filename: str, texture_path: str, size: int, data_hash: str) -> bool:
+        """Check whether the file on disk already holds the wanted data."""
+        try:
+            stat = os.stat(texture_path)
+        except OSError:
+            return False
+
+        if stat.st_size != size:
+            return False
+
+        entry = self.manifest.get(texture_filename)
+        if entry and entry.get("hash") == data_hash and entry.get("mtime") == stat.st_mtime:
+            return True
+
+        # Unknown or touched file: hash it once and remember the result
+        try:
+            with open(texture_path, 'rb') as f:
+                file_hash = hashlib.md5(f.read()).hexdigest()
+        except OSError:
+            return False
+
+        if file_hash != data_hash:
+            return False
+
+        self._record(texture_filename, texture_path, data_hash)
+        return True
+
+    def _record(self, texture_filename: str, texture_path: str, data_hash: str) -> None:
+        """Store size, mtime and hash of a synced texture in the manifest."""
+        stat = os.stat(texture_path)
+        self.manifest[texture_filename] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "hash": data_hash,
+        }
+
+    def _load_manifest(self) -> dict[str, dict]:
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return manifest if isinstance(manifest, dict) else {}
+
+    def _save_manifest(self, warnings: list[str]) -> None:
+        try:
+            with open(self.manifest_path, 'w') as f:
+                json.dump(self.manifest, f)
+        except OSError as e:
+            warnings.append(f"Failed to save texture manifest: {e}")
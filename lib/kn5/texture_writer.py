@@ -1,13 +1,27 @@
 from __future__ import annotations
 
+import hashlib
+import os
 from typing import TYPE_CHECKING
 
-import bpy
-
+from .export_session import EncodedTexture
 from .kn5_writer import KN5Writer
+from .material_analysis import analyze_material
+from .texture_analysis import (
+    PNG_SIGNATURE,
+    analyze_image,
+    encode_solid_png,
+    encode_stripped_png,
+)
+from .texture_cache import get_texture_cache
 
 if TYPE_CHECKING:
-    from bpy.types import Context, ShaderNodeTexImage
+    from collections.abc import Iterator
+
+    from bpy.types import Context, Material, ShaderNodeTexImage
+
+    from .export_session import ExportSession
+    from .texture_sync import TextureSync
 
 DDS_HEADER_BYTES = b"DDS"
 
@@ -15,57 +29,79 @@ DDS_HEADER_BYTES = b"DDS"
 class TextureWriter(KN5Writer):
     """Writes texture data to KN5 file."""
 
-    def __init__(self, file, context: Context, warnings: list[str]):
+    def __init__(
+        self,
+        file,
+        context: Context,
+        warnings: list[str],
+        materials: list[Material],
+        texture_sync: TextureSync,
+        generated_textures: dict[str, bytes] | None = None,
+        session: ExportSession | None = None,
+    ):
         super().__init__(file)
         self.context = context
         self.warnings = warnings
+        self.materials = materials
+        # Encoded textures shared with the other KN5 files of the export
+        self.session = session
+        # Textures created during export (e.g. atlases): name -> PNG data
+        self.generated_textures = generated_textures or {}
+        self.texture_sync = texture_sync
+        self.texture_cache = get_texture_cache()
+        self.optimization = context.scene.AC_Settings.export_settings.texture_optimization
+        self.optimized_count = 0
+        self.saved_bytes = 0
         self.available_textures: dict[str, ShaderNodeTexImage] = {}
         self.texture_positions: dict[str, int] = {}
-        self._clean_auto_exported_textures()
+        # image name -> name of the image holding the same source bytes
+        self.texture_aliases: dict[str, str] = {}
+        # image name -> texture name written to the KN5 (filled by write())
+        self.texture_names: dict[str, str] = {}
         self._collect_texture_nodes()
 
+    def get_texture_count(self) -> int:
+        return len(self.available_textures) + len(self.generated_textures)
+
     def write(self) -> None:
         """Write texture count and all texture data."""
-        self.write_int(len(self.available_textures))
-        for texture_name, _position in sorted(self.texture_positions.items(), key=lambda k: k[1]):
-            self._write_texture(self.available_textures[texture_name])
+        for _ in self.iter_write():
+            pass
 
-    def _clean_auto_exported_textures(self) -> None:
-        """
-        Clean up auto-exported textures from previous exports.
-        Removes files matching the pattern: *_{8_hex_chars}.{ext}
-        """
-        import os
-        import re
-        from ...utils.files import get_texture_directory
+    def iter_write(self) -> Iterator[str]:
+        """Like write(), yielding the name of each texture once it is written."""
+        self.write_int(self.get_texture_count())
+        for texture_name, _position in sorted(self.texture_positions.items(), key=lambda k: k[1]):
+            self.texture_names[texture_name] = self._write_texture(self.available_textures[texture_name])
+            yield texture_name
+        for texture_name, image_data in self.generated_textures.items():
+            self.texture_names[texture_name] = self._write_texture_data(texture_name, "PNG", image_data)
+            yield texture_name
 
-        texture_dir = get_texture_directory()
-        if not os.path.exists(texture_dir):
-            return
+        # Point duplicate images at the texture that was actually written
+        for image_name, canonical_name in self.texture_aliases.items():
+            if canonical_name in self.texture_names:
+                self.texture_names[image_name] = self.texture_names[canonical_name]
 
-        # Pattern matches: anything_{8 hex chars}.ext
-        auto_export_pattern = re.compile(r'^.+_[0-9a-f]{8}\.(png|dds)$', re.IGNORECASE)
+        self.texture_cache.flush()
 
-        cleaned_count = 0
-        try:
-            for filename in os.listdir(texture_dir):
-                if auto_export_pattern.match(filename):
-                    file_path = os.path.join(texture_dir, filename)
-                    try:
-                        os.remove(file_path)
-                        cleaned_count += 1
-                    except Exception as e:
-                        self.warnings.append(f"Failed to remove old texture '{filename}': {e}")
-
-            if cleaned_count > 0:
-                self.warnings.append(f"Cleaned {cleaned_count} auto-exported texture(s) from previous export")
-        except Exception as e:
-            self.warnings.append(f"Failed to clean content/texture directory: {e}")
+        if self.optimized_count > 0:
+            self.warnings.append(
+                f"Texture optimization: reduced {self.optimized_count} texture(s), "
+                f"saved {self.saved_bytes / 1024:.1f} KB"
+            )
 
     def _collect_texture_nodes(self) -> None:
-        """Collect all ShaderNodeTexImage nodes from scene materials."""
+        """
+        Collect all ShaderNodeTexImage nodes from scene materials.
+
+        Images are deduplicated by the hash of their source bytes, so the same
+        file loaded twice ('asphalt.png', 'asphalt.png.001') or pulled in from
+        several linked libraries is only embedded once.
+        """
         position = 0
         texture_nodes = self._get_all_texture_nodes()
+        canonical_images: dict[str, str] = {}
 
         for texture_node in texture_nodes:
             if texture_node.name.startswith("__"):
@@ -80,38 +116,130 @@ class TextureWriter(KN5Writer):
                 continue
 
             image_name = texture_node.image.name
-            if image_name not in self.available_textures:
+            if image_name in self.texture_aliases:
+                continue
+
+            source_hash = self._get_source_hash(texture_node.image)
+            canonical_name = canonical_images.setdefault(source_hash, image_name)
+            self.texture_aliases[image_name] = canonical_name
+            if canonical_name == image_name:
                 self.available_textures[image_name] = texture_node
                 self.texture_positions[image_name] = position
                 position += 1
 
+        duplicate_count = len(self.texture_aliases) - len(self.available_textures)
+        if duplicate_count > 0:
+            self.warnings.append(f"Merged {duplicate_count} duplicate texture(s) with identical image data")
+
+    def _get_source_hash(self, image) -> str:
+        """
+        Hash the source bytes of an image (packed data or file on disk).
+
+        Falls back to the image name for generated or modified images, which
+        have no source bytes that reflect their current pixels.
+        """
+        source_hash = self.texture_cache.get_source_hash(image)
+        if source_hash is None:
+            return f"name:{image.name}"
+        return source_hash
+
     def _get_all_texture_nodes(self) -> list[ShaderNodeTexImage]:
-        """Get all ShaderNodeTexImage nodes from all mesh materials in scene."""
+        """
+        Get all ShaderNodeTexImage nodes from the materials written to this KN5.
+
+        Only materials reachable from the exported nodes are passed in, so
+        objects outside the exported collection do not pull in textures.
+        """
         texture_nodes = []
-        for obj in self.context.scene.objects:
-            if obj.type != "MESH":
-                continue
-            for slot in obj.material_slots:
-                if slot.material and slot.material.node_tree:
-                    for node in slot.material.node_tree.nodes:
-                        if isinstance(node, bpy.types.ShaderNodeTexImage):
-                            texture_nodes.append(node)
+        for material in self.materials:
+            texture_nodes.extend(analyze_material(material).image_nodes)
         return texture_nodes
 
-    def _write_texture(self, texture_node: ShaderNodeTexImage) -> None:
-        """Write single texture: active flag, name, and image data blob."""
+    def _write_texture(self, texture_node: ShaderNodeTexImage) -> str:
+        """
+        Write single texture: active flag, name, and image data blob.
+
+        Returns: The texture name written to the KN5.
+        """
+        image_data = self._get_image_data(texture_node)
+        image = texture_node.image
+        return self._write_texture_data(image.name, image.file_format, image_data)
+
+    def _write_texture_data(self, name: str, file_format: str, image_data: bytes) -> str:
+        """Export texture data to content/texture and write it to the KN5."""
         is_active = 1
         self.write_int(is_active)
 
-        # Get image data and export to content/texture directory
-        image_data = self._get_image_data(texture_node)
-        texture_filename = self._export_texture_to_content_dir(texture_node.image, image_data)
+        texture_filename = self._export_texture_to_content_dir(name, file_format, image_data)
 
         # Write the actual filename to KN5 (not the Blender image name)
         self.write_string(texture_filename)
         self.write_blob(image_data)
+        return texture_filename
 
     def _get_image_data(self, texture_node: ShaderNodeTexImage) -> bytes:
+        """Get image data as bytes, reusing the texture encoded for another KN5 of the session."""
+        image_name = texture_node.image.name
+        encoded = self.session.textures.get(image_name) if self.session else None
+        if encoded is None:
+            encoded = self._load_image_data(texture_node)
+            if self.session:
+                self.session.textures[image_name] = encoded
+        self._record_savings(encoded.original_size, len(encoded.data))
+        return encoded.data
+
+    def _load_image_data(self, texture_node: ShaderNodeTexImage) -> EncodedTexture:
+        """
+        Encode image data, reusing the encoded blob from the texture cache
+        when the image source has not changed since it was last encoded.
+        """
+        cache_key = self.texture_cache.get_key(texture_node.image, self.optimization)
+        if cache_key:
+            image_data = self.texture_cache.get(cache_key)
+            if image_data is not None:
+                original_size = self.texture_cache.get_original_size(cache_key) or len(image_data)
+                return EncodedTexture(image_data, original_size)
+
+        image_data = self._encode_image(texture_node)
+        original_size = len(image_data)
+        if self.optimization != "OFF":
+            image_data = self._optimize_image(texture_node.image, image_data)
+
+        if cache_key:
+            self.texture_cache.put(cache_key, image_data, original_size)
+        return EncodedTexture(image_data, original_size)
+
+    def _optimize_image(self, image, image_data: bytes) -> bytes:
+        """
+        Shrink texture based on its content.
+
+        Solid-colour textures collapse to a 4x4 PNG (COLLAPSE policy), and PNG
+        textures that are grayscale or fully opaque are re-encoded without
+        the unused channels. Float images and DDS textures are left untouched.
+        """
+        # DDS textures are never re-encoded, the KN5 keeps their format
+        if image.is_float or image_data[:8] != PNG_SIGNATURE:
+            return image_data
+
+        analysis = analyze_image(image, self.texture_cache.get_source_hash(image))
+        if analysis is None:
+            return image_data
+
+        if self.optimization == "COLLAPSE" and analysis.is_solid:
+            optimized = encode_solid_png(analysis)
+        elif analysis.channels < 4:
+            optimized = encode_stripped_png(image, analysis)
+        else:
+            return image_data
+
+        return optimized if len(optimized) < len(image_data) else image_data
+
+    def _record_savings(self, original_size: int, size: int) -> None:
+        if size < original_size:
+            self.optimized_count += 1
+            self.saved_bytes += original_size - size
+
+    def _encode_image(self, texture_node: ShaderNodeTexImage) -> bytes:
         """
         Get image data as bytes, converting to PNG if necessary.
 
@@ -140,34 +268,26 @@ class TextureWriter(KN5Writer):
         image.pack()
         return image.packed_file.data
 
-    def _export_texture_to_content_dir(self, image, image_data: bytes) -> str:
+    def _export_texture_to_content_dir(self, name: str, file_format: str, image_data: bytes) -> str:
         """
         Export texture to content/texture directory.
-        Does not modify scene - only writes file to disk.
-        Uses deterministic naming for safe overwrites.
+        Does not modify scene - only syncs the file on disk.
+        Uses deterministic naming so unchanged textures are not rewritten.
 
         Returns: The filename (not full path) written to content/texture.
         """
-        import os
-        import hashlib
-        from ...utils.files import get_texture_directory
-
-        texture_dir = get_texture_directory()
-        if not os.path.exists(texture_dir):
-            os.makedirs(texture_dir, exist_ok=True)
-
         # Determine file extension from image format or data
         file_ext = ".png"
         if image_data[:3] == DDS_HEADER_BYTES:
             file_ext = ".dds"
-        elif image.file_format == "PNG":
+        elif image_data[:8] == PNG_SIGNATURE or file_format == "PNG":
             file_ext = ".png"
-        elif image.file_format == "DDS":
+        elif file_format == "DDS":
             file_ext = ".dds"
 
         # Create deterministic filename based on image name and data hash
         # This ensures the same texture always produces the same filename
-        base_name = os.path.splitext(image.name)[0]
+        base_name = os.path.splitext(name)[0]
 
         # Sanitize base name (remove invalid chars for filenames)
         base_name = "".join(c for c in base_name if c.isalnum() or c in ('-', '_'))
@@ -175,21 +295,6 @@ class TextureWriter(KN5Writer):
         # Add hash suffix to ensure uniqueness and repeatability
         data_hash = hashlib.md5(image_data).hexdigest()[:8]
         texture_filename = f"{base_name}_{data_hash}{file_ext}"
-        texture_path = os.path.join(texture_dir, texture_filename)
-
-        # Write texture file (safe to overwrite - same data produces same filename)
-        try:
-            file_exists = os.path.exists(texture_path)
-            with open(texture_path, 'wb') as f:
-                f.write(image_data)
-
-            # Report export status
-            size_kb = len(image_data) / 1024
-            if file_exists:
-                self.warnings.append(f"Updated texture in content/texture: '{texture_filename}' ({size_kb:.1f} KB)")
-            else:
-                self.warnings.append(f"Exported texture to content/texture: '{texture_filename}' ({size_kb:.1f} KB)")
-        except Exception as e:
-            self.warnings.append(f"Failed to export texture '{image.name}' to content/texture: {e}")
 
+        self.texture_sync.sync_texture(texture_filename, image_data, self.warnings)
         return texture_filename
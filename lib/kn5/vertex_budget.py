@@ -0,0 +1,125 @@
+"""
+KN5 vertex budget estimation.
+
+Estimates how many vertices each material part of a mesh will have once
+the exporter splits it by material and welds identical corners, without
+building meshes. Corner attributes are read in bulk with foreach_get and
+welded with numpy.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .constants import MAX_VERTICES_PER_MESH
+
+if TYPE_CHECKING:
+    from bpy.types import Depsgraph, Object
+
+# object name -> (mesh fingerprint, budget)
+_budget_cache: dict[str, tuple[tuple, VertexBudget]] = {}
+
+
+class VertexBudget:
+    """Estimated post-weld vertex count of every material part of one mesh."""
+
+    def __init__(self, object_name: str, part_counts: dict[str, int]):
+        self.object_name = object_name
+        # material name (or slot description) -> welded vertex count
+        self.part_counts = part_counts
+
+    @property
+    def total(self) -> int:
+        return sum(self.part_counts.values())
+
+    def get_oversized_parts(self) -> dict[str, tuple[int, int]]:
+        """Parts over the KN5 vertex limit: material -> (vertex count, estimated number of split parts)."""
+        # The exporter starts a new part a few vertices before the limit
+        part_size = MAX_VERTICES_PER_MESH - 3
+        return {
+            material_name: (count, math.ceil(count / part_size))
+            for material_name, count in self.part_counts.items()
+            if count > MAX_VERTICES_PER_MESH
+        }
+
+
+def estimate_vertex_budget(obj: Object, depsgraph: Depsgraph) -> VertexBudget | None:
+    """
+    Estimate the vertex budget of a mesh object with modifiers applied.
+
+    Corners are welded on position, normal and UV like the exporter does;
+    tangents follow from those and are not compared. Results are cached
+    until the evaluated mesh changes.
+    """
+    if obj.type != "MESH":
+        return None
+
+    mesh = obj.evaluated_get(depsgraph).data
+    fingerprint = (mesh.as_pointer(), len(mesh.vertices), len(mesh.loops), len(mesh.polygons))
+    cached = _budget_cache.get(obj.name)
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+
+    budget = VertexBudget(obj.name, _count_welded_vertices(mesh))
+    _budget_cache[obj.name] = (fingerprint, budget)
+    return budget
+
+
+def _count_welded_vertices(mesh) -> dict[str, int]:
+    loop_count = len(mesh.loops)
+    polygon_count = len(mesh.polygons)
+    if loop_count == 0:
+        return {}
+
+    positions = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", positions)
+    vertex_indices = np.empty(loop_count, dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", vertex_indices)
+
+    normals = np.empty(loop_count * 3, dtype=np.float32)
+    if hasattr(mesh, "corner_normals"):
+        mesh.corner_normals.foreach_get("vector", normals)
+    else:
+        # Blender < 4.1 only fills loop normals on request
+        mesh.calc_normals_split()
+        mesh.loops.foreach_get("normal", normals)
+
+    uvs = np.zeros(loop_count * 2, dtype=np.float32)
+    if mesh.uv_layers.active:
+        mesh.uv_layers.active.data.foreach_get("uv", uvs)
+
+    material_indices = np.empty(polygon_count, dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", material_indices)
+    loop_totals = np.empty(polygon_count, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    loop_materials = np.repeat(material_indices, loop_totals)
+
+    corners = np.hstack((
+        positions.reshape(-1, 3)[vertex_indices],
+        normals.reshape(-1, 3),
+        uvs.reshape(-1, 2),
+    ))
+    # -0.0 and 0.0 weld in the exporter but differ bytewise
+    corners = np.ascontiguousarray(corners + 0.0)
+    corner_keys = corners.view(np.dtype((np.void, corners.dtype.itemsize * corners.shape[1]))).ravel()
+
+    part_counts = {}
+    for material_index in np.unique(loop_materials):
+        material = mesh.materials[material_index] if material_index < len(mesh.materials) else None
+        material_name = material.name if material else f"slot {material_index}"
+        if material_name in part_counts:
+            # Every slot becomes its own part, even with the same material
+            material_name = f"{material_name} (slot {material_index})"
+        part_counts[material_name] = len(np.unique(corner_keys[loop_materials == material_index]))
+    return part_counts
+
+
+def invalidate_vertex_budget(object_name: str) -> None:
+    _budget_cache.pop(object_name, None)
+
+
+def clear_vertex_budget_cache() -> None:
+    _budget_cache.clear()
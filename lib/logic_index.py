@@ -0,0 +1,248 @@
+"""
+Index of AC_* logic objects (starts, pitboxes, gates, audio emitters).
+
+Built in one pass over the scene and kept until objects are added, removed
+or renamed, so the AC_Settings getters no longer scan every scene object.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+
+import bpy
+
+if TYPE_CHECKING:
+    from bpy.types import Context, Object, Scene
+
+# category -> name prefix
+LOGIC_PREFIXES = {
+    "starts": "AC_START",
+    "hotlap_starts": "AC_HOTLAP_START",
+    "pitboxes": "AC_PIT",
+    "time_gates": "AC_TIME",
+    "ab_start_gates": "AC_AB_START",
+    "ab_finish_gates": "AC_AB_FINISH",
+    "audio_emitters": "AC_AUDIO",
+}
+
+# category -> object name, formatted with the number (and gate side)
+LOGIC_NAME_FORMATS = {
+    "starts": "AC_START_{}",
+    "hotlap_starts": "AC_HOTLAP_START_{}",
+    "pitboxes": "AC_PIT_{}",
+    "time_gates": "AC_TIME_{}_{}",
+    "audio_emitters": "AC_AUDIO_{}",
+}
+
+# Numbering starts at 0 except for these categories
+LOGIC_FIRST_NUMBERS = {"audio_emitters": 1}
+
+# Categories renumbered by compact_logic_numbers
+COMPACTED_CATEGORIES = ("starts", "hotlap_starts", "time_gates", "pitboxes")
+
+# Trailing number and gate side: AC_PIT_3, AC_TIME_2_L
+LOGIC_NUMBER_REGEX = re.compile(r"_(\d+)(?:_([LR]))?$")
+COPY_NAME_REGEX = re.compile(r".*\.\d+$")
+
+# scene pointer -> index
+_logic_indices: dict[int, LogicIndex] = {}
+
+# Transform updates are numbered; AC_* object name -> number of its last move
+_transform_serial = 0
+_reset_serial = 0
+_moved_objects: dict[str, int] = {}
+
+
+class LogicIndex:
+    """AC_* objects by category, and by number within each category."""
+
+    def __init__(self, scene: Scene):
+        self.object_count = len(scene.objects)
+        self.objects: dict[str, list[Object]] = {category: [] for category in LOGIC_PREFIXES}
+        # category -> (number, side) -> object
+        self.numbered: dict[str, dict[tuple[int, str | None], Object]] = {category: {} for category in LOGIC_PREFIXES}
+        self.names: set[str] = set()
+        self.has_copy_names = False
+        # category -> number below which every slot is taken (see claim_number)
+        self.free_cursors: dict[str, int] = {}
+
+        for obj in scene.objects:
+            if obj.name.startswith("AC_"):
+                self._add(obj)
+
+    def _add(self, obj: Object) -> None:
+        self.names.add(obj.name)
+        if COPY_NAME_REGEX.match(obj.name):
+            self.has_copy_names = True
+        for category, prefix in LOGIC_PREFIXES.items():
+            if obj.name.startswith(prefix):
+                self.objects[category].append(obj)
+                match = LOGIC_NUMBER_REGEX.search(obj.name)
+                if match:
+                    self.numbered[category][(int(match.group(1)), match.group(2))] = obj
+
+    def add_object(self, obj: Object, scene: Scene) -> None:
+        """Index an object created and named inside a running operator, instead of rebuilding."""
+        if obj.name.startswith("AC_"):
+            self._add(obj)
+        self.object_count = len(scene.objects)
+
+    def claim_number(self, category: str, sides: tuple[str | None, ...] = (None,)) -> int:
+        """
+        Get the lowest free number of a category, for every given gate side.
+
+        Numbers are never reused within one index, so claiming slots one
+        after another (and adding each object) is O(1) per object.
+        """
+        used = self.numbered[category]
+        number = self.free_cursors.get(category, LOGIC_FIRST_NUMBERS.get(category, 0))
+        while any(
+            (number, side) in used or format_logic_name(category, number, side) in bpy.data.objects
+            for side in sides
+        ):
+            number += 1
+        self.free_cursors[category] = number + 1
+        return number
+
+    def get_compacted_names(self, category: str) -> list[tuple[Object, str]]:
+        """
+        Target names numbering the category from its first number without gaps.
+
+        Objects keep their relative order by number; unnumbered objects follow
+        in scene order. Gate pairs keep their shared number.
+        """
+        first = LOGIC_FIRST_NUMBERS.get(category, 0)
+        numbered = sorted(self.numbered[category].items(), key=lambda item: (item[0][0], item[0][1] or ""))
+        numbered_objects = {obj.as_pointer() for _key, obj in numbered}
+        unnumbered = [obj for obj in self.objects[category] if obj.as_pointer() not in numbered_objects]
+
+        if category != "time_gates":
+            ordered = [obj for _key, obj in numbered] + unnumbered
+            return [(obj, format_logic_name(category, first + i)) for i, obj in enumerate(ordered)]
+
+        names = []
+        new_numbers: dict[int, int] = {}
+        for (number, side), obj in numbered:
+            if side is None:
+                continue
+            new_number = new_numbers.setdefault(number, first + len(new_numbers))
+            names.append((obj, format_logic_name(category, new_number, side)))
+        # Unnumbered gates are paired up in scene order, like the gate getters do
+        next_number = first + len(new_numbers)
+        for side in ("L", "R"):
+            sided = [obj for obj in unnumbered if obj.name.endswith(f"_{side}")]
+            names.extend((obj, format_logic_name(category, next_number + i, side)) for i, obj in enumerate(sided))
+        return names
+
+    def is_current(self, scene: Scene) -> bool:
+        """Cheap check for objects added or removed without a notification (inside operators)."""
+        return self.object_count == len(scene.objects)
+
+    def is_category_current(self, category: str) -> bool:
+        """Check that no indexed object was renamed out of its category."""
+        prefix = LOGIC_PREFIXES[category]
+        try:
+            return all(obj.name.startswith(prefix) for obj in self.objects[category])
+        except ReferenceError:
+            return False
+
+    def get(self, category: str) -> list[Object]:
+        return list(self.objects[category])
+
+    def get_numbered(self, category: str, number: int, side: str | None = None) -> Object | None:
+        return self.numbered[category].get((number, side))
+
+    def get_gate_pairs(self, category: str = "time_gates") -> list[list[Object]]:
+        """Left/right gates paired by number, in the order of the left gates."""
+        pairs = []
+        for gate in self.objects[category]:
+            match = LOGIC_NUMBER_REGEX.search(gate.name)
+            if not match or match.group(2) != "L":
+                continue
+            right_gate = self.numbered[category].get((int(match.group(1)), "R"))
+            if right_gate:
+                pairs.append([gate, right_gate])
+        return pairs
+
+
+def get_logic_index(context: Context, category: str | None = None) -> LogicIndex:
+    """Get the logic index of the context's scene, rebuilding it if it went stale."""
+    scene = context.scene
+    index = _logic_indices.get(scene.as_pointer())
+    if index is None or not index.is_current(scene) or (category and not index.is_category_current(category)):
+        index = LogicIndex(scene)
+        _logic_indices[scene.as_pointer()] = index
+    return index
+
+
+def invalidate_logic_index(*_args) -> None:
+    _logic_indices.clear()
+
+
+def format_logic_name(category: str, number: int, side: str | None = None) -> str:
+    if side is None:
+        return LOGIC_NAME_FORMATS[category].format(number)
+    return LOGIC_NAME_FORMATS[category].format(number, side)
+
+
+def compact_logic_numbers(context: Context) -> int:
+    """
+    Renumber starts, hotlap starts, time gates and pitboxes without gaps.
+
+    Only objects whose name changes are renamed. They first move to unique
+    temporary names so no final name is ever taken, which would make Blender
+    append a .001 suffix. Returns the number of renamed objects.
+    """
+    logic_index = get_logic_index(context)
+    renames = [
+        (obj, name)
+        for category in COMPACTED_CATEGORIES
+        for obj, name in logic_index.get_compacted_names(category)
+        if obj.name != name
+    ]
+    for i, (obj, _name) in enumerate(renames):
+        obj.name = f"__AC_RENUMBER_{i}"
+    for obj, name in renames:
+        obj.name = name
+    if renames:
+        invalidate_logic_index()
+    return len(renames)
+
+
+def notify_object_updated(obj: Object, moved: bool = False) -> None:
+    """
+    Handle a depsgraph update of an object.
+
+    Invalidates the index if the update reports an AC_* object it does not
+    know, and records moved AC_* objects for get_moved_objects.
+    """
+    global _transform_serial
+    name = obj.name
+    if not name.startswith("AC_"):
+        return
+    if moved:
+        _transform_serial += 1
+        _moved_objects[name] = _transform_serial
+    if any(name not in index.names for index in _logic_indices.values()):
+        invalidate_logic_index()
+
+
+def get_moved_objects(since: int) -> tuple[int, set[str] | None]:
+    """
+    Get the AC_* objects moved after the given serial.
+
+    Returns the current serial, to pass on the next call, and the names of
+    the moved objects, or None if everything must be treated as moved.
+    """
+    if since < _reset_serial:
+        return _transform_serial, None
+    return _transform_serial, {name for name, serial in _moved_objects.items() if serial > since}
+
+
+def reset_moved_objects() -> None:
+    """Treat every object as moved, after undo or loading a file."""
+    global _transform_serial, _reset_serial
+    _transform_serial += 1
+    _reset_serial = _transform_serial
+    _moved_objects.clear()
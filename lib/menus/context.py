@@ -34,11 +34,17 @@ def start_menu(self, context):
     layout.operator("ac.add_start")
     layout.operator("ac.add_hotlap_start")
     layout.operator('ac.add_time_gate')
+    if context.active_object and context.active_object.type == 'CURVE':
+        layout.operator("ac.place_logic_grid", text="Place Starts Along Curve").kind = 'starts'
 
 def pit_menu(self, context):
     layout: UILayout = self.layout
     layout.separator()
     layout.operator("ac.add_pitbox")
+    if any(obj.name.startswith("AC_") for obj in context.selected_objects):
+        layout.operator("ac.snap_to_surface")
+    if context.active_object and context.active_object.type == 'CURVE':
+        layout.operator("ac.place_logic_grid", text="Place Pitboxes Along Curve").kind = 'pitboxes'
 
 class WM_MT_ObjectSetup(Menu):
     bl_label = "Assign Render Mode"
@@ -1,13 +1,41 @@
 import math
+import time
 from os import path
 
-from bpy import ops
+import bpy
+from bpy import data, ops
+from bpy import path as bpy_path
+from bpy.props import BoolProperty, EnumProperty, FloatProperty, IntProperty
 from bpy.types import Context, Operator
+from mathutils import Vector
 
 from ....utils.files import (get_data_directory, get_extension_directory,
                              get_texture_directory, get_ui_directory, load_ini,
                              load_json, save_ini, save_json)
+from ...export_status import (begin_export_status, clear_exported_files,
+                              end_export_status, get_export_status,
+                              record_exported_file)
+from ...logic_index import format_logic_name, get_logic_index
+from ...preflight import get_preflight
+from ...scene_index import (ExportScope, get_exportable_collections,
+                            get_scene_index, is_main_collection)
 from ...settings import AC_Settings
+from ...surface_query import (LOGIC_SURFACE_HEIGHT, find_nearest_surfaces,
+                              find_surfaces_below)
+
+# Seconds between modal export steps, and the time each step may work for
+EXPORT_TIMER_INTERVAL = 0.01
+EXPORT_SLICE_SECONDS = 0.1
+
+# Events passed on to Blender while exporting: the view can be navigated, but
+# nothing may edit the scene the export is reading from
+EXPORT_PASS_THROUGH_EVENTS = {
+    'MOUSEMOVE', 'INBETWEEN_MOUSEMOVE', 'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE',
+    'WHEELINMOUSE', 'WHEELOUTMOUSE', 'TRACKPADPAN', 'TRACKPADZOOM', 'MOUSEROTATE',
+    'MOUSESMARTZOOM', 'NDOF_MOTION', 'WINDOW_DEACTIVATE',
+    'NUMPAD_0', 'NUMPAD_1', 'NUMPAD_2', 'NUMPAD_3', 'NUMPAD_4', 'NUMPAD_5', 'NUMPAD_6',
+    'NUMPAD_7', 'NUMPAD_8', 'NUMPAD_9', 'NUMPAD_PERIOD', 'NUMPAD_PLUS', 'NUMPAD_MINUS',
+}
 
 
 class AC_SaveSettings(Operator):
@@ -105,18 +133,91 @@ class AC_LoadSettings(Operator):
         return {'FINISHED'}
 
 class AC_ExportTrack(Operator):
-    """Export track in selected format(s)"""
+    """Export track in selected format(s). Press Esc to cancel a running export"""
     bl_idname = "ac.export_track"
     bl_label = "Export Track"
     bl_options = {'REGISTER'}
+
+    @classmethod
+    def poll(cls, context):
+        return get_export_status() is None
+
     def execute(self, context):
-        ops.ac.save_settings()
+        return _run_steps(self._iter_export(context))
+
+    def invoke(self, context, event):
+        """Export from a timer so the UI stays responsive, with progress and cancellation."""
+        # The context passed here is only valid during invoke, the steps run on later events
+        self._steps = self._iter_export(bpy.context)
+        self._status = begin_export_status()
+        window_manager = context.window_manager
+        self._timer = window_manager.event_timer_add(EXPORT_TIMER_INTERVAL, window=context.window)
+        window_manager.modal_handler_add(self)
+        window_manager.progress_begin(0, 100)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC' and event.value == 'PRESS':
+            # Closing the steps stops the KN5 writer, which removes the partial file
+            self._steps.close()
+            self._finish_modal(context)
+            self.report({'WARNING'}, f"Export cancelled, {self._status.filename} was not written")
+            return {'CANCELLED'}
+        if event.type == 'TIMER' and event.timer == self._timer:
+            return self._run_slice(context)
+        if event.type in EXPORT_PASS_THROUGH_EVENTS or event.type.startswith('TIMER'):
+            return {'PASS_THROUGH'}
+        # The export holds objects, materials and images: block edits and undo
+        return {'RUNNING_MODAL'}
+
+    def _run_slice(self, context):
+        """Advance the export for one time slice, or until it waits on something else."""
+        deadline = time.perf_counter() + EXPORT_SLICE_SECONDS
+        try:
+            while time.perf_counter() < deadline:
+                progress = next(self._steps)
+                if progress is None:
+                    break
+                self._status.update(progress.stage, progress.done, progress.total)
+        except StopIteration as finished:
+            self._finish_modal(context)
+            return finished.value
+        except Exception:
+            self._steps.close()
+            self._finish_modal(context)
+            raise
+
+        context.window_manager.progress_update(int(self._status.get_fraction() * 100))
+        context.workspace.status_text_set(self._status.get_text())
+        _redraw_sidebars(context)
+        return {'RUNNING_MODAL'}
+
+    def _finish_modal(self, context):
+        window_manager = context.window_manager
+        window_manager.event_timer_remove(self._timer)
+        window_manager.progress_end()
+        context.workspace.status_text_set(None)
+        end_export_status()
+        _redraw_sidebars(context)
+
+    def _iter_export(self, context):
+        """
+        Export every collection, yielding after each unit of work.
+
+        Yields KN5 ExportProgress, or None to hand the UI a turn (after each
+        FBX file, or while background workers run), and returns the operator
+        result.
+        """
         settings: AC_Settings = context.scene.AC_Settings # type: ignore
+        clear_exported_files()
+        # Numbers are only compacted here and in autofix, never when adding objects
+        settings.consolidate_logic_gates(context)
+        ops.ac.save_settings()
         exp_opts = settings.export_settings
         track_name = settings.working_dir.rstrip(path.sep).split(path.sep)[-1]
 
         # Get exportable collections
-        collections = self._get_exportable_collections(context)
+        collections = get_exportable_collections(context.blend_data.collections)
 
         if not collections:
             self.report({'ERROR'}, "No exportable collections found")
@@ -124,32 +225,57 @@ class AC_ExportTrack(Operator):
 
         export_count = 0
         failed_exports = []
-
-        for collection in collections:
-            # Determine filename
-            # Use track name for single collection or for "default" collection
-            if len(collections) == 1 or collection.name == "default":
-                filename = track_name
-            else:
-                filename = collection.name
-
-            # Temporarily hide other collections
-            original_visibility = self._hide_other_collections(context, collection)
-
-            try:
+        texture_sync = None
+        if exp_opts.use_kn5:
+            from ...kn5.texture_sync import TextureSync
+            texture_sync = TextureSync()
+
+        if texture_sync and exp_opts.export_workers > 1 and len(collections) > 1:
+            results = yield from self._export_kn5_parallel(settings, collections, track_name, texture_sync)
+            for filename, result in results:
+                record_exported_file(result["filepath"], "kn5", result["status"], result["seconds"], result["warnings"])
+                if self._report_kn5_result(filename, result):
+                    export_count += 1
+                else:
+                    failed_exports.append(filename)
+        else:
+            session = None
+            if exp_opts.use_kn5:
+                from ...kn5 import ExportSession
+
+                # One evaluation and extraction for every collection
+                session = ExportSession(context)
+            for index, collection in enumerate(collections):
+                filename = self._get_filename(collection, collections, track_name)
+                status = get_export_status()
+                if status:
+                    status.start_file(filename, index, len(collections))
+
+                # Export by membership, visibility never changes during export
                 if exp_opts.use_kn5:
-                    success = self._export_kn5(context, settings, filename, collection)
+                    # Objects outside every collection go into the main KN5 only
+                    extra_objects = ()
+                    if is_main_collection(collection, collections):
+                        extra_objects = get_scene_index(context).unassigned_roots
+                    scope = ExportScope(collection, extra_objects)
+                    success = yield from self._export_kn5(context, settings, filename, scope, texture_sync, session)
                 else:
-                    success = self._export_fbx(context, settings, exp_opts, filename)
+                    # Every FBX gets the scene collection's objects, as when other collections were hidden
+                    scope = ExportScope(collection, context.scene.collection.objects)
+                    success = self._export_fbx(context, settings, exp_opts, filename, scope)
+                    yield None
 
                 if success:
                     export_count += 1
                 else:
                     failed_exports.append(filename)
 
-            finally:
-                # Restore collection visibility
-                self._restore_collection_visibility(original_visibility)
+        # Remove textures no longer used by any KN5, only once every export succeeded
+        if texture_sync and not failed_exports:
+            sync_warnings = []
+            texture_sync.finalize(sync_warnings)
+            for warning in sync_warnings:
+                self.report({'INFO'}, warning)
 
         # Report results
         if failed_exports:
@@ -160,49 +286,50 @@ class AC_ExportTrack(Operator):
 
         return {'FINISHED'}
 
-    def _get_exportable_collections(self, context) -> list:
-        """Get non-hidden, non-excluded collections with objects."""
-        collections = []
-        for collection in context.blend_data.collections:
-            # Skip if collection is hidden or excluded
-            if collection.hide_viewport or collection.hide_render:
-                continue
-            # Skip if collection name starts with __
-            if collection.name.startswith("__"):
-                continue
-            # Skip if collection has no objects
-            if not collection.objects:
-                continue
-            collections.append(collection)
-        return collections
-
-    def _hide_other_collections(self, context, active_collection) -> dict:
-        """Hide all collections except the active one. Returns original visibility state."""
-        original_visibility = {}
-        for collection in context.blend_data.collections:
-            original_visibility[collection.name] = collection.hide_viewport
-            if collection != active_collection:
-                collection.hide_viewport = True
-        return original_visibility
-
-    def _restore_collection_visibility(self, original_visibility: dict):
-        """Restore collection visibility to original state."""
-        import bpy
-        for collection_name, was_hidden in original_visibility.items():
-            if collection_name in bpy.data.collections:
-                bpy.data.collections[collection_name].hide_viewport = was_hidden
-
-    def _export_kn5(self, context, settings, filename: str, collection) -> bool:
-        """Export single collection to KN5."""
+    def _get_filename(self, collection, collections: list, track_name: str) -> str:
+        # Use track name for single collection or for "default" collection
+        if is_main_collection(collection, collections):
+            return track_name
+        return collection.name
+
+    def _export_kn5(self, context, settings, filename: str, scope: ExportScope, texture_sync, session):
+        """Export single collection to KN5, yielding progress. Returns whether it succeeded."""
         try:
-            from ...kn5 import export_kn5
+            from ...kn5 import iter_export_kn5
         except ImportError as e:
             self.report({'ERROR'}, f"KN5 export module not available: {e}")
             return False
 
         filepath = settings.working_dir + filename + '.kn5'
-        result = export_kn5(filepath, context)
-
+        started = time.perf_counter()
+        result = yield from iter_export_kn5(filepath, context, texture_sync, scope, session)
+        record_exported_file(filepath, "kn5", result["status"], time.perf_counter() - started, result["warnings"])
+        return self._report_kn5_result(filename, result)
+
+    def _export_kn5_parallel(self, settings, collections: list, track_name: str, texture_sync):
+        """Export the collections to KN5 in background workers, yielding progress. Returns (filename, result) pairs."""
+        from ...export_workers import ExportJob, iter_parallel_export
+
+        status = get_export_status()
+        if status:
+            status.start_file(track_name, 0, 1)
+        filenames = {}
+        jobs = []
+        for collection in collections:
+            filename = self._get_filename(collection, collections, track_name)
+            filepath = path.abspath(bpy_path.abspath(settings.working_dir + filename + '.kn5'))
+            filenames[filepath] = filename
+            # Workers export the collection's own objects (see ExportScope)
+            jobs.append(ExportJob(
+                collection.name, filepath, len(collection.objects), is_main_collection(collection, collections)
+            ))
+
+        working_dir = path.abspath(bpy_path.abspath(settings.working_dir))
+        results = yield from iter_parallel_export(jobs, settings.export_settings.export_workers, working_dir, texture_sync)
+        return [(filenames[result["filepath"]], result) for result in results]
+
+    def _report_kn5_result(self, filename: str, result: dict) -> bool:
+        """Report the outcome of one KN5 export. Returns whether it succeeded."""
         if result["status"] == "success":
             if result["warnings"]:
                 warning_msg = f"Exported {filename}.kn5 with warnings:\n" + "\n".join(
@@ -215,12 +342,27 @@ class AC_ExportTrack(Operator):
             self.report({'ERROR'}, error_msg)
             return False
 
-    def _export_fbx(self, context, settings, exp_opts, filename: str) -> bool:
-        """Export single collection to FBX."""
+    def _export_fbx(self, context, settings, exp_opts, filename: str, scope: ExportScope) -> bool:
+        """
+        Export single collection to FBX, by selecting its objects.
+
+        Unlike the KN5, the FBX keeps every object of the scope: the name
+        rules of the KN5 exporter (__, collider, _profile, ...) do not apply.
+        """
+        filepath = settings.working_dir + filename + '.fbx'
+        started = time.perf_counter()
+        view_layer = context.view_layer
+        selected = list(context.selected_objects)
+        active = view_layer.objects.active
         try:
-            filepath = settings.working_dir + filename + '.fbx'
+            for obj in selected:
+                obj.select_set(False)
+            for obj in view_layer.objects:
+                if obj in scope:
+                    obj.select_set(True)
             ops.export_scene.fbx(
                 filepath=filepath,
+                use_selection=True,
                 object_types={'EMPTY','MESH'},
                 global_scale=exp_opts.scale,
                 apply_unit_scale=exp_opts.unit_scale,
@@ -230,10 +372,37 @@ class AC_ExportTrack(Operator):
                 axis_up=exp_opts.up,
                 axis_forward=exp_opts.forward,
             )
+            record_exported_file(filepath, "fbx", "success", time.perf_counter() - started, [])
             return True
         except Exception as e:
+            record_exported_file(filepath, "fbx", "error", time.perf_counter() - started, [str(e)])
             self.report({'ERROR'}, f"FBX export failed for {filename}: {e}")
             return False
+        finally:
+            for obj in context.selected_objects:
+                obj.select_set(False)
+            for obj in selected:
+                obj.select_set(True)
+            view_layer.objects.active = active
+
+def _run_steps(steps):
+    """Run an export generator to the end and return its result."""
+    while True:
+        try:
+            progress = next(steps)
+        except StopIteration as finished:
+            return finished.value
+        if progress is None:
+            # Waiting, possibly on background workers: don't spin
+            time.sleep(EXPORT_TIMER_INTERVAL)
+
+
+def _redraw_sidebars(context):
+    for window in context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
 
 class AC_AutofixPreflight(Operator):
     """Attempt to fix common issues"""
@@ -258,6 +427,7 @@ class AC_AutofixPreflight(Operator):
             for warning in warnings:
                 self.report({'INFO'}, warning)
 
+        get_preflight().mark_dirty()
         return {'FINISHED'}
 
 class AC_AddStart(Operator):
@@ -266,14 +436,14 @@ class AC_AddStart(Operator):
     bl_label = "Add Start"
     bl_options = {'REGISTER'}
     def execute(self, context: Context):
+        logic_index = get_logic_index(context)
+        number = logic_index.claim_number("starts")
         ops.object.empty_add(type='SINGLE_ARROW', scale=(2, 2, 2), rotation=(math.pi * -0.5, math.pi, 0), align='CURSOR')
-        settings = context.scene.AC_Settings # type: ignore
-        settings.consolidate_logic_gates(context)
         start_pos = context.object
         if not start_pos:
             return {'CANCELLED'}
-        # get next start position
-        start_pos.name = f"AC_START_{len(settings.get_starts(context))}"
+        start_pos.name = format_logic_name("starts", number)
+        logic_index.add_object(start_pos, context.scene)
         return {'FINISHED'}
 
 class AC_AddHotlapStart(Operator):
@@ -282,13 +452,14 @@ class AC_AddHotlapStart(Operator):
     bl_label = "Add Hotlap Start"
     bl_options = {'REGISTER'}
     def execute(self, context: Context):
+        logic_index = get_logic_index(context)
+        number = logic_index.claim_number("hotlap_starts")
         ops.object.empty_add(type='SINGLE_ARROW', scale=(2, 2, 2), rotation=(math.pi * -0.5, math.pi, 0), align='CURSOR')
-        settings = context.scene.AC_Settings # type: ignore
-        settings.consolidate_logic_gates(context)
         start_pos = context.object
         if not start_pos:
             return {'CANCELLED'}
-        start_pos.name = f"AC_HOTLAP_START_{len(settings.get_hotlap_starts(context))}"
+        start_pos.name = format_logic_name("hotlap_starts", number)
+        logic_index.add_object(start_pos, context.scene)
         return {'FINISHED'}
 
 class AC_AddPitbox(Operator):
@@ -297,13 +468,14 @@ class AC_AddPitbox(Operator):
     bl_label = "Add Pitbox"
     bl_options = {'REGISTER'}
     def execute(self, context: Context):
+        logic_index = get_logic_index(context)
+        number = logic_index.claim_number("pitboxes")
         ops.object.empty_add(type='SINGLE_ARROW', scale=(2, 2, 2), rotation=(math.pi * -0.5, math.pi, 0), align='CURSOR')
-        settings = context.scene.AC_Settings # type: ignore
-        settings.consolidate_logic_gates(context)
         pitbox = context.object
         if not pitbox:
             return {'CANCELLED'}
-        pitbox.name = f"AC_PIT_{len(settings.get_pitboxes(context))}"
+        pitbox.name = format_logic_name("pitboxes", number)
+        logic_index.add_object(pitbox, context.scene)
         return {'FINISHED'}
 
 class AC_AddTimeGate(Operator):
@@ -312,14 +484,14 @@ class AC_AddTimeGate(Operator):
     bl_label = "Add Time Gate"
     bl_options = {'REGISTER'}
     def execute(self, context: Context):
-        settings = context.scene.AC_Settings # type: ignore
-        settings.consolidate_logic_gates(context)
-        count = len(settings.get_time_gates(context)) // 2
+        logic_index = get_logic_index(context)
+        number = logic_index.claim_number("time_gates", ("L", "R"))
         ops.object.empty_add(type='CUBE', scale=(2, 2, 2), rotation=(0, 0, 0), location=(-10, 0, 0), align='CURSOR')
         time_gate_L = context.object
         if not time_gate_L:
             return {'CANCELLED'}
-        time_gate_L.name = f"AC_TIME_{count}_L"
+        time_gate_L.name = format_logic_name("time_gates", number, "L")
+        logic_index.add_object(time_gate_L, context.scene)
         ops.object.empty_add(type='CUBE', scale=(2, 2, 2), rotation=(0, 0, 0), location=(10, 0, 0), align='CURSOR')
         time_gate_R = context.object
         if not time_gate_R:
@@ -328,7 +500,8 @@ class AC_AddTimeGate(Operator):
             time_gate_L.select_set(True)
             ops.object.delete()
             return {'CANCELLED'}
-        time_gate_R.name = f"AC_TIME_{count}_R"
+        time_gate_R.name = format_logic_name("time_gates", number, "R")
+        logic_index.add_object(time_gate_R, context.scene)
         return {'FINISHED'}
 
 class AC_AddABStartGate(Operator):
@@ -381,11 +554,203 @@ class AC_AddAudioEmitter(Operator):
     bl_label = "Add Audio Emitter"
     bl_options = {'REGISTER'}
     def execute(self, context: Context):
-        settings = context.scene.AC_Settings # type: ignore
-        settings.consolidate_logic_gates(context)
+        logic_index = get_logic_index(context)
+        number = logic_index.claim_number("audio_emitters")
         ops.object.empty_add(type='SPHERE', scale=(2, 2, 2), rotation=(0, 0, 0), align='CURSOR')
         audio_emitter = context.object
         if not audio_emitter:
             return {'CANCELLED'}
-        audio_emitter.name = f"AC_AUDIO_{len(settings.get_audio_emitters(context)) + 1}"
+        audio_emitter.name = format_logic_name("audio_emitters", number)
+        logic_index.add_object(audio_emitter, context.scene)
+        return {'FINISHED'}
+
+class AC_PlaceLogicGrid(Operator):
+    """Place a row of starts or pitboxes along the active curve"""
+    bl_idname = "ac.place_logic_grid"
+    bl_label = "Place Grid Along Curve"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    kind: EnumProperty(
+        name="Type",
+        items=[
+            ('starts', "Starts", "Start positions"),
+            ('pitboxes', "Pitboxes", "Pitboxes"),
+        ],
+        default='starts',
+    ) # type: ignore
+    count: IntProperty(
+        name="Count",
+        description="Number of objects to place",
+        default=20,
+        min=1,
+        soft_max=100,
+    ) # type: ignore
+    spacing: FloatProperty(
+        name="Spacing",
+        description="Distance between consecutive slots along the path",
+        default=8.0,
+        min=0.1,
+        subtype='DISTANCE',
+    ) # type: ignore
+    stagger: FloatProperty(
+        name="Stagger",
+        description="Sideways distance between alternating slots (0 for a single file)",
+        default=0.0,
+        min=0.0,
+        subtype='DISTANCE',
+    ) # type: ignore
+    start_offset: FloatProperty(
+        name="Start Offset",
+        description="Distance along the path to the first slot",
+        default=0.0,
+        min=0.0,
+        subtype='DISTANCE',
+    ) # type: ignore
+    reverse: BoolProperty(
+        name="Reverse",
+        description="Walk the path from its end and face the other way",
+        default=False,
+    ) # type: ignore
+    snap_to_surface: BoolProperty(
+        name="Snap to Surface",
+        description="Drop each object onto the track surface below the path",
+        default=True,
+    ) # type: ignore
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None and context.active_object.type in ('CURVE', 'MESH')
+
+    def execute(self, context: Context):
+        points = get_path_points(context.active_object, context.evaluated_depsgraph_get())
+        if len(points) < 2:
+            self.report({'ERROR'}, "The active object has no path to place along")
+            return {'CANCELLED'}
+        if self.reverse:
+            points.reverse()
+
+        slots = []
+        for i in range(self.count):
+            location, direction = sample_path(points, self.start_offset + i * self.spacing)
+            # Alternate left and right of the path
+            side = Vector((direction.y, -direction.x, 0)).normalized()
+            if self.stagger:
+                location = location + side * (self.stagger * (0.5 if i % 2 else -0.5))
+            slots.append((location, direction))
+
+        if self.snap_to_surface:
+            hits = find_surfaces_below(context, [location for location, _direction in slots], get_track_surface_keys(context))
+            slots = [
+                (hit.location + Vector((0, 0, LOGIC_SURFACE_HEIGHT)) if hit else location, direction)
+                for (location, direction), hit in zip(slots, hits)
+            ]
+
+        logic_index = get_logic_index(context)
+        collection = context.collection
+        for location, direction in slots:
+            number = logic_index.claim_number(self.kind)
+            obj = data.objects.new(format_logic_name(self.kind, number), None)
+            obj.empty_display_type = 'SINGLE_ARROW'
+            obj.scale = (2, 2, 2)
+            obj.location = location
+            # Same base rotation as the single add operators, turned to face along the path
+            heading = math.atan2(direction.y, direction.x) - math.pi * 0.5
+            obj.rotation_euler = (math.pi * -0.5, math.pi, heading)
+            collection.objects.link(obj)
+            logic_index.add_object(obj, context.scene)
+
+        self.report({'INFO'}, f"Placed {self.count} {self.kind}")
         return {'FINISHED'}
+
+
+def get_path_points(obj, depsgraph) -> list[Vector]:
+    """World space points of a curve, or of a mesh made of one chain of edges, in path order."""
+    evaluated = obj.evaluated_get(depsgraph)
+    mesh = evaluated.to_mesh()
+    try:
+        neighbours: dict[int, list[int]] = {}
+        for edge in mesh.edges:
+            a, b = edge.vertices
+            neighbours.setdefault(a, []).append(b)
+            neighbours.setdefault(b, []).append(a)
+        if not neighbours:
+            return []
+        # Open paths start at an end, closed ones anywhere
+        current = next((index for index, linked in neighbours.items() if len(linked) == 1), next(iter(neighbours)))
+        order = [current]
+        visited = {current}
+        while True:
+            current = next((index for index in neighbours[current] if index not in visited), None)
+            if current is None:
+                break
+            order.append(current)
+            visited.add(current)
+        matrix = obj.matrix_world
+        return [matrix @ mesh.vertices[index].co for index in order]
+    finally:
+        evaluated.to_mesh_clear()
+
+
+def sample_path(points: list[Vector], distance: float) -> tuple[Vector, Vector]:
+    """Position and unit direction at a distance along a polyline, clamped to its end."""
+    for i in range(len(points) - 1):
+        start = points[i]
+        segment = points[i + 1] - start
+        length = segment.length
+        if length == 0:
+            continue
+        if distance <= length:
+            return start + segment * (distance / length), segment / length
+        distance -= length
+    # Past the end: continue in the direction of the last segment
+    segment = points[-1] - points[-2]
+    direction = segment.normalized() if segment.length else Vector((0, 1, 0))
+    return points[-1] + direction * distance, direction
+
+
+class AC_SnapToSurface(Operator):
+    """Move the selected track objects (starts, pitboxes, gates, audio) onto the track surface"""
+    bl_idname = "ac.snap_to_surface"
+    bl_label = "Snap to Surface"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    height: FloatProperty(
+        name="Height",
+        description="Height of the object origin above the surface",
+        default=LOGIC_SURFACE_HEIGHT,
+        subtype='DISTANCE',
+    ) # type: ignore
+
+    @classmethod
+    def poll(cls, context):
+        return any(obj.name.startswith("AC_") for obj in context.selected_objects)
+
+    def execute(self, context: Context):
+        objects = [obj for obj in context.selected_objects if obj.name.startswith("AC_")]
+        keys = get_track_surface_keys(context)
+        points = [obj.matrix_world.translation.copy() for obj in objects]
+        hits = find_surfaces_below(context, points, keys)
+        # Objects below the surface, or beside it, go to the nearest point instead
+        missing = [i for i, hit in enumerate(hits) if hit is None]
+        for i, hit in zip(missing, find_nearest_surfaces(context, [points[i] for i in missing], keys)):
+            hits[i] = hit
+
+        snapped = 0
+        for obj, hit in zip(objects, hits):
+            if hit is None:
+                continue
+            matrix = obj.matrix_world.copy()
+            matrix.translation = hit.location + Vector((0, 0, self.height))
+            obj.matrix_world = matrix
+            snapped += 1
+        if not snapped:
+            self.report({'WARNING'}, "No track surface found to snap to")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Snapped {snapped} of {len(objects)} object(s)")
+        return {'FINISHED'}
+
+
+def get_track_surface_keys(context: Context) -> tuple[str, ...]:
+    """Surface keys objects can be placed on (everything but walls)."""
+    settings: AC_Settings = context.scene.AC_Settings # type: ignore
+    return tuple(key for key in settings.get_surface_groups(context) if key != "WALL")
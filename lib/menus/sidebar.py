@@ -2,6 +2,8 @@ import bpy
 from bpy.types import Context, Panel, UILayout, UIList
 
 from ..configs.audio_source import AC_AudioSource
+from ..export_status import get_export_status
+from ..preflight import get_preflight
 from ..settings import AC_Settings
 
 
@@ -104,7 +106,7 @@ class VIEW3D_PT_AC_Sidebar_Project(VIEW3D_PT_AC_Sidebar, Panel):
             row.label(text="Please set a working directory")
 
         col.separator(factor=1.5)
-        errors = settings.run_preflight(context)
+        errors = get_preflight().get_errors(context)
         can_fix = len([error for error in errors if error["severity"] == 1]) > 0
 
         # Preflight checks header
@@ -183,13 +185,24 @@ class VIEW3D_PT_AC_Sidebar_Project(VIEW3D_PT_AC_Sidebar, Panel):
                 settings_box.prop(opts, "bake_procedural_textures")
                 if opts.bake_procedural_textures:
                     settings_box.prop(opts, "texture_bake_resolution")
+                settings_box.prop(opts, "texture_optimization")
+                settings_box.prop(opts, "use_texture_atlas")
+                if opts.use_texture_atlas:
+                    settings_box.prop(opts, "atlas_max_tile_size")
+                settings_box.prop(opts, "merge_duplicate_materials")
+                settings_box.prop(opts, "export_workers")
 
         # Export button outside box
         col.separator(factor=0.5)
+        export_status = get_export_status()
+        if export_status:
+            status_box = col.box()
+            status_box.label(text=export_status.get_text(), icon="TIME")
+            status_box.label(text="Press Esc to cancel")
         export_row = col.row()
         # Only block export on severity 1 (fixable) and 2 (critical) errors, not severity 0 (warnings)
         blocking_errors = [e for e in errors if e["severity"] >= 1]
-        export_row.enabled = len(blocking_errors) == 0 and can_save_or_export
+        export_row.enabled = len(blocking_errors) == 0 and can_save_or_export and not export_status
         export_text = f"Export Track to {'KN5' if opts.use_kn5 else 'FBX'}"
         export_row.operator("ac.export_track", text=export_text, icon="EXPORT")
 
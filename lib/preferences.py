@@ -1,11 +1,22 @@
 # type: ignore
-from bpy.props import BoolProperty, FloatVectorProperty
+from bpy.props import BoolProperty, EnumProperty, FloatVectorProperty, IntProperty
 from bpy.types import AddonPreferences
 
 
 class AC_Preferences(AddonPreferences):
     bl_idname = __package__.split('.')[0]
 
+    marker_renderer: EnumProperty(
+        name="Marker Display",
+        description="How pitboxes, start positions and gates are drawn in the viewport",
+        items=[
+            ('GIZMO', "Gizmos", "One gizmo per marker, with hover highlight"),
+            ('OVERLAY', "Overlay", "One batched draw per marker type, faster with many markers"),
+        ],
+        default='GIZMO',
+        update=lambda s, c: s.refresh_gizmos(c),
+    )
+
     show_start: BoolProperty(
         name="Show Start",
         default=True,
@@ -96,6 +107,14 @@ class AC_Preferences(AddonPreferences):
         update=lambda s, c: s.refresh_gizmos(c),
     )
 
+    texture_cache_size: IntProperty(
+        name="Texture Cache Size (MB)",
+        description="Disk space used to keep encoded KN5 textures between exports (0 disables the cache)",
+        default=1024,
+        min=0,
+        soft_max=8192,
+    )
+
     # lazy refresh method to force redrawing gizmos
     def refresh_gizmos(self, context):
         obj = context.scene.objects[0]
@@ -106,6 +125,7 @@ class AC_Preferences(AddonPreferences):
 
         box = layout.box()
         box.label(text="Track Node Colors")
+        box.prop(self, "marker_renderer")
         row = box.split(factor=0.3)
         row.prop(self, "show_start", toggle=True)
         if self.show_start:
@@ -147,3 +167,7 @@ class AC_Preferences(AddonPreferences):
             row.prop(self, "pitbox_color", icon_only=True)
         else:
             row.label(text="disabled")
+
+        box = layout.box()
+        box.label(text="KN5 Export")
+        box.prop(self, "texture_cache_size")
@@ -0,0 +1,151 @@
+"""
+Cached, event-driven preflight checks.
+
+The sidebar used to run every preflight check on each redraw. Checks are now
+grouped into categories whose results are cached. Depsgraph updates mark the
+affected categories dirty, and a timer recomputes only those. Map file checks
+rerun when the modification time of the track or ui directory changes.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+import bpy
+
+if TYPE_CHECKING:
+    from bpy.types import Context
+
+# Result order matches the order the checks are listed in the sidebar
+PREFLIGHT_CATEGORIES = ("project", "logic", "units", "kn5", "files")
+
+# Seconds between timer runs
+PREFLIGHT_INTERVAL = 0.5
+
+# Datablocks that only affect the KN5 checks
+KN5_TYPES = (bpy.types.Material, bpy.types.NodeTree, bpy.types.Image, bpy.types.Mesh, bpy.types.Collection)
+
+
+class PreflightCache:
+    """Preflight results per category, recomputed only when marked dirty."""
+
+    def __init__(self):
+        self.results: dict[str, list[dict]] = {}
+        self.dirty: set[str] = set(PREFLIGHT_CATEGORIES)
+        self.scene_pointer: int | None = None
+        self.file_stamp: tuple | None = None
+
+    def mark_dirty(self, *categories: str) -> None:
+        self.dirty.update(categories or PREFLIGHT_CATEGORIES)
+
+    def get_errors(self, context: Context) -> list[dict]:
+        """
+        Get the cached preflight errors.
+
+        Only the first call computes anything, later results are kept
+        current by the timer.
+        """
+        if not self.results or context.scene.as_pointer() != self.scene_pointer:
+            return self.update(context, force=True)
+        return self._combine()
+
+    def update(self, context: Context, force: bool = False) -> list[dict]:
+        """Rerun the dirty categories (or all of them) and return all errors."""
+        settings = context.scene.AC_Settings
+        if force or context.scene.as_pointer() != self.scene_pointer:
+            self.dirty.update(PREFLIGHT_CATEGORIES)
+        self.scene_pointer = context.scene.as_pointer()
+
+        for category in PREFLIGHT_CATEGORIES:
+            if category in self.dirty:
+                self.results[category] = settings.run_preflight_category(context, category)
+        self.dirty.clear()
+        self.file_stamp = _get_file_stamp(settings)
+
+        errors = self._combine()
+        settings.error.clear()
+        settings.error.extend(errors)
+        return errors
+
+    def check_files(self, context: Context) -> None:
+        """Mark the file checks dirty if the track or ui directory changed."""
+        if _get_file_stamp(context.scene.AC_Settings) != self.file_stamp:
+            self.dirty.add("files")
+
+    def on_depsgraph_update(self, depsgraph) -> None:
+        """Mark the categories affected by changed datablocks dirty."""
+        for update in depsgraph.updates:
+            updated_id = update.id
+            if isinstance(updated_id, bpy.types.Object):
+                # Moving objects changes neither names nor materials, only placement on surfaces
+                if update.is_updated_geometry or update.is_updated_shading or not update.is_updated_transform:
+                    self.dirty.update(("logic", "kn5"))
+                else:
+                    self.dirty.add("logic")
+            elif isinstance(updated_id, KN5_TYPES):
+                self.dirty.add("kn5")
+            elif isinstance(updated_id, bpy.types.Scene):
+                # Add-on settings and unit settings live on the scene
+                self.dirty.update(("project", "logic", "units", "kn5", "files"))
+
+    def _combine(self) -> list[dict]:
+        errors = []
+        for category in PREFLIGHT_CATEGORIES:
+            errors.extend(self.results.get(category, []))
+        return errors
+
+
+def _get_file_stamp(settings) -> tuple:
+    """Working directory plus modification times of the directories holding the map files."""
+    if not settings.working_dir:
+        return (None,)
+    working_dir = bpy.path.abspath(settings.working_dir)
+    stamp = [working_dir]
+    for directory in (working_dir, os.path.join(working_dir, "ui")):
+        try:
+            stamp.append(os.stat(directory).st_mtime_ns)
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+_preflight: PreflightCache | None = None
+
+
+def get_preflight() -> PreflightCache:
+    global _preflight
+    if _preflight is None:
+        _preflight = PreflightCache()
+    return _preflight
+
+
+def _preflight_timer():
+    """Recompute dirty preflight categories and redraw the sidebar if anything ran."""
+    preflight = get_preflight()
+    context = bpy.context
+    scene = getattr(context, "scene", None)
+    # Nothing to keep current until the sidebar asked for results once
+    if scene is None or not preflight.results:
+        return PREFLIGHT_INTERVAL
+
+    preflight.check_files(context)
+    if preflight.dirty:
+        preflight.update(context)
+        for window in context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type == 'VIEW_3D':
+                    area.tag_redraw()
+    return PREFLIGHT_INTERVAL
+
+
+def register():
+    if not bpy.app.timers.is_registered(_preflight_timer):
+        bpy.app.timers.register(_preflight_timer, first_interval=PREFLIGHT_INTERVAL, persistent=True)
+
+
+def unregister():
+    global _preflight
+    if bpy.app.timers.is_registered(_preflight_timer):
+        bpy.app.timers.unregister(_preflight_timer)
+    _preflight = None
@@ -0,0 +1,168 @@
+"""
+Single-pass index of the scene objects used by export and preflight.
+
+Every consumer used to walk context.scene.objects with its own copy of the
+visibility and naming rules. The index applies the rules once, in one
+traversal, and is rebuilt lazily after the scene changes.
+
+An index can be limited to an ExportScope, the objects one collection
+contributes to its KN5, so collections are exported by membership instead
+of by hiding every other collection.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .kn5.material_analysis import analyze_material
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from bpy.types import Collection, Context, Image, Material, Object, Scene
+
+MESH_TYPES = ("MESH", "CURVE", "SURFACE")
+
+# (scene pointer, scope name) -> index
+_scene_indices: dict[tuple[int, str | None], SceneIndex] = {}
+
+
+def is_object_hidden(obj: Object) -> bool:
+    """
+    Check if object is in any hidden or excluded collection.
+
+    Same rule as the collections the exporter skips: hidden in the viewport
+    or in renders, or prefixed with __.
+    """
+    for collection in obj.users_collection:
+        if collection.hide_viewport or collection.hide_render or collection.name.startswith("__"):
+            return True
+    return False
+
+
+def is_exportable_root(obj: Object) -> bool:
+    """Check whether a parentless object is written to the KN5 (with its children)."""
+    # Skip if object name starts with __
+    if obj.name.startswith("__"):
+        return False
+    # Skip instancer objects (tree/grass scatter systems)
+    if obj.name.startswith("KSTREE_GROUP_") or obj.name.startswith("GRASS_"):
+        return False
+    # Skip template/example objects (profiles, colliders, etc.)
+    name_lower = obj.name.lower()
+    if "_profile" in name_lower or "_example" in name_lower or "collider" in name_lower:
+        return False
+    # Skip if object is in a hidden collection
+    return not is_object_hidden(obj)
+
+
+class ExportScope:
+    """
+    Objects of one collection export: the collection's own objects are the
+    candidate roots, and their descendants are written with them.
+
+    Objects of child collections are left to the export of those collections.
+    Objects linked only to the scene collection (SceneIndex.unassigned_roots)
+    belong to no collection and are passed as extra_objects to the export of
+    the main collection (see is_main_collection).
+    """
+
+    def __init__(self, collection: Collection, extra_objects: Iterable[Object] = ()):
+        self.name = collection.name
+        self.object_names = frozenset(obj.name for obj in collection.objects) | {obj.name for obj in extra_objects}
+
+    def __contains__(self, obj: Object) -> bool:
+        return obj.name in self.object_names
+
+
+def get_exportable_collections(collections: Iterable[Collection]) -> list[Collection]:
+    """Get non-hidden, non-excluded collections with objects, each exported to its own file."""
+    exportable = []
+    for collection in collections:
+        # Skip if collection is hidden or excluded
+        if collection.hide_viewport or collection.hide_render:
+            continue
+        # Skip if collection name starts with __
+        if collection.name.startswith("__"):
+            continue
+        # Skip if collection has no objects
+        if not collection.objects:
+            continue
+        exportable.append(collection)
+    return exportable
+
+
+def is_main_collection(collection: Collection, collections: list[Collection]) -> bool:
+    """Check whether the collection is exported under the track name: the only one, or "default"."""
+    return len(collections) == 1 or collection.name == "default"
+
+
+class SceneIndex:
+    """Classification of the scene's objects (or of one export scope), built in one traversal."""
+
+    def __init__(self, scene: Scene, scope: ExportScope | None = None):
+        self.object_count = len(scene.objects)
+        self.scope_names = scope.object_names if scope else None
+        # exportable root objects, in scene order
+        self.roots: list[Object] = []
+        # roots and all their descendants not prefixed with __
+        self.exportable_objects: list[Object] = []
+        # exportable objects with geometry (MESH, CURVE, SURFACE)
+        self.meshes: list[Object] = []
+        # materials of exportable objects, sorted by name
+        self.materials: list[Material] = []
+        # images referenced by those materials, sorted by name
+        self.images: list[Image] = []
+        # every object with geometry, the candidates for surface assignment
+        self.surface_objects: list[Object] = []
+        # roots linked only to the scene collection, written with the main collection
+        self.unassigned_roots: list[Object] = []
+
+        for obj in scene.objects:
+            if obj.type in MESH_TYPES:
+                self.surface_objects.append(obj)
+            if not obj.parent and (scope is None or obj in scope) and is_exportable_root(obj):
+                self.roots.append(obj)
+                self._add_exportable(obj)
+                if scope is None and list(obj.users_collection) == [scene.collection]:
+                    self.unassigned_roots.append(obj)
+
+        materials: dict[str, Material] = {}
+        for obj in self.exportable_objects:
+            for slot in getattr(obj, 'material_slots', ()):
+                if slot.material and not slot.material.name.startswith("__"):
+                    materials[slot.material.name] = slot.material
+        self.materials = [materials[name] for name in sorted(materials)]
+
+        images: dict[str, Image] = {}
+        for material in self.materials:
+            images.update(analyze_material(material).images)
+        self.images = [images[name] for name in sorted(images)]
+
+    def _add_exportable(self, obj: Object) -> None:
+        self.exportable_objects.append(obj)
+        if obj.type in MESH_TYPES:
+            self.meshes.append(obj)
+        for child in obj.children:
+            if not child.name.startswith("__"):
+                self._add_exportable(child)
+
+
+def get_scene_index(context: Context, scope: ExportScope | None = None) -> SceneIndex:
+    """Get the index of the context's scene (or of a scope in it), rebuilding it if the scene changed."""
+    scene = context.scene
+    key = (scene.as_pointer(), scope.name if scope else None)
+    index = _scene_indices.get(key)
+    # Object count catches additions/removals made inside a running operator
+    if (
+        index is None
+        or index.object_count != len(scene.objects)
+        or index.scope_names != (scope.object_names if scope else None)
+    ):
+        index = SceneIndex(scene, scope)
+        _scene_indices[key] = index
+    return index
+
+
+def invalidate_scene_index() -> None:
+    _scene_indices.clear()
@@ -2,7 +2,8 @@ import re
 
 import bpy
 from bpy.props import (BoolProperty, CollectionProperty, EnumProperty,
-                       FloatProperty, PointerProperty, StringProperty)
+                       FloatProperty, IntProperty, PointerProperty,
+                       StringProperty)
 from bpy.types import Object, PropertyGroup
 
 from ..utils.files import find_maps, get_active_directory, set_path_reference
@@ -12,6 +13,10 @@ from .configs.layout import AC_LayoutSettings
 from .configs.lighting import AC_Lighting
 from .configs.surface import AC_Surface
 from .configs.track import AC_Track
+from .logic_index import compact_logic_numbers, get_logic_index
+from .scene_index import get_exportable_collections, get_scene_index, is_main_collection
+from .surface_groups import get_surface_groups as get_cached_surface_groups
+from .surface_query import DRIVABLE_SURFACE_KEYS, LOGIC_SURFACE_HEIGHT, find_surfaces_below
 
 
 class ExportSettings(PropertyGroup):
@@ -140,6 +145,48 @@ class ExportSettings(PropertyGroup):
         ),
         default="1024",
     )
+    texture_optimization: EnumProperty(
+        name="Texture Optimization",
+        description="Shrink textures based on their content before embedding them in the KN5",
+        items=(
+            ("OFF", "Off", "Embed textures as they are"),
+            ("STRIP", "Strip Channels", "Re-encode grayscale or fully opaque PNG textures without unused channels"),
+            ("COLLAPSE", "Collapse", "Replace solid-colour textures with 4x4 images and strip unused channels"),
+        ),
+        default="COLLAPSE",
+    )
+    use_texture_atlas: BoolProperty(
+        name="Build Texture Atlases",
+        description="Pack small diffuse textures of materials with the same shader settings into shared atlases",
+        default=False,
+    )
+    merge_duplicate_materials: BoolProperty(
+        name="Merge Duplicate Materials",
+        description=(
+            "Merge materials with identical KN5 properties (e.g. 'Concrete.001' into 'Concrete') so AC can batch "
+            "their meshes. Config sections targeting the merged material names no longer match"
+        ),
+        default=False,
+    )
+    atlas_max_tile_size: EnumProperty(
+        name="Atlas Max Texture Size",
+        description="Largest texture that can be packed into an atlas",
+        items=(
+            ("128", "128px", ""),
+            ("256", "256px", ""),
+            ("512", "512px", ""),
+        ),
+        default="256",
+    )
+    export_workers: IntProperty(
+        name="Export Workers",
+        description="Export KN5 collections in this many background Blender processes at once "
+        "(1 exports in this session)",
+        default=1,
+        min=1,
+        soft_max=8,
+        max=64,
+    )
 
 
 class KN5_MeshSettings(PropertyGroup):
@@ -281,27 +328,15 @@ class AC_Settings(PropertyGroup):
     def get_surface_groups(
         self, context, key: str | None = None, ex_key: str | None = None
     ) -> list[Object] | dict[str, Object]:
-        # dict of lists surface keys
-        groups = {}
-        for surface in self.surfaces:
-            if surface.key not in groups:
-                groups[surface.key] = []
-        groups["WALL"] = []
-
-        # if key is provided, only return objects from the scene matching the key
-        for surfaceKey in groups:
-            objects = [obj for obj in context.scene.objects if obj.type in ("MESH", "CURVE", "SURFACE")]
-            for obj in objects:
-                match = re.match(rf"^\d*{surfaceKey}.*$", obj.name)
-                if match:
-                    groups[surfaceKey].append(obj)
+        # WALL is always grouped, even without a surface entry
+        keys = tuple(dict.fromkeys([surface.key for surface in self.surfaces] + ["WALL"]))
+        groups = get_cached_surface_groups(context, keys)
 
         if key:
-            return groups[key]
+            return list(groups[key])
         if ex_key:
-            groups.pop(ex_key)
-            return [obj for sublist in groups.values() for obj in sublist]
-        return groups
+            return [obj for group_key, sublist in groups.items() if group_key != ex_key for obj in sublist]
+        return {group_key: list(sublist) for group_key, sublist in groups.items()}
 
     def get_walls(self, context) -> list[Object]:
         return self.get_surface_groups(context, "WALL")  # type: ignore
@@ -311,43 +346,59 @@ class AC_Settings(PropertyGroup):
 
     def check_copy_names(self, context) -> bool:
         # detect any AC objects with names ending in .001, .002, etc.
-        obs = [obj for obj in context.scene.objects if obj.name.startswith("AC_")]
-        for ob in obs:
-            if re.match(r".*\.\d+$", ob.name):
-                return True
-        return False
+        return get_logic_index(context).has_copy_names
 
     # return a list of {severity: int, message: str} objects
     # severity: 0 = info, 1 = warning (fixable), 2 = error (unfixable)
     def run_preflight(self, context) -> list:
-        self.error.clear()
-
+        """Run every preflight check now (the sidebar reads the cached result instead)."""
+        from .preflight import get_preflight
+        return get_preflight().update(context, force=True)
+
+    def run_preflight_category(self, context, category: str) -> list[dict]:
+        """Run the preflight checks of one category (see preflight.PREFLIGHT_CATEGORIES)."""
+        errors: list[dict] = []
+        if category == "project":
+            self._run_project_preflight_checks(context, errors)
+        elif category == "logic":
+            self._run_logic_preflight_checks(context, errors)
+        elif category == "units":
+            self._run_unit_preflight_checks(context, errors)
+        elif category == "kn5":
+            if self.export_settings.use_kn5:
+                self._run_kn5_preflight_checks(context, errors)
+        elif category == "files":
+            self._run_file_preflight_checks(errors)
+        return errors
+
+    def _run_project_preflight_checks(self, context, errors: list[dict]):
         # Check working directory first
         if not self.working_dir or self.working_dir == "":
-            self.error.append(
+            errors.append(
                 {"severity": 2, "message": "No working directory set", "code": "NO_WORKING_DIR"}
             )
 
         if not context.preferences.addons["io_scene_fbx"]:
-            self.error.append(
+            errors.append(
                 {"severity": 2, "message": "FBX Exporter not enabled", "code": "NO_FBX"}
             )
 
+    def _run_logic_preflight_checks(self, context, errors: list[dict]):
         # Check for start positions and pitboxes
         start_count = len(self.get_starts(context))
         pitbox_count = len(self.get_pitboxes(context))
 
         if start_count == 0:
-            self.error.append(
+            errors.append(
                 {"severity": 2, "message": "No start positions defined", "code": "NO_STARTS"}
             )
         if pitbox_count == 0:
-            self.error.append(
+            errors.append(
                 {"severity": 2, "message": "No pitboxes defined", "code": "NO_PITBOXES"}
             )
 
         if start_count > 0 and pitbox_count > 0 and start_count != pitbox_count:
-            self.error.append(
+            errors.append(
                 {
                     "severity": 2,
                     "message": "Pitbox <-> Race Start mismatch",
@@ -355,7 +406,7 @@ class AC_Settings(PropertyGroup):
                 }
             )
         if pitbox_count != self.track.pitboxes:
-            self.error.append(
+            errors.append(
                 {
                     "severity": 1,
                     "message": "Pitbox count mismatch",
@@ -363,7 +414,7 @@ class AC_Settings(PropertyGroup):
                 }
             )
         if not self.get_nonwalls(context):
-            self.error.append(
+            errors.append(
                 {
                     "severity": 2,
                     "message": "No track surfaces assigned",
@@ -371,19 +422,47 @@ class AC_Settings(PropertyGroup):
                 }
             )
         if not self.get_walls(context):
-            self.error.append(
+            errors.append(
                 {"severity": 0, "message": "No walls assigned", "code": "NO_WALLS"}
             )
         if self.check_copy_names(context):
-            self.error.append(
+            errors.append(
                 {
                     "severity": 1,
                     "message": "Track object index errors detected",
                     "code": "DUPLICATE_NAMES",
                 }
             )
+        self._check_logic_placement(context, errors)
+
+    def _check_logic_placement(self, context, errors: list[dict]):
+        # starts and pitboxes must be above a road or pit surface
+        groups = self.get_surface_groups(context)
+        if not any(groups.get(key) for key in DRIVABLE_SURFACE_KEYS):
+            return  # reported as NO_SURFACES
+        for category, label in (("pitboxes", "pitbox(es)"), ("starts", "start position(s)")):
+            objects = get_logic_index(context, category).get(category)
+            if not objects:
+                continue
+            # Origins sit LOGIC_SURFACE_HEIGHT above the surface, allow some slack
+            hits = find_surfaces_below(
+                context,
+                [obj.matrix_world.translation for obj in objects],
+                max_distance=LOGIC_SURFACE_HEIGHT * 3,
+            )
+            off_surface = [hit for hit in hits if hit is None or hit.surface_key not in DRIVABLE_SURFACE_KEYS]
+            if off_surface:
+                errors.append(
+                    {
+                        "severity": 0,
+                        "message": f"{len(off_surface)} {label} not on a road or pit surface",
+                        "code": "LOGIC_OFF_SURFACE",
+                    }
+                )
+
+    def _run_unit_preflight_checks(self, context, errors: list[dict]):
         if context.scene.unit_settings.system != "METRIC":
-            self.error.append(
+            errors.append(
                 {
                     "severity": 1,
                     "message": "Scene units are not set to Metric",
@@ -391,7 +470,7 @@ class AC_Settings(PropertyGroup):
                 }
             )
         if context.scene.unit_settings.length_unit != "METERS":
-            self.error.append(
+            errors.append(
                 {
                     "severity": 1,
                     "message": "Scene units are not set to Meters",
@@ -399,7 +478,7 @@ class AC_Settings(PropertyGroup):
                 }
             )
         if context.scene.unit_settings.scale_length != 1:
-            self.error.append(
+            errors.append(
                 {
                     "severity": 1,
                     "message": "Scene scale is not set to 1",
@@ -407,17 +486,14 @@ class AC_Settings(PropertyGroup):
                 }
             )
 
-        # KN5-specific checks
-        if self.export_settings.use_kn5:
-            self._run_kn5_preflight_checks(context)
-
+    def _run_file_preflight_checks(self, errors: list[dict]):
         # Check for missing map files (only if working directory is set)
         if self.working_dir and self.working_dir != "":
             if self.working_dir != get_active_directory():
                 set_path_reference(self.working_dir)
             map_files = find_maps()
             if not map_files["map"]:
-                self.error.append(
+                errors.append(
                     {
                         "severity": 2,
                         "message": 'No map file found "./map.png"',
@@ -425,7 +501,7 @@ class AC_Settings(PropertyGroup):
                     }
                 )
             if not map_files["outline"]:
-                self.error.append(
+                errors.append(
                     {
                         "severity": 2,
                         "message": 'No outline file found "./ui/outline.png"',
@@ -433,7 +509,7 @@ class AC_Settings(PropertyGroup):
                     }
                 )
             if not map_files["preview"]:
-                self.error.append(
+                errors.append(
                     {
                         "severity": 2,
                         "message": 'No preview file found "./ui/preview.png"',
@@ -441,64 +517,59 @@ class AC_Settings(PropertyGroup):
                     }
                 )
 
-        return self.error
-
-    def _is_object_in_hidden_collection(self, obj) -> bool:
-        """Check if object is in any hidden collection."""
-        for collection in obj.users_collection:
-            if collection.hide_viewport or collection.hide_render or collection.name.startswith("__"):
-                return True
-        return False
+    def _run_kn5_preflight_checks(self, context, errors: list[dict]):
+        """KN5-specific validation checks."""
+        scene_index = get_scene_index(context)
+
+        # Objects outside every collection are written to the main KN5, if there is one
+        collections = get_exportable_collections(context.blend_data.collections)
+        if scene_index.unassigned_roots and not any(
+            is_main_collection(collection, collections) for collection in collections
+        ):
+            names = [obj.name for obj in scene_index.unassigned_roots]
+            listed = ", ".join(names[:5]) + (f" and {len(names) - 5} more" if len(names) > 5 else "")
+            errors.append({
+                "severity": 1,
+                "message": (
+                    f"{len(names)} object(s) are in no collection and there is no 'default' collection"
+                    f" to export them with: {listed}"
+                ),
+                "code": "KN5_OBJECTS_NOT_IN_COLLECTION",
+            })
 
-    def _get_scene_materials(self, context):
-        """Get all materials used by objects in the active scene."""
-        materials = set()
-        for obj in context.scene.objects:
-            if obj.name.startswith("__"):
-                continue
-            if hasattr(obj, 'material_slots'):
-                for slot in obj.material_slots:
-                    if slot.material and not slot.material.name.startswith("__"):
-                        materials.add(slot.material)
-        return materials
+        # Check vertex counts of the parts the exporter will write (split by material, welded)
+        from .kn5.vertex_budget import estimate_vertex_budget
 
-    def _run_kn5_preflight_checks(self, context):
-        """KN5-specific validation checks."""
-        # Check vertex counts
-        for obj in context.scene.objects:
-            if obj.type != "MESH" or obj.name.startswith("__"):
+        depsgraph = context.evaluated_depsgraph_get()
+        for obj in scene_index.meshes:
+            budget = estimate_vertex_budget(obj, depsgraph)
+            if budget is None:
                 continue
-            if self._is_object_in_hidden_collection(obj):
-                continue
-
-            mesh_data = obj.to_mesh()
-            try:
-                vert_count = len(mesh_data.vertices)
-                if vert_count > 65536:
-                    self.error.append({
-                        "severity": 2,
-                        "message": f"Mesh '{obj.name}' has {vert_count:,} vertices (max 65,536)",
-                        "code": "KN5_VERTEX_LIMIT",
-                    })
-            finally:
-                obj.to_mesh_clear()
+            for material_name, (vert_count, part_count) in budget.get_oversized_parts().items():
+                errors.append({
+                    "severity": 0,
+                    "message": (
+                        f"Mesh '{obj.name}' ({material_name}) has ~{vert_count:,} vertices (max 65,536)"
+                        f" - will be split into {part_count} parts"
+                    ),
+                    "code": "KN5_VERTEX_LIMIT",
+                })
 
         # Check for procedural textures (only in materials used by scene objects)
-        procedural_types = {
-            'TEX_NOISE', 'TEX_GRADIENT', 'TEX_VORONOI', 'TEX_MAGIC',
-            'TEX_WAVE', 'TEX_MUSGRAVE', 'TEX_CHECKER', 'TEX_BRICK'
-        }
+        from .kn5.material_analysis import analyze_material
+        from .kn5.texture_baking import is_bake_current
+
         procedural_nodes = []
-        scene_materials = self._get_scene_materials(context)
+        scene_materials = scene_index.materials
+        bake_resolution = int(self.export_settings.texture_bake_resolution)
         for mat in scene_materials:
-            if not mat.node_tree:
-                continue
-            for node in mat.node_tree.nodes:
-                if node.type in procedural_types:
-                    procedural_nodes.append((mat.name, node.name))
+            procedural = analyze_material(mat).procedural_nodes
+            # Materials whose last bake still matches their node tree need no bake
+            if procedural and not is_bake_current(mat, bake_resolution):
+                procedural_nodes.extend((mat.name, node.name) for node in procedural)
 
         if procedural_nodes:
-            self.error.append({
+            errors.append({
                 "severity": 1,
                 "message": f"Found {len(procedural_nodes)} procedural texture(s) - click 'Fix Errors' to bake them",
                 "code": "KN5_PROCEDURAL_TEXTURES",
@@ -507,26 +578,14 @@ class AC_Settings(PropertyGroup):
         # Check for materials without node trees (only in scene)
         for mat in scene_materials:
             if not mat.node_tree:
-                self.error.append({
+                errors.append({
                     "severity": 0,
                     "message": f"Material '{mat.name}' has no node tree - will use default shader",
                     "code": "KN5_NO_NODES",
                 })
 
         # Check for objects with no materials
-        for obj in context.scene.objects:
-            if obj.type not in ("MESH", "CURVE", "SURFACE") or obj.name.startswith("__"):
-                continue
-            if self._is_object_in_hidden_collection(obj):
-                continue
-            # Skip instancer objects (tree/grass scatter systems)
-            if obj.name.startswith("KSTREE_GROUP_") or obj.name.startswith("GRASS_"):
-                continue
-            # Skip template/example objects
-            name_lower = obj.name.lower()
-            if "_profile" in name_lower or "_example" in name_lower or "collider" in name_lower:
-                continue
-
+        for obj in scene_index.meshes:
             # For curves/surfaces, check if they have modifiers that generate geometry
             # (Array, Geometry Nodes, etc.) - these will inherit materials from instances
             if obj.type in ("CURVE", "SURFACE"):
@@ -538,7 +597,7 @@ class AC_Settings(PropertyGroup):
                     continue
 
             if not obj.material_slots:
-                self.error.append({
+                errors.append({
                     "severity": 2,
                     "message": f"Object '{obj.name}' has no material assigned",
                     "code": "KN5_NO_MATERIAL",
@@ -546,21 +605,19 @@ class AC_Settings(PropertyGroup):
             else:
                 for i, slot in enumerate(obj.material_slots):
                     if not slot.material:
-                        self.error.append({
+                        errors.append({
                             "severity": 2,
                             "message": f"Object '{obj.name}' has empty material slot {i}",
                             "code": "KN5_EMPTY_SLOT",
                         })
 
         # Check for mesh objects with children (KN5 limitation)
-        for obj in context.scene.objects:
-            if obj.type != "MESH" or obj.name.startswith("__"):
-                continue
-            if self._is_object_in_hidden_collection(obj):
+        for obj in scene_index.meshes:
+            if obj.type != "MESH":
                 continue
             children = [child for child in obj.children if not child.name.startswith("__")]
             if children:
-                self.error.append({
+                errors.append({
                     "severity": 2,
                     "message": f"Mesh '{obj.name}' has {len(children)} child(ren) - KN5 meshes cannot have children",
                     "code": "KN5_MESH_CHILDREN",
@@ -707,68 +764,32 @@ class AC_Settings(PropertyGroup):
                 new_item.value = item[1]
 
     def get_starts(self, context) -> list[Object]:
-        return [obj for obj in context.scene.objects if obj.name.startswith("AC_START")]
+        return get_logic_index(context, "starts").get("starts")
 
     def get_pitboxes(self, context) -> list[Object]:
-        return [obj for obj in context.scene.objects if obj.name.startswith("AC_PIT")]
+        return get_logic_index(context, "pitboxes").get("pitboxes")
 
     def get_hotlap_starts(self, context) -> list[Object]:
-        return [
-            obj
-            for obj in context.scene.objects
-            if obj.name.startswith("AC_HOTLAP_START")
-        ]
+        return get_logic_index(context, "hotlap_starts").get("hotlap_starts")
 
     def get_time_gates(self, context, pairs=False) -> list[Object] | list[list[Object]]:
-        gates = [obj for obj in context.scene.objects if obj.name.startswith("AC_TIME")]
+        logic_index = get_logic_index(context, "time_gates")
         if not pairs:
-            return gates
-        l_gates = [gate for gate in gates if gate.name.endswith("_L")]
-        r_gates = [gate for gate in gates if gate.name.endswith("_R")]
-
-        grouped_gates = []
-        for gate in l_gates:
-            match = re.match(r"^AC_TIME_(\d+)_L$", gate.name)
-            if match:
-                pair = [gate]
-                pair.append(
-                    [g for g in r_gates if g.name == f"AC_TIME_{match.group(1)}_R"][0]
-                )
-                if pair[1]:
-                    grouped_gates.append(pair)
-        return grouped_gates
+            return logic_index.get("time_gates")
+        return logic_index.get_gate_pairs("time_gates")
 
     def get_ab_start_gates(self, context) -> list[Object]:
-        return [
-            obj for obj in context.scene.objects if obj.name.startswith("AC_AB_START")
-        ]
+        return get_logic_index(context, "ab_start_gates").get("ab_start_gates")
 
     def get_ab_finish_gates(self, context) -> list[Object]:
-        return [
-            obj for obj in context.scene.objects if obj.name.startswith("AC_AB_FINISH")
-        ]
+        return get_logic_index(context, "ab_finish_gates").get("ab_finish_gates")
 
     def get_audio_emitters(self, context) -> list[Object]:
-        return [obj for obj in context.scene.objects if obj.name.startswith("AC_AUDIO")]
-
-    def consolidate_logic_gates(self, context):
-        starts = self.get_starts(context)
-        hotlap_starts = self.get_hotlap_starts(context)
-        time_gates = self.get_time_gates(context)
-        pitboxes = self.get_pitboxes(context)
-
-        for i, gate in enumerate(starts):
-            gate.name = f"AC_START_{i}"
-        for i, gate in enumerate(hotlap_starts):
-            gate.name = f"AC_HOTLAP_START_{i}"
-        l_times = [gate for gate in time_gates if gate.name.endswith("_L")]
-        r_times = [gate for gate in time_gates if gate.name.endswith("_R")]
-        for i, gate in enumerate(l_times):
-            gate.name = f"AC_TIME_{i}_L"
-        for i, gate in enumerate(r_times):
-            gate.name = f"AC_TIME_{i}_R"
-        for i, box in enumerate(pitboxes):
-            box.name = f"AC_PIT_{i}"
+        return get_logic_index(context, "audio_emitters").get("audio_emitters")
+
+    def consolidate_logic_gates(self, context) -> int:
+        """Close gaps in the numbering of logic objects (autofix and export only)."""
+        return compact_logic_numbers(context)
 
 
 def get_settings() -> AC_Settings:
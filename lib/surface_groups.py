@@ -0,0 +1,66 @@
+"""
+Grouping of scene geometry by surface key.
+
+Object names carry their surface as a prefix (1ROAD_asphalt, WALL_fence,
+1SAND_TRAP_01). An object belongs to every key its name starts with once
+leading digits are stripped. The grouping is kept until objects are added,
+removed or renamed, or the surface keys change.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+
+from .scene_index import MESH_TYPES
+
+if TYPE_CHECKING:
+    from bpy.types import Context, Object, Scene
+
+# Leading digits, then the longest run of characters a surface key can hold
+# (see SURFACE_VALID_KEY). A key prefixes a name exactly when it prefixes this run.
+SURFACE_PREFIX_REGEX = re.compile(r"^\d*([A-Z_\-]*)")
+
+# scene pointer -> grouping
+_surface_groups: dict[int, SurfaceGroups] = {}
+
+
+class SurfaceGroups:
+    """Geometry objects of the scene bucketed by surface key, in scene order."""
+
+    def __init__(self, scene: Scene, keys: tuple[str, ...]):
+        self.object_count = len(scene.objects)
+        self.keys = keys
+        self.groups: dict[str, list[Object]] = {key: [] for key in keys}
+
+        # Keys match as a prefix of the name without leading digits (the old
+        # ^\d*KEY.* pattern), so KERB also claims KERBSTONE_1 and SAND_TRAP
+        # claims 1SAND_TRAP_01; resolve each distinct prefix to its keys only once.
+        prefix_keys: dict[str, tuple[str, ...]] = {}
+        for obj in scene.objects:
+            if obj.type not in MESH_TYPES:
+                continue
+            prefix = SURFACE_PREFIX_REGEX.match(obj.name).group(1)
+            matched = prefix_keys.get(prefix)
+            if matched is None:
+                matched = tuple(key for key in keys if prefix.startswith(key))
+                prefix_keys[prefix] = matched
+            for key in matched:
+                self.groups[key].append(obj)
+
+    def is_current(self, scene: Scene, keys: tuple[str, ...]) -> bool:
+        return self.keys == keys and self.object_count == len(scene.objects)
+
+
+def get_surface_groups(context: Context, keys: tuple[str, ...]) -> dict[str, list[Object]]:
+    """Get the scene's geometry grouped by the given surface keys (cached)."""
+    scene = context.scene
+    grouping = _surface_groups.get(scene.as_pointer())
+    if grouping is None or not grouping.is_current(scene, keys):
+        grouping = SurfaceGroups(scene, keys)
+        _surface_groups[scene.as_pointer()] = grouping
+    return grouping.groups
+
+
+def invalidate_surface_groups(*_args) -> None:
+    _surface_groups.clear()
@@ -0,0 +1,194 @@
+"""
+Spatial queries against the track surfaces.
+
+One BVH tree is built per surface key from the objects of that surface
+group (world space, modifiers applied). Trees are cached until one of their
+objects changes shape or moves, or the group itself changes, and answer
+batched ray casts and nearest-point queries for snapping and validation.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, NamedTuple
+
+import numpy as np
+from mathutils import Vector
+from mathutils.bvhtree import BVHTree
+
+if TYPE_CHECKING:
+    from bpy.types import Context, Depsgraph, Object
+
+# Surfaces logic objects (starts, pitboxes) are expected to sit on
+DRIVABLE_SURFACE_KEYS = ("ROAD", "PIT")
+
+DOWN = Vector((0, 0, -1))
+
+# Rays start this far above a point, so points sunk slightly into a surface still hit it
+PROBE_HEIGHT = 0.5
+
+# Logic object origins sit this far above the surface (the markers are drawn
+# with their floor one unit below the origin)
+LOGIC_SURFACE_HEIGHT = 1.0
+
+# surface key -> tree
+_surface_trees: dict[str, SurfaceTree] = {}
+# object name -> surface keys of the trees built from it
+_tree_keys_by_object: dict[str, set[str]] = {}
+
+
+class SurfaceHit(NamedTuple):
+    location: Vector
+    normal: Vector
+    distance: float
+    surface_key: str
+    object_name: str
+
+
+class SurfaceTree:
+    """BVH tree of every triangle of one surface group."""
+
+    def __init__(self, key: str, objects: list[Object], depsgraph: Depsgraph):
+        self.key = key
+        self.object_names = tuple(obj.name for obj in objects)
+        vertex_arrays = []
+        triangle_arrays = []
+        # first triangle of each object with triangles, to map hits back to objects
+        offsets = []
+        self.hit_object_names: list[str] = []
+        vertex_count = 0
+        triangle_count = 0
+        for obj in objects:
+            evaluated = obj.evaluated_get(depsgraph)
+            try:
+                mesh = evaluated.to_mesh()
+            except RuntimeError:
+                continue
+            try:
+                mesh.calc_loop_triangles()
+                vertices = np.empty(len(mesh.vertices) * 3, dtype=np.float64)
+                mesh.vertices.foreach_get("co", vertices)
+                triangles = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+                mesh.loop_triangles.foreach_get("vertices", triangles)
+            finally:
+                evaluated.to_mesh_clear()
+            if len(triangles) == 0:
+                continue
+            vertices = vertices.reshape(-1, 3)
+            matrix = np.array(obj.matrix_world, dtype=np.float64)
+            vertices = vertices @ matrix[:3, :3].T + matrix[:3, 3]
+            vertex_arrays.append(vertices)
+            triangle_arrays.append(triangles.reshape(-1, 3) + vertex_count)
+            offsets.append(triangle_count)
+            self.hit_object_names.append(obj.name)
+            vertex_count += len(vertices)
+            triangle_count += len(triangles) // 3
+
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.tree: BVHTree | None = None
+        if vertex_arrays:
+            self.tree = BVHTree.FromPolygons(
+                np.vstack(vertex_arrays).tolist(),
+                np.vstack(triangle_arrays).tolist(),
+                all_triangles=True,
+            )
+
+    def _get_object_name(self, triangle_index: int) -> str:
+        return self.hit_object_names[int(np.searchsorted(self.offsets, triangle_index, side="right")) - 1]
+
+    def ray_cast(self, origin: Vector, direction: Vector, max_distance: float) -> SurfaceHit | None:
+        if self.tree is None:
+            return None
+        location, normal, index, distance = self.tree.ray_cast(origin, direction, max_distance)
+        if location is None:
+            return None
+        return SurfaceHit(location, normal, distance, self.key, self._get_object_name(index))
+
+    def find_nearest(self, point: Vector, max_distance: float) -> SurfaceHit | None:
+        if self.tree is None:
+            return None
+        location, normal, index, distance = self.tree.find_nearest(point, max_distance)
+        if location is None:
+            return None
+        return SurfaceHit(location, normal, distance, self.key, self._get_object_name(index))
+
+
+def get_surface_trees(context: Context, keys: tuple[str, ...] | None = None) -> list[SurfaceTree]:
+    """Get the trees of the given surface keys (all surface groups by default), building stale ones."""
+    groups = context.scene.AC_Settings.get_surface_groups(context)
+    depsgraph = None
+    trees = []
+    for key in keys if keys is not None else groups:
+        objects = groups.get(key)
+        if not objects:
+            continue
+        tree = _surface_trees.get(key)
+        if tree is None or tree.object_names != tuple(obj.name for obj in objects):
+            if depsgraph is None:
+                depsgraph = context.evaluated_depsgraph_get()
+            tree = SurfaceTree(key, objects, depsgraph)
+            _surface_trees[key] = tree
+            for name in tree.object_names:
+                _tree_keys_by_object.setdefault(name, set()).add(key)
+        trees.append(tree)
+    return trees
+
+
+def ray_cast_surfaces(
+    context: Context,
+    origins: list[Vector],
+    direction: Vector = DOWN,
+    keys: tuple[str, ...] | None = None,
+    max_distance: float = 1.0e6,
+) -> list[SurfaceHit | None]:
+    """Closest hit of a ray from each origin against the given surfaces."""
+    trees = get_surface_trees(context, keys)
+    hits = []
+    for origin in origins:
+        best = None
+        for tree in trees:
+            hit = tree.ray_cast(origin, direction, max_distance)
+            if hit and (best is None or hit.distance < best.distance):
+                best = hit
+        hits.append(best)
+    return hits
+
+
+def find_nearest_surfaces(
+    context: Context,
+    points: list[Vector],
+    keys: tuple[str, ...] | None = None,
+    max_distance: float = 1.0e6,
+) -> list[SurfaceHit | None]:
+    """Nearest surface point to each point among the given surfaces."""
+    trees = get_surface_trees(context, keys)
+    hits = []
+    for point in points:
+        best = None
+        for tree in trees:
+            hit = tree.find_nearest(point, max_distance)
+            if hit and (best is None or hit.distance < best.distance):
+                best = hit
+        hits.append(best)
+    return hits
+
+
+def find_surfaces_below(
+    context: Context,
+    points: list[Vector],
+    keys: tuple[str, ...] | None = None,
+    max_distance: float = 1.0e6,
+) -> list[SurfaceHit | None]:
+    """First surface straight below each point (or just above it, within PROBE_HEIGHT)."""
+    up = Vector((0, 0, PROBE_HEIGHT))
+    return ray_cast_surfaces(context, [point + up for point in points], DOWN, keys, max_distance + PROBE_HEIGHT)
+
+
+def invalidate_surface_object(object_name: str) -> None:
+    """Drop the trees built from an object whose shape or placement changed."""
+    for key in _tree_keys_by_object.pop(object_name, ()):
+        _surface_trees.pop(key, None)
+
+
+def clear_surface_trees() -> None:
+    _surface_trees.clear()
+    _tree_keys_by_object.clear()